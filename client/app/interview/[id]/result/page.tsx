@@ -39,7 +39,12 @@ interface SessionResult {
     };
     code: string;
     transcript?: Array<{ role: 'user' | 'ai' | 'assistant'; content: string }>;
+    status?: 'active' | 'completed';
+    // Set by the backend when the agent gave up generating the report
+    reportError?: string;
     feedback?: {
+        // Set while the report is still being generated; some sections may be missing
+        partial?: boolean;
         overall_score: number;
         correctness: boolean;
         dimension_scores: {
@@ -53,9 +58,15 @@ interface SessionResult {
         code_issues?: CodeIssue[];
         transcript_issues?: TranscriptIssue[];
         feedback_markdown: string;
+        // Optional sections that failed and were filled with defaults
+        degraded?: string[];
     };
 }
 
+// Stop waiting for a report still in progress after this long (the worker retries with backoff)
+const REPORT_POLL_TIMEOUT_MS = 5 * 60 * 1000;
+const REPORT_POLL_INTERVAL_MS = 2000;
+
 function parseMarkdownSections(markdown: string) {
     const sections: Record<string, string> = {};
     const lines = markdown.split('\n');
@@ -115,6 +126,7 @@ function extractBullets(text: string): string[] {
 export default function ResultPage({ params }: { params: { id: string } }) {
     const [session, setSession] = useState<SessionResult | null>(null);
     const [loading, setLoading] = useState(true);
+    const [reportDelayed, setReportDelayed] = useState(false);
 
     useEffect(() => {
         const fetchResult = async () => {
@@ -130,6 +142,32 @@ export default function ResultPage({ params }: { params: { id: string } }) {
         fetchResult();
     }, [params.id]);
 
+    // Sections arrive as they are generated: refresh until the final report lands,
+    // the backend reports that it failed, or we have waited REPORT_POLL_TIMEOUT_MS.
+    // A queued report may not have published anything yet when the interview ends.
+    const reportFailed = !!session?.reportError;
+    const awaitingReport = !reportFailed && (
+        !!session?.feedback?.partial || (session?.status === 'completed' && !session.feedback)
+    );
+    useEffect(() => {
+        if (!awaitingReport) return;
+        const startedAt = Date.now();
+        const timer = setInterval(async () => {
+            if (Date.now() - startedAt > REPORT_POLL_TIMEOUT_MS) {
+                clearInterval(timer);
+                setReportDelayed(true);
+                return;
+            }
+            try {
+                const res = await fetch(`http://localhost:4000/api/session/${params.id}`);
+                if (res.ok) setSession(await res.json());
+            } catch (error) {
+                console.error(error);
+            }
+        }, REPORT_POLL_INTERVAL_MS);
+        return () => clearInterval(timer);
+    }, [awaitingReport, params.id]);
+
     if (loading) {
         return (
             <div className="min-h-screen bg-white flex items-center justify-center">
@@ -141,6 +179,19 @@ export default function ResultPage({ params }: { params: { id: string } }) {
         );
     }
 
+    if (awaitingReport && !session?.feedback) {
+        return (
+            <div className="min-h-screen bg-white flex items-center justify-center">
+                <div className="text-center">
+                    {!reportDelayed && <div className="w-12 h-12 border-4 border-blue-600 border-t-transparent rounded-full animate-spin mx-auto mb-4" />}
+                    <p className="text-slate-500 font-bold tracking-tight uppercase text-xs tracking-[0.2em]">
+                        {reportDelayed ? 'Report Delayed — check back in a few minutes' : 'Generating Report...'}
+                    </p>
+                </div>
+            </div>
+        );
+    }
+
     if (!session || !session.feedback) {
         return (
             <div className="min-h-screen bg-white flex items-center justify-center p-8 relative overflow-hidden">
@@ -149,8 +200,8 @@ export default function ResultPage({ params }: { params: { id: string } }) {
                     <div className="w-20 h-20 bg-slate-50 rounded-[32px] flex items-center justify-center mx-auto mb-8 border border-slate-100 brivio-shadow">
                         <Box className="w-10 h-10 text-blue-600" />
                     </div>
-                    <h2 className="text-3xl font-black text-slate-950 mb-4 tracking-tight uppercase">No Session Data</h2>
-                    <p className="text-slate-500 mb-10 leading-relaxed font-medium">Complete an interview scenario with Socratis to generate your specialized technical report.</p>
+                    <h2 className="text-3xl font-black text-slate-950 mb-4 tracking-tight uppercase">{session?.reportError ? 'Report Unavailable' : 'No Session Data'}</h2>
+                    <p className="text-slate-500 mb-10 leading-relaxed font-medium">{session?.reportError ? 'The report for this interview could not be generated.' : 'Complete an interview scenario with Socratis to generate your specialized technical report.'}</p>
                     <Link
                         href="/interview/new"
                         className="inline-flex items-center gap-3 px-10 py-5 bg-blue-600 text-white rounded-full font-black text-xs uppercase tracking-widest hover:scale-105 transition-all shadow-xl shadow-blue-500/20"
@@ -162,8 +213,23 @@ export default function ResultPage({ params }: { params: { id: string } }) {
         );
     }
 
-    const { feedback, question, code } = session;
-    const sections = parseMarkdownSections(feedback.feedback_markdown);
+    const { question, code } = session;
+    const feedback = {
+        ...session.feedback,
+        overall_score: session.feedback.overall_score ?? 0,
+        dimension_scores: session.feedback.dimension_scores ?? {
+            problem_solving: 0,
+            algorithmic_thinking: 0,
+            code_implementation: 0,
+            testing: 0,
+            time_management: 0,
+            communication: 0,
+        },
+    };
+    const sections = parseMarkdownSections(feedback.feedback_markdown ?? '');
+    const statusLabel = feedback.partial
+        ? (reportFailed ? 'Report Failed' : reportDelayed ? 'Report Delayed' : 'Analysis In Progress')
+        : feedback.degraded?.length ? 'Analysis Incomplete' : 'Analysis Verified';
 
     const radarData = [
         { dimension: 'Logic', score: feedback.dimension_scores.problem_solving },
@@ -219,8 +285,15 @@ export default function ResultPage({ params }: { params: { id: string } }) {
                     <div className="text-left">
                         <div className="inline-flex items-center gap-2 px-3 py-1 rounded-full bg-blue-50 border border-blue-100 mb-8">
                             <ShieldCheck className="w-3.5 h-3.5 text-blue-600" />
-                            <span className="text-[11px] font-black uppercase tracking-[0.2em] text-blue-600">Analysis Verified</span>
+                            <span className="text-[11px] font-black uppercase tracking-[0.2em] text-blue-600">{statusLabel}</span>
                         </div>
+                        {feedback.partial && (reportFailed || reportDelayed) && (
+                            <p className="text-sm text-rose-600 font-bold mb-8">
+                                {reportFailed
+                                    ? 'The full report could not be generated; the sections below are incomplete.'
+                                    : 'The full report is taking longer than expected. Refresh this page later.'}
+                            </p>
+                        )}
 
                         <h1 className="text-6xl md:text-[80px] font-black leading-[0.9] tracking-tighter text-slate-950 mb-8">
                             {getPerformanceLabel(feedback.overall_score).split(' ').map((word, i) => (
@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useRouter } from 'next/navigation';
 import { Panel, Group as PanelGroup, Separator as PanelResizeHandle } from 'react-resizable-panels';
 import { CodeEditor } from './CodeEditor';
@@ -18,6 +18,7 @@ import {
 } from '@livekit/components-react';
 import { RoomEvent, RemoteParticipant, Track, ConnectionState } from 'livekit-client';
 import '@livekit/components-styles';
+import { CodeSync, PROTOCOL_VERSION, decodePacket, encodePacket } from '@/lib/dataProtocol';
 
 interface InterviewRoomProps {
     sessionId: string;
@@ -60,6 +61,32 @@ const ActiveInterviewSession = ({
     const remoteParticipants = useRemoteParticipants();
     const [isSpeaking, setIsSpeaking] = useState(false);
 
+    // Code updates go out as deltas against what the agent already has
+    const codeSyncRef = useRef(new CodeSync());
+    const codeRef = useRef(code);
+    codeRef.current = code;
+    const codeSendChain = useRef<Promise<void>>(Promise.resolve());
+
+    // Serialized so sequence numbers reach the agent in order
+    const sendCode = useCallback(() => {
+        codeSendChain.current = codeSendChain.current.then(async () => {
+            if (!localParticipant || room.state !== ConnectionState.Connected) return;
+            try {
+                const packet = await codeSyncRef.current.next(codeRef.current);
+                if (!packet) return;
+                await localParticipant.publishData(encodePacket(packet), { reliable: true });
+                console.log(`📤 Sent ${packet.type} #${packet.seq} to agent`);
+            } catch (e) {
+                // The agent may have missed it: start over from a full snapshot
+                codeSyncRef.current.reset();
+                // Silently ignore connection errors - they're expected during reconnection
+                if (!(e instanceof Error) || !e.message.includes('PC manager')) {
+                    console.error("Failed to send code update:", e);
+                }
+            }
+        });
+    }, [room, localParticipant]);
+
     // CRITICAL: Explicitly handle remote audio tracks to ensure agent voice plays
     useEffect(() => {
         const handleTrackSubscribed = (track: any, publication: any, participant: any) => {
@@ -87,6 +114,7 @@ const ActiveInterviewSession = ({
         console.log("🔄 Session ID changed, resetting context ack state");
         setProblemAckReceived(false);
         setProblemContextSent(false);
+        codeSyncRef.current.reset();
     }, [sessionId]);
 
     // CRITICAL: Send problem context to agent on connect - RETRY UNTIL ACKNOWLEDGED
@@ -100,15 +128,15 @@ const ActiveInterviewSession = ({
             if (room.state !== ConnectionState.Connected && room.state !== ConnectionState.Reconnecting) return;
 
             try {
-                const problemData = {
+                const problemData = encodePacket({
                     type: 'problem',
+                    v: PROTOCOL_VERSION,
                     title: question.title,
                     description: question.description,
                     examples: question.examples
-                };
-                const encoder = new TextEncoder();
+                });
                 // Send reliable message
-                await localParticipant.publishData(encoder.encode(JSON.stringify(problemData)), { reliable: true });
+                await localParticipant.publishData(problemData, { reliable: true });
                 console.log(`📝 [Retry] Sent problem context: "${question.title}" (Waiting for Ack)`);
             } catch (e) {
                 // Ignore temporary connection issues
@@ -155,8 +183,7 @@ const ActiveInterviewSession = ({
     useEffect(() => {
         const handleData = (payload: Uint8Array, participant?: RemoteParticipant) => {
             try {
-                const decoder = new TextDecoder();
-                const data = JSON.parse(decoder.decode(payload));
+                const data = decodePacket(payload);
                 if (data.type === 'transcript') {
                     // Filter out function calls and internal thinking from transcript
                     let cleanedText = data.text
@@ -185,12 +212,19 @@ const ActiveInterviewSession = ({
                 } else if (data.type === 'problem_ack') {
                     console.log("✅ Agent acknowledged problem context:", data.title);
                     setProblemAckReceived(true);
+                    // The agent is listening now; make sure it starts from a full snapshot
+                    codeSyncRef.current.reset();
+                    sendCode();
+                } else if (data.type === 'code_resync') {
+                    console.log(`🔁 Agent requested a code snapshot (has #${data.seq})`);
+                    codeSyncRef.current.reset();
+                    sendCode();
                 }
             } catch (e) { console.error(e); }
         };
         room.on(RoomEvent.DataReceived, handleData);
         return () => { room.off(RoomEvent.DataReceived, handleData); };
-    }, [room, onEndCall]);
+    }, [room, onEndCall, sendCode]);
 
     // LiveKit Transcription Event - PRIMARY termination detection
     useEffect(() => {
@@ -242,21 +276,9 @@ const ActiveInterviewSession = ({
         // Only send if connected
         if (room.state !== ConnectionState.Connected) return;
 
-        const handler = setTimeout(async () => {
-            try {
-                const strData = JSON.stringify({ type: 'code', content: code });
-                const encoder = new TextEncoder();
-                await localParticipant.publishData(encoder.encode(strData), { reliable: true });
-                console.log("📤 Sent code update to agent");
-            } catch (e) {
-                // Silently ignore connection errors - they're expected during reconnection
-                if (!(e instanceof Error) || !e.message.includes('PC manager')) {
-                    console.error("Failed to send code update:", e);
-                }
-            }
-        }, 500);
+        const handler = setTimeout(sendCode, 500);
         return () => clearTimeout(handler);
-    }, [code, room, localParticipant, room?.state]);
+    }, [code, room, localParticipant, room?.state, sendCode]);
 
     // Mute Tingle
     const toggleMute = async () => {
@@ -0,0 +1,147 @@
+// Data-channel protocol shared with the agent (mirrors server/agent/data_protocol.py).
+// Code updates go out as a snapshot first, then single-splice deltas against the
+// previous sequence number. Large payloads are zlib-compressed ("deflate") + base64.
+// Offsets are JavaScript string indices (UTF-16 code units).
+
+export const PROTOCOL_VERSION = 1;
+
+export interface ProblemPacket {
+    type: 'problem';
+    v: number;
+    title: string;
+    description: string;
+    examples?: string[];
+}
+
+export interface ProblemAckPacket {
+    type: 'problem_ack';
+    v?: number;
+    title: string;
+}
+
+export interface CodePacket {
+    type: 'code';
+    v: number;
+    seq: number;
+    content: string;
+    z?: string;
+}
+
+export interface CodeDeltaPacket {
+    type: 'code_delta';
+    v: number;
+    seq: number;
+    base_seq: number;
+    start: number;
+    end: number;
+    text: string;
+    z?: string;
+    length: number;
+}
+
+export interface CodeResyncPacket {
+    type: 'code_resync';
+    v: number;
+    seq: number;
+}
+
+export type Packet = ProblemPacket | ProblemAckPacket | CodePacket | CodeDeltaPacket | CodeResyncPacket;
+
+const encoder = new TextEncoder();
+const decoder = new TextDecoder();
+
+export function encodePacket(packet: Packet): Uint8Array {
+    return encoder.encode(JSON.stringify(packet));
+}
+
+export function decodePacket(payload: Uint8Array): any {
+    return JSON.parse(decoder.decode(payload));
+}
+
+// Compress only when it is likely to pay for the base64 overhead
+const COMPRESS_OVER_CHARS = 512;
+// Send a fresh snapshot every N deltas as a belt-and-braces resync
+const SNAPSHOT_EVERY = 200;
+
+async function deflateBase64(text: string): Promise<string | null> {
+    if (typeof CompressionStream === 'undefined') return null;
+    const stream = new Blob([text]).stream().pipeThrough(new CompressionStream('deflate'));
+    const bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+    let binary = '';
+    for (let i = 0; i < bytes.length; i += 0x8000) {
+        binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+    }
+    return btoa(binary);
+}
+
+function isHighSurrogate(code: number) {
+    return code >= 0xd800 && code <= 0xdbff;
+}
+
+function isLowSurrogate(code: number) {
+    return code >= 0xdc00 && code <= 0xdfff;
+}
+
+export class CodeSync {
+    private seq = 0;
+    private sent: string | null = null;
+    private deltasSinceSnapshot = 0;
+
+    // Next send is a full snapshot (after connect, or when the agent asks for one)
+    reset() {
+        this.sent = null;
+    }
+
+    async next(code: string): Promise<CodePacket | CodeDeltaPacket | null> {
+        if (code === this.sent) return null;
+        const previous = this.sent;
+        this.sent = code;
+        this.seq += 1;
+
+        if (previous === null || this.deltasSinceSnapshot >= SNAPSHOT_EVERY) {
+            this.deltasSinceSnapshot = 0;
+            const packet: CodePacket = { type: 'code', v: PROTOCOL_VERSION, seq: this.seq, content: code };
+            if (code.length > COMPRESS_OVER_CHARS) {
+                const z = await deflateBase64(code);
+                if (z !== null) {
+                    packet.content = '';
+                    packet.z = z;
+                }
+            }
+            return packet;
+        }
+
+        let prefix = 0;
+        const limit = Math.min(previous.length, code.length);
+        while (prefix < limit && previous.charCodeAt(prefix) === code.charCodeAt(prefix)) prefix++;
+        let suffix = 0;
+        while (
+            suffix < limit - prefix &&
+            previous.charCodeAt(previous.length - 1 - suffix) === code.charCodeAt(code.length - 1 - suffix)
+        ) suffix++;
+        // Never cut between the halves of a surrogate pair
+        if (prefix > 0 && isHighSurrogate(previous.charCodeAt(prefix - 1))) prefix--;
+        if (suffix > 0 && isLowSurrogate(code.charCodeAt(code.length - suffix))) suffix--;
+
+        this.deltasSinceSnapshot += 1;
+        const text = code.slice(prefix, code.length - suffix);
+        const packet: CodeDeltaPacket = {
+            type: 'code_delta',
+            v: PROTOCOL_VERSION,
+            seq: this.seq,
+            base_seq: this.seq - 1,
+            start: prefix,
+            end: previous.length - suffix,
+            text,
+            length: code.length,
+        };
+        if (text.length > COMPRESS_OVER_CHARS) {
+            const z = await deflateBase64(text);
+            if (z !== null) {
+                packet.text = '';
+                packet.z = z;
+            }
+        }
+        return packet;
+    }
+}
@@ -1,8 +1,9 @@
 import asyncio
 import logging
 import os
-import json
-import aiohttp
+import time
+from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
 from livekit.agents import (
@@ -11,30 +12,100 @@ from livekit.agents import (
     JobContext,
     AgentSession,
     ChatContext,
-    ChatMessage,
-    ChatRole,
 )
 from livekit.agents.llm import LLM
-from livekit.plugins import deepgram, openai, silero
+from livekit.agents.worker import ServerEnvOption
 import livekit.agents.voice as voice
+from livekit.agents.voice import room_io
 
-# --- Deepgram/TTS fix ---
-from deepgram_patch import patch_deepgram_tts
-patch_deepgram_tts()
-
+# Load .env before anything reads TTS_* / service settings
 load_dotenv()
 
+import http_pool
+import tts_cache
+import tts_hedge
+from instruction_scheduler import InstructionScheduler
+from code_context import CodeContext, estimate_tokens
+from code_analysis import CodeAnalyzer
+import code_analysis
+from data_protocol import Code, CodeBuffer, CodeDelta, Problem, ProblemAck, decode_packet, encode_packet, packet_type
+from conversation_memory import ConversationMemory, SUMMARY_PROMPT
+import llm_utils
+import latency_metrics
+import loop_health
+from report_engine import ReportEngine
+from report_queue import ReportQueue
+from transcript_log import TranscriptLog, load_session, recover_orphans
+from report_worker import partial_publisher, submit_analysis, submit_failure
+from worker_load import SessionLoadReporter, WorkerLoad
+from tts_pipeline import SentencePipeline
+from audio_format import negotiate_tts_format
+from pause_speculator import PAUSE_COMMENT_PROMPT, PauseSpeculator, number_lines
+from greeting import OverlappedGreeting
+
 logger = logging.getLogger("socratis-agent")
 logger.setLevel(logging.INFO)
 
+# --- Plugins (loaded once, outside module import) ---
+# Every job process re-imports this module, so it stays light: the Deepgram/Silero/OpenAI
+# plugins and the Deepgram TTS patch come from load_plugins(). The worker calls it before
+# starting so the plugins register and LiveKit preloads them into its forkserver once;
+# job processes inherit them and only apply the patch in prewarm, before any job arrives.
+_plugins = None
+
+
+def load_plugins():
+    """(deepgram, silero) plugin modules, imported and patched on first call. Main thread only."""
+    global _plugins
+    if _plugins is None:
+        from livekit.plugins import deepgram, openai, silero  # noqa: F401  (openai: see llm_utils.groq_llm)
+        from deepgram_patch import patch_deepgram_tts
+
+        patch_deepgram_tts()
+        _plugins = (deepgram, silero)
+    return _plugins
+
+
+TTS_MODEL = "aura-helios-en"
+# Rate of the published agent track: a static setting, not probed from the room. The
+# default is LiveKit's own output default, so out of the box nothing changes; other rates
+# are opt-in. Deepgram is asked for exactly this rate when it offers it, so frames reach
+# the AudioSource without a resampler in between.
+AUDIO_OUTPUT_SAMPLE_RATE = int(os.environ.get("AGENT_AUDIO_SAMPLE_RATE", "24000"))
+TTS_FORMAT = negotiate_tts_format(AUDIO_OUTPUT_SAMPLE_RATE)
+TTS_SAMPLE_RATE = TTS_FORMAT.request_rate
+
+FALLBACK_GREETING = "Hello! I'm ready to start. Could you tell me which problem we are working on today?"
+
+# Mirrors the QUESTIONS pool in server/src/routes/interview.ts
+KNOWN_PROBLEM_TITLES = ["Two Sum", "Request Throttler", "LRU Cache", "Next Permutation"]
+
+def greeting_for(problem_title: str) -> str:
+    return f"Hello! I'm Socratis. I see we're working on '{problem_title}'. Walk me through your approach before we start coding."
+
+# Stock interviewer phrases that are synthesized once and served from the TTS cache
+STOCK_PHRASES = [FALLBACK_GREETING] + [greeting_for(title) for title in KNOWN_PROBLEM_TITLES]
+
 # ============================================================================
 # SOCRATIC INTERVIEWER PROMPT
 # ============================================================================
 
-def build_interview_instructions(problem_title="the coding task", problem_desc="the problem description", current_code="// No code yet") -> str:
+# "incremental" injects a bounded, line-numbered window of the code; "full" injects the whole buffer
+CODE_CONTEXT_MODE = os.environ.get("CODE_CONTEXT_MODE", "incremental")
+
+def build_interview_instructions(problem_title="the coding task", problem_desc="the problem description", current_code="// No code yet", windowed=False, analysis="") -> str:
     """
     Constructs the Socratic instructions with real-time context injected.
     """
+    code_note = (
+        "\n   - Lines are prefixed with their line number (`N|`). Large files show only the recently edited regions plus an outline of the rest."
+        if windowed else ""
+    )
+    analysis_section = (
+        "\n3. **[STATIC ANALYSIS]**: Precomputed from the code above; line numbers match the editor. They are heuristic hints from a static pass and can be wrong: check each one against the code before you build a question on it.\n"
+        f"{analysis}\n"
+        if analysis else ""
+    )
     return f"""# ROLE: SOCRATIS - Senior Technical Interviewer
 
 You are Socratis, a calm, professional Senior Software Engineer.
@@ -44,11 +115,11 @@ You are currently evaluating the candidate one-on-one.
 1. **[CURRENT PROBLEM]**: {problem_title}
    - Description: {problem_desc}
    - **IMPORTANT**: If they ask "What is the problem?", briefly remind them of the title. BUT DO NOT ask them "What is the problem?". YOU SEE IT.
-2. **[CANDIDATE CODE]**: 
+2. **[CANDIDATE CODE]**: {code_note}
 ```javascript
 {current_code}
 ```
-
+{analysis_section}
 ## INTERVIEW STAGES
 1. **Approach Review**: BEFORE they code, ask them to explain their plan.
 2. **Silent Observation**: While they type, STAY SILENT. If they pause for >30s, comment on a SPECIFIC line of their code.
@@ -61,214 +132,293 @@ You are currently evaluating the candidate one-on-one.
 """
 
 # ============================================================================
-# FORENSIC REPORT GENERATOR (SINGLE AGENT MODE)
+# BOUNDED CONVERSATION MEMORY
 # ============================================================================
 
-async def generate_assessment_report(llm: LLM, session_id: str, problem_title: str, final_code: str, chat_messages):
+class SocratisAgent(voice.Agent):
+    """
+    voice.Agent whose LLM sees a bounded view of the conversation.
+    The full history stays in `chat_ctx` for the post-interview report.
+    The LLM and TTS nodes also mark per-turn latency stages. With a `tts_pipeline`,
+    replies are synthesized sentence by sentence instead of through the session's TTS.
+    """
+
+    def __init__(self, memory: ConversationMemory, tts_pipeline: Optional[SentencePipeline] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.memory = memory
+        self.tts_pipeline = tts_pipeline
+
+    async def llm_node(self, chat_ctx, tools, model_settings):
+        first_token = True
+        async for chunk in voice.Agent.default.llm_node(self, self.memory.prepare(chat_ctx), tools, model_settings):
+            if first_token:
+                latency_metrics.mark("llm_first_token")
+                first_token = False
+            yield chunk
+        latency_metrics.mark("llm_last_token")
+
+    async def tts_node(self, text, model_settings):
+        first_frame = True
+        if self.tts_pipeline is not None:
+            frames = self.tts_pipeline.frames(text)
+        else:
+            frames = voice.Agent.default.tts_node(self, text, model_settings)
+        async for frame in frames:
+            if first_frame:
+                latency_metrics.mark("first_audio_frame")
+                first_frame = False
+            yield frame
+
+
+def make_summarizer(llm: LLM):
+    async def summarize(previous_summary: str, transcript: str) -> str:
+        user_content = f"## PREVIOUS NOTES\n{previous_summary or '(none)'}\n\n## NEW EXCHANGES\n{transcript}"
+        return await llm_utils.complete(llm, SUMMARY_PROMPT, user_content)
+    return summarize
+
+# ============================================================================
+# FORENSIC REPORT GENERATOR (DECOMPOSED, CONCURRENT SUB-ANALYSES)
+# ============================================================================
+
+def build_transcript(chat_ctx) -> str:
+    lines = []
+    for item in chat_ctx.items:
+        if getattr(item, "type", None) != "message" or item.role not in ("user", "assistant"):
+            continue
+        text = item.text_content
+        if text:
+            role = "CANDIDATE" if item.role == "user" else "SOCRATIS"
+            lines.append(f"{role}: {text}")
+    return "\n".join(lines)
+
+
+async def generate_assessment_report(llm: LLM, session_id: str, problem_title: str, final_code: str, chat_messages=None, transcript_log_path=None):
     """
     Generates a FORENSIC, HYPER-CRITICAL evaluation of the session and submits it to the backend.
+    With a transcript log the conversation is streamed from it in chunks instead of `chat_messages`.
     """
-    logger.info("[REPORT] Starting forensic analysis (Single Agent)...")
-    
-    # 1. Prepare transcript
-    transcript = ""
-    for msg in chat_messages.items:
-        role = "CANDIDATE" if msg.role == ChatRole.USER else "SOCRATIS"
-        transcript += f"{role}: {msg.content}\n"
-
-    # 2. Build the Forensic System Prompt
-    system_prompt = """
-# 🎯 SOCRATIS REPORT AGENT - IDENTITY
-
-You are the **Socratis Report Agent**, an elite, hyper-critical technical interview evaluator for top-tier tech companies (Google, Netflix, HFT firms).
-The interview has concluded. Your job is to provide a **Forensic, Deep-Dive Analysis**.
-The user explicitly wants to know:
-1. **Every single mistake** in their code (syntax, logic, edge cases, complexity, style, naming).
-2. **Every single flaw** in their verbal communication (rambling, imprecision, missing concepts, ignoring hints).
-3. **Specific, actionable corrections** for each issue.
-
-## YOUR CHARACTERISTICS:
-- **Ruthlessly Detailed**: Do not glaze over minor errors. Address everything. If the code works but is ugly, say it.
-- **Pinpoint Specificity**: Never say "improve error handling". Say "Line 45 catches a generic Exception which masks the specific internal error."
-- **Direct & Professional**: Use clear, high-impact language.
-- **Evidence-Based**: You MUST cite specific line numbers, variable names, and exact transcript quotes for every claim.
-- **No Filler**: Never praise "Attendance" or "Politeness". Only praise technical or communication *skills*. If there are no strengths, state "None".
-
-# 🚨 MANDATORY OUTPUT REQUIREMENTS
-
-## RULE 1: DEEP CODE AUDIT (The "Issues List")
-- **IF CODE IS EMPTY**: You MUST generate a `code_issue` at Line 1 with severity "error" and issue "Missing Implementation".
-- **IF CODE EXISTS**: List EVERY issue found. Do not limit yourself.
-- **Syntactical**: Typos, missing semicolons, wrong strict types.
-- **Logical**: Infinite loops, off-by-one errors, unnecessary computations.
-- **Best Practices**: Variable naming (e.g., 'x' vs 'userIndex'), lack of comments, magic numbers.
-
-## RULE 2: TRANSCRIPT FORENSICS (The "Verbal Audit")
-- **IF TRANSCRIPT IS SHORT/EMPTY**: You MUST generate a `transcript_issue` with severity "error" stating "Lack of Communication" or "Failure to Explain Approach".
-- You must identify SPECIFIC issues in the spoken responses.
-- **Precision**: Did they say "Hashtable" when they meant "HashSet"?
-- **Clarity**: Did they ramble?
-- **Responsiveness**: Did they ignore a hint from the interviewer?
-
-## RULE 3: Structure
-- The `code_issues` array MUST NOT be empty if there are any flaws.
-- The `transcript_issues` array MUST NOT be empty if there are any flaws.
-- Your markdown feedback MUST follow the "What Went Well" / "Areas to Improve" structure.
-- **"Areas to Improve" must be the DOMINANT section.**
-
----
-
-# 📝 REQUIRED OUTPUT STRUCTURE (JSON ONLY)
-
-Your response MUST be valid JSON with this exact structure:
-
-```json
-{
-  "overall_score": <number 1-10>,
-  "correctness": <boolean>,
-  "dimension_scores": {
-    "problem_solving": <1-10>,
-    "algorithmic_thinking": <1-10>,
-    "code_implementation": <1-10>,
-    "testing": <1-10>,
-    "time_management": <1-10>,
-    "communication": <1-10>
-  },
-  "code_issues": [
-    {
-      "line_number": <number>,
-      "code_snippet": "<exact code or 'N/A'>",
-      "issue": "<what is wrong>",
-      "suggestion": "<how to fix>",
-      "severity": "error" | "warning" | "info"
-    }
-  ],
-  "transcript_issues": [
-    {
-      "quote": "<exact quote or 'Silence'>",
-      "issue": "<critique>",
-      "what_should_have_been_said": "<better phrasing>",
-      "category": "communication" | "technical" | "behavior"
-    }
-  ],
-  "feedback_markdown": "<full markdown report - see format below>"
-}
-```
+    logger.info("[REPORT] Starting forensic analysis (decomposed)...")
+    # Scores and code issues reach the result page as soon as their sections close
+    publisher = partial_publisher(session_id)
+    engine = ReportEngine(llm, on_partial=publisher.update if publisher else None)
 
-# 📄 FEEDBACK_MARKDOWN FORMAT
+    try:
+        try:
+            # 1. Prepare transcript, 2. code audit, transcript audit, scores and narrative run concurrently
+            if transcript_log_path is not None:
+                session_log = await asyncio.to_thread(load_session, transcript_log_path, engine.chunk_chars)
+                analysis_json = await engine.generate_chunks(problem_title, final_code, session_log.chunks)
+            else:
+                analysis_json = await engine.generate(problem_title, final_code, build_transcript(chat_messages))
+            logger.info(f"[REPORT] Analysis generated. Score: {analysis_json.get('overall_score')}")
+        finally:
+            # Any in-flight partial update lands before the final report or the failure notice
+            if publisher is not None:
+                await publisher.aclose()
 
-The `feedback_markdown` string MUST use these EXACT headers (###).
-Do NOT use bolding like **Verdict** inside the header lines.
+        # 3. Submit to Backend
+        await submit_analysis(session_id, analysis_json)
+        if transcript_log_path is not None:
+            Path(transcript_log_path).unlink(missing_ok=True)
 
-### Summary
-**Verdict:** [Strong No / No / Weak Yes / Strong Yes]
-[Executive brief]
+    except Exception as e:
+        logger.error(f"[REPORT] Failed to generate/save report: {e}")
+        # No retries inline: tell the backend so the result page stops waiting
+        await submit_failure(session_id, str(e) or type(e).__name__)
 
-### Strengths
-- **[Strength 1]:** [Specific evidence]
-[If none, state "No significant strengths observed."]
 
-### Areas for Improvement
-- **[Weakness 1]:** [Specific evidence]
-- **[Weakness 2]:** [Specific evidence]
+# Hand reports to report_worker.py through the durable queue (REPORT_QUEUE=0 generates inline)
+REPORT_QUEUE_ENABLED = os.environ.get("REPORT_QUEUE", "1") != "0"
 
-### Code Review
-[Detailed critique of the code quality]
-"""
 
-    user_content = f"""
-# INTERVIEW ARTIFACTS TO ANALYZE
+def enqueue_assessment_report(session_id: str, problem_title: str, final_code: str, chat_ctx=None, transcript_log_path=None) -> str:
+    """Snapshot everything the report needs; the job can exit right after this returns"""
+    snapshot = {
+        "problem_title": problem_title,
+        "final_code": final_code,
+    }
+    if transcript_log_path is not None:
+        # The worker streams the closed log itself (and deletes it once the report is saved)
+        snapshot["transcript_log"] = str(transcript_log_path)
+    else:
+        snapshot["transcript"] = build_transcript(chat_ctx)
+    return ReportQueue.from_env().enqueue(session_id, snapshot)
+
+
+def recover_orphaned_sessions():
+    """Enqueue reports for interviews whose job process died before its `finally` ran"""
+    if os.environ.get("TRANSCRIPT_LOG", "1") == "0":
+        return
+    if not REPORT_QUEUE_ENABLED:
+        logger.warning("[TRANSCRIPT] REPORT_QUEUE=0: orphaned transcript logs are not recovered")
+        return
+    counts = recover_orphans(ReportQueue.from_env().enqueue)
+    if any(counts.values()):
+        logger.warning(f"[TRANSCRIPT] Orphaned session logs: {counts}")
 
-## 📋 PROBLEM CONTEXT
-**Problem:** {problem_title}
 
-## 💻 CANDIDATE'S FINAL CODE
-```javascript
-{final_code}
-```
+# ============================================================================
+# LIVE CONTEXT FROM THE DATA CHANNEL
+# ============================================================================
 
-## 🎙️ INTERVIEW TRANSCRIPT
-{transcript}
+DEFAULT_PROBLEM_TITLE = "the coding task"
 
----
 
-# YOUR TASK
-Generate the JSON evaluation. Do not output any text before or after the JSON.
-"""
+def new_interview_state() -> dict:
+    return {
+        "problem_title": DEFAULT_PROBLEM_TITLE,
+        "problem_desc": "the problem description",
+        "latest_code": "// Preparing your environment...",
+        "code_buffer": CodeBuffer(),
+    }
 
-    try:
-        chat_ctx = ChatContext(
-            messages=[
-                ChatMessage(role=ChatRole.SYSTEM, content=system_prompt),
-                ChatMessage(role=ChatRole.USER, content=user_content),
-            ]
+
+def has_problem_context(interview_state: dict) -> bool:
+    return interview_state["problem_title"] != DEFAULT_PROBLEM_TITLE
+
+
+def apply_data_packet(interview_state: dict, data: bytes):
+    """Decode a data-channel packet from the frontend and fold it into the interview state"""
+    packet = decode_packet(data)
+
+    if isinstance(packet, Problem):
+        interview_state["problem_title"] = packet.title
+        interview_state["problem_desc"] = packet.description
+    elif isinstance(packet, (Code, CodeDelta)):
+        code_buffer = interview_state["code_buffer"]
+        if code_buffer.apply(packet):
+            interview_state["latest_code"] = code_buffer.content
+    return packet
+
+
+def make_instruction_scheduler(interview_state: dict, apply_fn, analyzer: Optional[CodeAnalyzer] = None) -> InstructionScheduler:
+    """Instruction updates driven by the interview state, rendered per CODE_CONTEXT_MODE"""
+    # Line model of the candidate's buffer, diffed once per applied update
+    code_model = CodeContext.from_env()
+
+    async def render_instructions() -> str:
+        code = interview_state["latest_code"]
+        # Runs in the analysis executor; a superseded update cancels the wait
+        analysis = await analyzer.render(code) if analyzer is not None else ""
+        if CODE_CONTEXT_MODE != "incremental":
+            return build_interview_instructions(
+                interview_state["problem_title"],
+                interview_state["problem_desc"],
+                code,
+                analysis=analysis,
+            )
+        code_model.update(code)
+        return build_interview_instructions(
+            interview_state["problem_title"],
+            interview_state["problem_desc"],
+            code_model.render(),
+            windowed=True,
+            analysis=analysis,
         )
-        
-        # Call LLM
-        logger.info("[REPORT] Querying LLM for analysis...")
-        response = await llm.chat(chat_ctx=chat_ctx)
-        content_str = response.choices[0].message.content
-        
-        # Clean potential markdown fences
-        content_str = content_str.replace("```json", "").replace("```", "").strip()
-        
-        # Parse JSON to ensure validity
-        analysis_json = json.loads(content_str)
-        logger.info(f"[REPORT] Analysis generated. Score: {analysis_json.get('overall_score')}")
 
-        # 3. Submit to Backend
-        backend_url = "http://localhost:4000/api/save-analysis"
-        payload = {
-            "sessionId": session_id,
-            "analysis": analysis_json
-        }
-        
-        async with aiohttp.ClientSession() as http_session:
-            async with http_session.post(backend_url, json=payload) as resp:
-                if resp.status == 200:
-                    logger.info("[REPORT] Successfully saved analysis to backend.")
-                else:
-                    logger.error(f"[REPORT] Backend returned error: {resp.status} - {await resp.text()}")
+    return InstructionScheduler.from_env(
+        apply_fn=apply_fn,
+        build_fn=render_instructions,
+        state_fn=lambda: (
+            interview_state["problem_title"],
+            interview_state["problem_desc"],
+            interview_state["latest_code"]
+        ),
+    )
 
-    except Exception as e:
-        logger.error(f"[REPORT] Failed to generate/save report: {e}")
+
+def tts_synthesizer():
+    """text -> async iterator of frames at the audio output rate (cache-aware Deepgram)"""
+    from deepgram_patch import synthesize_frames
+
+    api_key = os.environ.get("DEEPGRAM_API_KEY")
+    return lambda text: synthesize_frames(text, api_key, TTS_MODEL, TTS_SAMPLE_RATE, TTS_FORMAT.output_rate)
+
+
+def make_tts_pipeline() -> Optional[SentencePipeline]:
+    """Sentence-pipelined Deepgram synthesis, unless TTS_PIPELINE=0"""
+    if os.environ.get("TTS_PIPELINE", "1") == "0":
+        return None
+    return SentencePipeline.from_env(tts_synthesizer())
+
+
+def pause_comment_request(interview_state: dict, code: str, analysis: str = "") -> str:
+    request = (
+        f"## PROBLEM\n{interview_state['problem_title']}: {interview_state['problem_desc']}\n\n"
+        f"## CANDIDATE CODE (line-numbered)\n```javascript\n{number_lines(code)}\n```"
+    )
+    if analysis:
+        request += f"\n\n## STATIC ANALYSIS (line numbers match)\n{analysis}"
+    return request
+
+
+def make_pause_speculator(interview_state: dict, llm: LLM, session: AgentSession, analyzer: Optional[CodeAnalyzer] = None) -> PauseSpeculator:
+    """Silent-observation pause comments, prepared while the candidate types"""
+
+    async def generate(code: str) -> str:
+        analysis = await analyzer.render(code) if analyzer is not None else ""
+        return await llm_utils.complete(llm, PAUSE_COMMENT_PROMPT, pause_comment_request(interview_state, code, analysis))
+
+    async def speak(text: str, frames):
+        if frames is None:
+            await session.say(text)
+        else:
+            await session.say(text, audio=frames)
+
+    return PauseSpeculator.from_env(
+        generate,
+        tts_synthesizer(),
+        speak,
+        can_speak=lambda: session.user_state != "speaking" and session.agent_state not in ("thinking", "speaking"),
+        prompt_tokens=lambda code: estimate_tokens(PAUSE_COMMENT_PROMPT + pause_comment_request(interview_state, code)),
+    )
 
 
 async def entrypoint(ctx: JobContext):
     logger.info(f"[ENTRYPOINT] Starting agent for room '{ctx.room.name}'")
 
     # Local state
-    interview_state = {
-        "problem_title": "the coding task",
-        "problem_desc": "the problem description",
-        "latest_code": "// Preparing your environment...",
-    }
+    interview_state = new_interview_state()
     
     # Event to signal when problem context is ready
     problem_context_received = asyncio.Event()
 
     # 1. Setup Models
+    deepgram, silero = load_plugins()
     vad = ctx.proc.userdata.get("vad")
     if vad is None:
         logger.info("[ENTRYPOINT] VAD not found in userdata, loading now...")
         vad = silero.VAD.load()
         ctx.proc.userdata["vad"] = vad
+
+    # Feeds the worker's admission decision (see worker_load.py)
+    load_reporter = SessionLoadReporter.from_env(ctx.room.name)
+    vad.on("metrics_collected", load_reporter.record_vad)
+    load_reporter.start()
     
-    groq_llm = openai.LLM(
-        base_url="https://api.groq.com/openai/v1",
-        api_key=os.environ.get("GROQ_API_KEY"),
-        model="llama-3.3-70b-versatile"
-    )
+    groq_llm = llm_utils.groq_llm()
     
     deepgram_stt = deepgram.STT(model="nova-2-general")
-    deepgram_tts = deepgram.TTS(model="aura-helios-en")
+    deepgram_tts = deepgram.TTS(model=TTS_MODEL, sample_rate=TTS_SAMPLE_RATE)
 
     # 2. Define the Agent
-    logic_agent = voice.Agent(
+    # Last K turns verbatim + a rolling summary, so per-turn latency stays flat
+    memory = ConversationMemory.from_env(make_summarizer(groq_llm))
+    logic_agent = SocratisAgent(
+        memory,
+        tts_pipeline=make_tts_pipeline(),
         instructions=build_interview_instructions(),
         chat_ctx=ChatContext()
     )
 
+    # Everything the report needs, appended to disk as it happens (survives a crash of this job)
+    transcript_log = TranscriptLog.from_env(ctx.room.name)
+
+    # Keystroke-rate code packets are coalesced into at most a few prompt rebuilds per second;
+    # each rebuild carries line-level findings from the off-loop static analyzer
+    code_analyzer = CodeAnalyzer.from_env()
+    instruction_scheduler = make_instruction_scheduler(interview_state, logic_agent.update_instructions, code_analyzer)
+
     # 3. Setup Session
     session = AgentSession(
         vad=vad,
@@ -277,43 +427,94 @@ async def entrypoint(ctx: JobContext):
         tts=deepgram_tts,
     )
 
+    # Per-turn latency spans; the contextvar reaches the LLM/TTS tasks spawned by the session
+    tracer = latency_metrics.TurnTracer.from_env(ctx.room.name)
+    latency_metrics.current_tracer.set(tracer)
+    # Event-loop lag while this session runs; stalls are logged with the stack that blocked
+    loop_monitor = loop_health.get_monitor()
+    loop_monitor.track(ctx.room.name)
+
+    # The >30s pause comment, generated and synthesized ahead of the pause
+    pause_speculator = make_pause_speculator(interview_state, groq_llm, session, code_analyzer)
+
+    # Greeting audio is synthesized while the candidate's client subscribes to our track
+    async def speak_greeting(text: str, frames):
+        if frames is None:
+            await session.say(text, allow_interruptions=False)
+        else:
+            await session.say(text, audio=frames, allow_interruptions=False)
+
+    greeting = OverlappedGreeting.from_env(tts_synthesizer(), speak_greeting)
+
+    @ctx.room.on("local_track_subscribed")
+    def on_local_track_subscribed(track):
+        # The agent publishes a single track: its audio
+        logger.info("[ROOM] Candidate subscribed to the agent's audio")
+        greeting.track_subscribed()
+
+    @session.on("user_state_changed")
+    def on_user_state_changed(ev):
+        pause_speculator.activity()
+        if ev.new_state == "speaking":
+            tracer.start_user_turn()
+        elif ev.old_state == "speaking" and ev.new_state == "listening":
+            tracer.mark("vad_end")
+
+    @session.on("conversation_item_added")
+    def on_conversation_item_added(ev):
+        item = ev.item
+        if transcript_log is not None and getattr(item, "type", None) == "message" and item.role in ("user", "assistant"):
+            transcript_log.turn(item.role, item.text_content)
+
+    @session.on("user_input_transcribed")
+    def on_user_input_transcribed(ev):
+        if ev.is_final:
+            tracer.mark("stt_final")
+
+    @session.on("agent_state_changed")
+    def on_agent_state_changed(ev):
+        pause_speculator.activity()
+        if ev.old_state == "speaking":
+            tracer.agent_stopped()
+
     # 4. Handle Data Interactions
     @ctx.room.on("data_received")
     def on_data_received(data_packet):
         try:
-            payload = json.loads(data_packet.data.decode('utf-8'))
-            msg_type = payload.get("type")
+            packet = apply_data_packet(interview_state, data_packet.data)
+            msg_type = packet_type(packet)
             
             # Log ONLY the type to avoid huge logs
             logger.info(f"[DATA] Received packet type: {msg_type}")
             
-            if msg_type == "problem":
-                title = payload.get('title', 'Unknown')
-                logger.info(f"[CONTEXT] Problem context received: {title}")
-                interview_state["problem_title"] = title
-                interview_state["problem_desc"] = payload.get("description", "")
+            if isinstance(packet, Problem):
+                logger.info(f"[CONTEXT] Problem context received: {interview_state['problem_title']}")
+                if transcript_log is not None:
+                    transcript_log.problem(interview_state["problem_title"], interview_state["problem_desc"])
+                greeting.prepare(greeting_for(interview_state["problem_title"]))
                 problem_context_received.set()
                 
                 # Handshake: Acknowledge receipt so frontend stops spamming
-                confirmation = json.dumps({"type": "problem_ack", "title": interview_state["problem_title"]})
+                confirmation = encode_packet(ProblemAck(title=interview_state["problem_title"]))
                 # Ensure we use the current participant to send
                 if ctx.room.local_participant:
                      asyncio.create_task(ctx.room.local_participant.publish_data(confirmation, reliable=True))
                      logger.info("[DATA] Sent problem_ack to frontend")
-            
-            elif msg_type == "code":
-                interview_state["latest_code"] = payload.get("content", "// No code")
+
+            # Deltas we can't apply (sequence gap): ask the frontend for a full snapshot
+            resync = interview_state["code_buffer"].take_resync()
+            if resync is not None and ctx.room.local_participant:
+                asyncio.create_task(ctx.room.local_participant.publish_data(encode_packet(resync), reliable=True))
+                logger.info(f"[DATA] Requested code snapshot (have seq {resync.seq})")
             
             # CRITICAL: Dynamic Injection - Update agent instructions in real-time
             # Only update if we actually have context
-            if interview_state["problem_title"] != "the coding task":
-                asyncio.create_task(logic_agent.update_instructions(
-                    build_interview_instructions(
-                        interview_state["problem_title"],
-                        interview_state["problem_desc"],
-                        interview_state["latest_code"]
-                    )
-                ))
+            if has_problem_context(interview_state):
+                instruction_scheduler.request()
+                if isinstance(packet, (Code, CodeDelta)):
+                    pause_speculator.code_changed(interview_state["latest_code"])
+            if transcript_log is not None and isinstance(packet, (Code, CodeDelta)):
+                transcript_log.code(interview_state["latest_code"])
             
         except Exception as e:
             logger.error(f"[DATA] Error processing packet: {e}")
@@ -321,32 +522,32 @@ async def entrypoint(ctx: JobContext):
     # 5. Connect and Start
     try:
         logger.info("[STEP 5] Calling session.start...")
-        await session.start(agent=logic_agent, room=ctx.room)
+        await session.start(
+            agent=logic_agent,
+            room=ctx.room,
+            room_options=room_io.RoomOptions(
+                audio_output=room_io.AudioOutputOptions(sample_rate=AUDIO_OUTPUT_SAMPLE_RATE),
+            ),
+        )
         logger.info("[STEP 5] Session started successfully")
 
         # 6. Send Greeting
-        # 6. Send Greeting
-        # Wait for context (with long safety timeout)
+        # Wait for context (with long safety timeout); its audio is already being synthesized
         logger.info("[STEP 5.5] Waiting for problem context...")
         try:
-            # Wait up to 30 seconds for context
             await asyncio.wait_for(problem_context_received.wait(), timeout=30.0)
             logger.info(f"[STEP 5.5] Context received: {interview_state['problem_title']}")
-            
-            # Stabilization delay: Give the frontend a moment to subscribe to the audio track
-            # This prevents the greeting from being cut off or lost during connection stabilization
-            await asyncio.sleep(1.0)
 
-            greeting_text = f"Hello! I'm Socratis. I see we're working on '{interview_state['problem_title']}'. Walk me through your approach before we start coding."
-            logger.info(f"[STEP 6] Sending greeting: {greeting_text}")
-            await session.say(greeting_text, allow_interruptions=False)
+            # Plays once the frontend has subscribed to our audio track, so the start isn't cut off
+            logger.info(f"[STEP 6] Sending greeting: {greeting.text}")
+            await greeting.play(greeting.text)
 
         except asyncio.TimeoutError:
             logger.error("[STEP 5.5] CRITICAL: Timed out waiting for context!")
             # Fallback: Just ask the user to describe it, don't hallucinate.
-            fallback_text = "Hello! I'm ready to start. Could you tell me which problem we are working on today?"
+            fallback_text = FALLBACK_GREETING
             logger.info(f"[STEP 6] Sending FALLBACK greeting: {fallback_text}")
-            await session.say(fallback_text, allow_interruptions=False)
+            await greeting.play(fallback_text)
         
         # Run until participant disconnects
         while ctx.room.is_connected:
@@ -355,43 +556,124 @@ async def entrypoint(ctx: JobContext):
     except Exception as e:
         logger.error(f"[ENTRYPOINT] Crash: {e}")
     finally:
-        # 7. Generate Post-Interview Report (SINGLE AGENT)
+        await greeting.aclose()
+        logger.info(f"[GREETING] Stats: {greeting.get_stats()}")
+        instruction_scheduler.close()
+        logger.info(f"[SCHEDULER] Instruction update stats: {instruction_scheduler.get_stats()}")
+        await pause_speculator.aclose()
+        logger.info(f"[PAUSE] Pause comment stats: {pause_speculator.get_stats()}")
+        logger.info(f"[ANALYSIS] Static analysis stats: {code_analyzer.get_stats()}")
+        await memory.aclose()
+        logger.info(f"[MEMORY] Stats: {memory.get_stats()}")
+        logger.info(f"[PROTOCOL] Code sync stats: {interview_state['code_buffer'].stats}")
+        if logic_agent.tts_pipeline is not None:
+            logger.info(f"[TTSPipe] Stats: {logic_agent.tts_pipeline.stats}")
+        tracer.close()
+        session_lag = loop_monitor.untrack(ctx.room.name)
+        if session_lag is not None:
+            tracer.record_loop_lag(session_lag)
+        vad.off("metrics_collected", load_reporter.record_vad)
+        await load_reporter.aclose()
+
+        # 7. Generate Post-Interview Report
         try:
-            # Check if agent and chat_ctx exist and yield messages
-            # Note: logic_agent.chat_ctx might be read-only or structured differently in some versions
-            if logic_agent and hasattr(logic_agent, 'chat_ctx'):
-                 # Inspect keys or attributes safely
-                 messages = getattr(logic_agent.chat_ctx, 'messages', None)
-                 
-                 if messages:
-                    logger.info("[ENTRYPOINT] Session ended. Triggering analysis...")
-                    
-                    # Assuming Room Name is the sessionId (from interview.ts logic)
-                    session_id = ctx.room.name 
-                    
+            chat_ctx = getattr(logic_agent, 'chat_ctx', None)
+            log_path = None
+            if transcript_log is not None:
+                transcript_log.close()
+                logger.info(f"[TRANSCRIPT] Log stats: {transcript_log.stats}")
+                has_messages = transcript_log.turns > 0
+                log_path = transcript_log.path
+            else:
+                has_messages = chat_ctx is not None and any(getattr(item, "type", None) == "message" for item in chat_ctx.items)
+
+            if has_messages:
+                logger.info("[ENTRYPOINT] Session ended. Triggering analysis...")
+
+                # Assuming Room Name is the sessionId (from interview.ts logic)
+                session_id = ctx.room.name 
+
+                if REPORT_QUEUE_ENABLED:
+                    await asyncio.to_thread(
+                        enqueue_assessment_report,
+                        session_id,
+                        interview_state["problem_title"],
+                        interview_state["latest_code"],
+                        chat_ctx,
+                        log_path
+                    )
+                else:
                     await generate_assessment_report(
                         groq_llm, 
                         session_id,
                         interview_state["problem_title"], 
                         interview_state["latest_code"],
-                        messages
+                        chat_ctx,
+                        log_path
                     )
+            else:
+                logger.warning("[ENTRYPOINT] No messages found, skipping report generation.")
+                if log_path is not None:
+                    log_path.unlink(missing_ok=True)
         except Exception as report_err:
             logger.error(f"[ENTRYPOINT] Report generation failed (non-fatal): {report_err}")
-        else:
-            logger.warning("[ENTRYPOINT] No messages found, skipping report generation.")
-            
+
+        # Release pooled connections once nothing else in this job needs them
+        logger.info(f"[HTTP] Pool stats: {http_pool.get_stats()}")
+        logger.info(f"[TTSCache] Stats: {tts_cache.get_cache().get_stats()}")
+        logger.info(f"[TTSHedge] Stats: {tts_hedge.get_client().get_stats()}")
+        await http_pool.close_pool()
+        code_analysis.shutdown()
+
         logger.info("[ENTRYPOINT] Cleanup complete.")
 
-async def prewarm(proc):
+def prewarm(proc):
+    # NOTE: LiveKit calls prewarm synchronously, so this must not be a coroutine
+    started = time.perf_counter()
+    _, silero = load_plugins()
+    logger.info(f"[PREWARM] Plugins loaded in {time.perf_counter() - started:.2f}s")
+
     logger.info("[PREWARM] Loading VAD model...")
     proc.userdata["vad"] = silero.VAD.load()
     logger.info("[PREWARM] VAD loaded successfully")
 
+    proc.userdata["http_pool"] = http_pool.init_pool()
+    logger.info("[PREWARM] HTTP pool configured")
+
+    # Pre-synthesize fixed phrases so the first session doesn't wait on Deepgram.
+    # After the first run these come straight off disk.
+    tts_cache.get_cache().add_stock_phrases(STOCK_PHRASES)
+    api_key = os.environ.get("DEEPGRAM_API_KEY")
+    if api_key and os.environ.get("TTS_PREWARM", "1") != "0":
+        from deepgram_patch import prewarm_phrases
+
+        async def _warm_tts():
+            try:
+                await prewarm_phrases(STOCK_PHRASES, api_key, TTS_MODEL, TTS_SAMPLE_RATE)
+            finally:
+                # The pooled session is bound to this temporary loop
+                await http_pool.close_pool()
+
+        try:
+            asyncio.run(_warm_tts())
+        except Exception as e:
+            logger.warning(f"[PREWARM] TTS phrase prewarm failed: {e}")
+    logger.info(f"[PREWARM] Process ready in {time.perf_counter() - started:.2f}s")
+
 if __name__ == "__main__":
+    # Registered plugins are preloaded into the forkserver (and listed for download-files)
+    load_plugins()
+    # Interviews cut short by a crash of the previous worker still get their reports
+    recover_orphaned_sessions()
+
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
+            # Health/worker-info HTTP port in production (dev mode picks a free one)
+            port=ServerEnvOption(dev_default=0, prod_default=int(os.environ.get("AGENT_HTTP_PORT", "8081"))),
+            # Stop accepting interviews before CPU, the event loop or the report backlog saturates
+            load_fnc=WorkerLoad.from_env(),
+            load_threshold=float(os.environ.get("WORKER_LOAD_THRESHOLD", "0.75")),
         ),
     )
@@ -0,0 +1,129 @@
+"""
+TTS output format negotiation and streaming resampling
+The agent publishes audio through an AudioSource at a fixed rate (the room output's
+`audio_sample_rate`). Deepgram can synthesize linear16 directly at several rates, so we
+ask for exactly that rate whenever it is offered; audio then goes out without any
+resampling on the publish path. Only for rates Deepgram doesn't offer (e.g. 44100) is the
+nearest higher rate requested and converted here with a stateful polyphase resampler
+that works on streamed frames.
+"""
+import logging
+from contextlib import aclosing
+from dataclasses import dataclass
+from math import gcd
+from typing import Optional
+
+import numpy as np
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+# Sample rates Deepgram Aura accepts for encoding=linear16
+DEEPGRAM_LINEAR16_RATES = (8000, 16000, 24000, 32000, 48000)
+
+
+@dataclass(frozen=True)
+class TTSFormat:
+    encoding: str
+    request_rate: int  # what Deepgram is asked for
+    output_rate: int  # what the audio source publishes
+
+    @property
+    def needs_resampling(self) -> bool:
+        return self.request_rate != self.output_rate
+
+
+def negotiate_tts_format(output_rate: int, supported=DEEPGRAM_LINEAR16_RATES) -> TTSFormat:
+    """The Deepgram request that matches the audio source, or the closest one to resample from"""
+    if output_rate in supported:
+        return TTSFormat("linear16", output_rate, output_rate)
+    # Resample down from a higher rate rather than up from a lower one (no missing band)
+    higher = [rate for rate in supported if rate > output_rate]
+    request_rate = min(higher) if higher else max(supported)
+    logger.info(f"[AUDIO] Deepgram has no {output_rate} Hz linear16; requesting {request_rate} Hz and resampling")
+    return TTSFormat("linear16", request_rate, output_rate)
+
+
+class StreamResampler:
+    """
+    Rational-ratio polyphase resampler for mono int16 frames. Keeps the last few input
+    samples and the output phase between calls, so chunk boundaries are seamless; each
+    call is a handful of vectorised NumPy operations regardless of frame size.
+    """
+
+    def __init__(self, input_rate: int, output_rate: int, taps_per_phase: int = 16):
+        common = gcd(input_rate, output_rate)
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.up = output_rate // common
+        self.down = input_rate // common
+        self.taps = taps_per_phase
+
+        # Kaiser-windowed sinc low-pass at the upsampled rate, cut below the lower Nyquist
+        length = self.up * self.taps
+        cutoff = 0.5 / max(self.up, self.down) * 0.94
+        n = np.arange(length) - (length - 1) / 2
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, 8.0) * self.up
+        # bank[phase] is dotted with the window x[j - taps + 1 .. j] ending at the newest input
+        self._bank = np.ascontiguousarray(prototype.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32)
+
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._consumed = 0  # input samples seen
+        self._produced = 0  # output samples emitted
+
+    def push_samples(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next block of int16 samples; returns int16"""
+        buffer = np.concatenate((self._history, samples), dtype=np.float32)
+        base = self._consumed - (self.taps - 1)  # global index of buffer[0]
+        self._consumed += len(samples)
+
+        # Every output whose newest input sample has arrived
+        end = -(-self._consumed * self.up // self.down)
+        n = np.arange(self._produced, end, dtype=np.int64)
+        self._produced = end
+        self._history = buffer[len(buffer) - (self.taps - 1):]
+        if not len(n):
+            return np.zeros(0, dtype=np.int16)
+
+        position = n * self.down
+        first = position // self.up - base - (self.taps - 1)
+        # Row-wise take from an overlapping-window view of the buffer (no index matrix)
+        view = np.ndarray((len(buffer) - self.taps + 1, self.taps), np.float32, buffer, strides=(4, 4))
+        windows = view.take(first, axis=0)
+        out = np.einsum("nk,nk->n", windows, self._bank.take(position % self.up, axis=0))
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+    def push(self, frame: rtc.AudioFrame) -> Optional[rtc.AudioFrame]:
+        out = self.push_samples(np.frombuffer(frame.data, dtype=np.int16))
+        return self._frame(out) if len(out) else None
+
+    def flush(self) -> Optional[rtc.AudioFrame]:
+        """Emit the filter's tail (about taps/2 input samples of delay)"""
+        out = self.push_samples(np.zeros(self.taps // 2, dtype=np.int16))
+        return self._frame(out) if len(out) else None
+
+    def _frame(self, samples: np.ndarray) -> rtc.AudioFrame:
+        return rtc.AudioFrame(
+            data=samples.tobytes(),
+            sample_rate=self.output_rate,
+            num_channels=1,
+            samples_per_channel=len(samples),
+        )
+
+
+async def resample_frames(frames, input_rate: int, output_rate: int):
+    """Wrap an async frame generator, converting it to `output_rate` if needed"""
+    # Closing this generator closes the source too (and with it any HTTP response)
+    async with aclosing(frames):
+        if input_rate == output_rate:
+            async for frame in frames:
+                yield frame
+            return
+        resampler = StreamResampler(input_rate, output_rate)
+        async for frame in frames:
+            out = resampler.push(frame)
+            if out is not None:
+                yield out
+        tail = resampler.flush()
+        if tail is not None:
+            yield tail
@@ -0,0 +1,104 @@
+"""
+Worker capacity benchmark
+Runs loadtest.py (with Silero VAD on simulated microphone audio) at increasing session
+counts and finds where turn latency degrades. All sessions share one process and event
+loop, so this is the capacity of one worker process per the cores it can use; divide by
+cores for SESSIONS_PER_CORE.
+
+Usage: python bench_capacity.py [--steps 1,2,4,8,12,16] [--turns 3] [--degrade 0.25]
+                                [--loop-budget-ms 20]   # fail on any longer event-loop block
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from worker_load import available_cores
+
+HERE = Path(__file__).parent
+
+
+def run_step(sessions: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "result.json"
+        cmd = [
+            sys.executable, str(HERE / "loadtest.py"),
+            "--sessions", str(sessions),
+            "--turns", str(args.turns),
+            "--ramp-s", str(args.ramp_s),
+            "--json", str(out),
+        ]
+        if not args.no_vad:
+            cmd.append("--vad")
+        if args.loop_budget_ms:
+            cmd += ["--loop-budget-ms", str(args.loop_budget_ms)]
+        # Each step in a fresh process: no warm caches or leftover memory between steps
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        if not out.exists():
+            raise RuntimeError(f"loadtest failed at {sessions} sessions")
+        return json.loads(out.read_text())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find how many concurrent interviews one worker sustains")
+    parser.add_argument("--steps", default="1,2,4,8,12,16")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--ramp-s", type=float, default=2.0)
+    parser.add_argument("--degrade", type=float, default=0.25, help="allowed p95 turn-latency increase over the 1-session baseline")
+    parser.add_argument("--lag-limit-ms", type=float, default=100, help="allowed p95 event-loop lag")
+    parser.add_argument("--no-vad", action="store_true")
+    parser.add_argument("--loop-budget-ms", type=float, default=0, help="debug mode: fail on any event-loop block longer than this")
+    args = parser.parse_args()
+
+    steps = [int(step) for step in args.steps.split(",")]
+    cores = available_cores()
+    print(f"{cores} core(s) available\n")
+    print(f"{'sessions':>8} {'turn p50':>9} {'turn p95':>9} {'lag p95':>8} {'vad %core':>9} {'KiB/sess':>9}  ok")
+
+    baseline = None
+    sustained = 0
+    violations = []
+    for sessions in steps:
+        result = run_step(sessions, args)
+        turn = result["latency_s"].get("turn_first_audio", {"p50": 0.0, "p95": 0.0})
+        lag_p95 = result["loop_lag_s"]["p95"]
+        if baseline is None:
+            baseline = turn["p95"]
+
+        ok = (
+            not result["counters"]["sessions_failed"]
+            and turn["p95"] <= baseline * (1 + args.degrade)
+            and lag_p95 * 1000 <= args.lag_limit_ms
+        )
+        print(
+            f"{sessions:>8} {turn['p50'] * 1000:>7.0f}ms {turn['p95'] * 1000:>7.0f}ms "
+            f"{lag_p95 * 1000:>6.1f}ms {result['vad_busy'] * 100:>8.1f}% "
+            f"{result['memory']['per_session_kb']:>9.0f}  {'yes' if ok else 'NO'}"
+        )
+        # A blocked loop is a bug at any load, not a capacity limit
+        violations += [(sessions, stall) for stall in result["loop_health"]["violation_stacks"]]
+        if violations:
+            break
+        if not ok:
+            break
+        sustained = sessions
+
+    if violations:
+        print(f"\nFAILED: the event loop was blocked longer than {args.loop_budget_ms:g} ms:")
+        for sessions, stall in violations:
+            print(f"\n[{sessions} sessions] {stall['duration_ms']} ms at {stall['where']}")
+            print("".join(stall["stack"][-8:]), end="")
+        sys.exit(1)
+
+    print()
+    if sustained:
+        print(f"Sustained {sustained} concurrent session(s) within {args.degrade:.0%} of baseline p95 turn latency.")
+        print(f"Suggested SESSIONS_PER_CORE={sustained / cores:g}")
+    else:
+        print("Even the first step exceeded the limits; check the fake service latencies.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+PCM framing micro-benchmark
+Compares the old TTS path (np.frombuffer -> tobytes -> one big frame -> split downstream)
+with PcmFramer's memoryview slicing. Reports CPU time and peak allocations per second of audio.
+
+Usage: python bench_pcm.py [--seconds 20] [--sample-rate 24000] [--chunk 4096]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from livekit import rtc
+
+from deepgram_patch import BYTES_PER_SAMPLE, TTS_FRAME_MS, PcmFramer
+
+
+def old_path(audio_bytes: bytes, sample_rate: int, frame_ms: int):
+    """What direct_deepgram_synthesize used to do, plus the downstream re-split"""
+    samples = np.frombuffer(audio_bytes, dtype=np.int16)
+    big = rtc.AudioFrame(
+        data=samples.tobytes(),
+        sample_rate=sample_rate,
+        num_channels=1,
+        samples_per_channel=len(samples),
+    )
+    data = big.data.tobytes()
+    step = max(1, sample_rate * frame_ms // 1000) * BYTES_PER_SAMPLE
+    frames = []
+    for start in range(0, len(data), step):
+        chunk = data[start:start + step]
+        frames.append(rtc.AudioFrame(chunk, sample_rate, 1, len(chunk) // BYTES_PER_SAMPLE))
+    return frames
+
+
+def new_path(chunks, sample_rate: int, frame_ms: int):
+    framer = PcmFramer(sample_rate, frame_ms)
+    frames = []
+    for chunk in chunks:
+        frames.extend(framer.push(chunk))
+    frames.extend(framer.flush())
+    return frames
+
+
+def measure(label, fn, audio_seconds, repeats):
+    fn()  # warm up
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeats
+
+    print(
+        f"{label:<28} {elapsed / audio_seconds * 1e6:>10.1f} us/audio-s "
+        f"{peak / audio_seconds / 1024:>10.1f} KiB peak alloc/audio-s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=20.0, help="utterance length")
+    parser.add_argument("--sample-rate", type=int, default=24000)
+    parser.add_argument("--chunk", type=int, default=4096, help="network chunk size in bytes (odd sizes allowed)")
+    parser.add_argument("--frame-ms", type=int, default=TTS_FRAME_MS)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    num_samples = int(args.seconds * args.sample_rate)
+    audio = np.random.default_rng(0).integers(-2000, 2000, num_samples, dtype=np.int16).tobytes()
+    chunks = [audio[i:i + args.chunk] for i in range(0, len(audio), args.chunk)]
+
+    print(f"{args.seconds:.0f}s of audio @ {args.sample_rate} Hz, {args.frame_ms} ms frames, {args.chunk} B chunks")
+    measure("old (numpy + re-split)", lambda: old_path(audio, args.sample_rate, args.frame_ms), args.seconds, args.repeats)
+    measure("new (buffered, memoryview)", lambda: new_path([audio], args.sample_rate, args.frame_ms), args.seconds, args.repeats)
+    measure("new (streamed chunks)", lambda: new_path(chunks, args.sample_rate, args.frame_ms), args.seconds, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+TTS publish-path resampling benchmark
+CPU time per second of synthesized audio for the ways TTS audio can reach an AudioSource
+running at --output-rate:
+
+  native      Deepgram asked for the output rate: framing only (the negotiated path)
+  numpy       requested at --tts-rate, converted by audio_format.StreamResampler per frame
+  livekit     requested at --tts-rate, converted by rtc.AudioResampler per frame
+              (what LiveKit's audio forwarding does when the rates differ)
+
+Usage: python bench_resample.py [--seconds 20] [--tts-rate 24000] [--output-rate 48000]
+"""
+import argparse
+import time
+
+import numpy as np
+from livekit import rtc
+
+from audio_format import DEEPGRAM_LINEAR16_RATES, StreamResampler
+from deepgram_patch import TTS_FRAME_MS, PcmFramer
+
+
+def chunks_of(audio: bytes, size: int):
+    return [audio[i:i + size] for i in range(0, len(audio), size)]
+
+
+def native_path(chunks, rate: int):
+    framer = PcmFramer(rate)
+    samples = 0
+    for chunk in chunks:
+        for frame in framer.push(chunk):
+            samples += frame.samples_per_channel
+    for frame in framer.flush():
+        samples += frame.samples_per_channel
+    return samples
+
+
+def numpy_path(chunks, tts_rate: int, output_rate: int):
+    framer = PcmFramer(tts_rate)
+    resampler = StreamResampler(tts_rate, output_rate)
+    samples = 0
+    for chunk in chunks:
+        for frame in framer.push(chunk):
+            out = resampler.push(frame)
+            if out is not None:
+                samples += out.samples_per_channel
+    for frame in framer.flush():
+        out = resampler.push(frame)
+        if out is not None:
+            samples += out.samples_per_channel
+    tail = resampler.flush()
+    return samples + (tail.samples_per_channel if tail is not None else 0)
+
+
+def livekit_path(chunks, tts_rate: int, output_rate: int):
+    framer = PcmFramer(tts_rate)
+    resampler = rtc.AudioResampler(input_rate=tts_rate, output_rate=output_rate, num_channels=1)
+    samples = 0
+    for chunk in chunks:
+        for frame in framer.push(chunk):
+            for out in resampler.push(frame):
+                samples += out.samples_per_channel
+    for frame in framer.flush():
+        for out in resampler.push(frame):
+            samples += out.samples_per_channel
+    for out in resampler.flush():
+        samples += out.samples_per_channel
+    return samples
+
+
+def measure(label, fn, audio_seconds, repeats, output_rate):
+    samples = fn()  # warm up, and check the output length
+    start = time.process_time()
+    for _ in range(repeats):
+        fn()
+    cpu = (time.process_time() - start) / repeats
+    print(
+        f"{label:<34} {cpu / audio_seconds * 1e6:>9.1f} us CPU/audio-s "
+        f"{cpu / audio_seconds * 100:>7.3f}% of a core  ({samples / output_rate:.2f}s out)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=20.0, help="utterance length")
+    parser.add_argument("--tts-rate", type=int, default=24000, help="rate requested from Deepgram when not negotiated")
+    parser.add_argument("--output-rate", type=int, default=48000, help="AudioSource rate")
+    parser.add_argument("--chunk", type=int, default=4800, help="network chunk size in bytes")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    def speech_like(rate):
+        # Speech-band harmonics under a random 100 ms envelope
+        t = np.arange(int(args.seconds * rate)) / rate
+        signal = sum(np.sin(2 * np.pi * f * t + rng.uniform(0, 6)) for f in (180, 360, 720, 1500, 3100))
+        envelope = np.repeat(rng.uniform(0.2, 1.0, len(t) // rate * 10 + 10), rate // 10)[:len(t)]
+        return (signal * envelope * 1000).astype(np.int16).tobytes()
+
+    native_chunks = chunks_of(speech_like(args.output_rate), args.chunk)
+    tts_chunks = chunks_of(speech_like(args.tts_rate), args.chunk)
+
+    print(f"{args.seconds:.0f}s of audio, {TTS_FRAME_MS} ms frames, {args.chunk} B chunks -> {args.output_rate} Hz source")
+    offered = "requested" if args.output_rate in DEEPGRAM_LINEAR16_RATES else "not offered by Deepgram"
+    measure(f"native ({args.output_rate} Hz {offered})", lambda: native_path(native_chunks, args.output_rate), args.seconds, args.repeats, args.output_rate)
+    if args.tts_rate != args.output_rate:
+        measure(f"numpy {args.tts_rate}->{args.output_rate}", lambda: numpy_path(tts_chunks, args.tts_rate, args.output_rate), args.seconds, args.repeats, args.output_rate)
+        measure(f"livekit {args.tts_rate}->{args.output_rate}", lambda: livekit_path(tts_chunks, args.tts_rate, args.output_rate), args.seconds, args.repeats, args.output_rate)
+
+
+if __name__ == "__main__":
+    main()
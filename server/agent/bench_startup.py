@@ -0,0 +1,246 @@
+"""
+Agent startup benchmark
+Measures what a restart by start.py costs before interviews can resume:
+
+  import     python -c "import agent" (module import only)
+  register   process spawn -> worker registered with the LiveKit server
+  accept     process spawn -> first job request answered "available"
+  warm       process spawn -> first job process finished prewarm (plugins, VAD, HTTP pool)
+
+The LiveKit server is a local stand-in speaking the worker protocol on /agent, so no
+LiveKit project or network is needed; jobs are offered but never assigned. LiveKit only
+registers once its idle job processes are warm, so `register` includes their prewarm.
+
+Exits 1 when a median exceeds its absolute budget, or exceeds a saved baseline (--json of
+an earlier run) by more than --tolerance. The default budgets fit a 1-core dev container
+with headroom; pass a baseline from the target machine for a tighter guard.
+
+Usage: python bench_startup.py [--runs 3] [--baseline startup.json] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import WSMsgType, web
+from livekit.protocol import agent as proto
+from livekit.protocol import models
+
+HERE = Path(__file__).parent
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import agent; print(time.perf_counter() - t)"
+WARM_MARKER = "[PREWARM] Process ready"
+STAGES = ("import", "register", "accept", "warm")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import() -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=HERE, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top: int = 8):
+    """Slowest modules imported directly or indirectly by agent.py, from -X importtime"""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import agent"], cwd=HERE, capture_output=True, text=True
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        # Depth 1 and 2: agent's own imports and what they pull in
+        if match and 2 <= len(match.group(3)) <= 4:
+            rows.append((int(match.group(2)) / 1e6, match.group(4)))
+    return sorted(rows, reverse=True)[:top]
+
+
+class FakeLiveKit:
+    """Just enough of the LiveKit worker protocol: register, then offer one job"""
+
+    def __init__(self):
+        self.registered = asyncio.Event()
+        self.accepted = asyncio.Event()
+        self.registered_at = None
+        self.accepted_at = None
+
+    async def handle_agent(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != WSMsgType.BINARY:
+                continue
+            message = proto.WorkerMessage()
+            message.ParseFromString(msg.data)
+            which = message.WhichOneof("message")
+
+            if which == "register":
+                self.registered_at = time.perf_counter()
+                reply = proto.ServerMessage(
+                    register=proto.RegisterWorkerResponse(worker_id="AW_bench", server_info=models.ServerInfo())
+                )
+                await ws.send_bytes(reply.SerializeToString())
+                self.registered.set()
+
+                offer = proto.ServerMessage(
+                    availability=proto.AvailabilityRequest(
+                        job=proto.Job(id="AJ_bench", type=proto.JT_ROOM, room=models.Room(sid="RM_bench", name="bench"))
+                    )
+                )
+                await ws.send_bytes(offer.SerializeToString())
+
+            elif which == "availability" and message.availability.available and self.accepted_at is None:
+                self.accepted_at = time.perf_counter()
+                self.accepted.set()
+        return ws
+
+    async def start(self, port: int):
+        app = web.Application()
+        app.router.add_get("/agent", self.handle_agent)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+
+async def measure_worker(timeout_s: float) -> dict:
+    livekit_port = free_port()
+    server = FakeLiveKit()
+    runner = await server.start(livekit_port)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            LIVEKIT_URL=f"ws://127.0.0.1:{livekit_port}",
+            LIVEKIT_API_KEY="bench",
+            LIVEKIT_API_SECRET="bench-secret-bench-secret-bench-secret",
+            AGENT_HTTP_PORT=str(free_port()),
+            # Keep the benchmark off the network and away from real state
+            TTS_PREWARM="0",
+            WORKER_LOAD_DIR=str(Path(tmp) / "load"),
+            REPORT_QUEUE_DB=str(Path(tmp) / "reports.db"),
+        )
+        spawned_at = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "agent.py", "start",
+            cwd=HERE, env=env,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+
+        warm_at = None
+        warmed = asyncio.Event()
+        output = []
+
+        async def read_output():
+            nonlocal warm_at
+            async for raw in proc.stdout:
+                line = raw.decode(errors="replace")
+                output.append(line)
+                if warm_at is None and WARM_MARKER in line:
+                    warm_at = time.perf_counter()
+                    warmed.set()
+
+        reader = asyncio.create_task(read_output())
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(server.registered.wait(), server.accepted.wait(), warmed.wait()), timeout_s
+            )
+        except asyncio.TimeoutError:
+            tail = "".join(output[-20:])
+            raise RuntimeError(f"worker did not start within {timeout_s:.0f}s; last output:\n{tail}") from None
+        finally:
+            if proc.returncode is None:
+                os.killpg(proc.pid, signal.SIGINT)
+                try:
+                    await asyncio.wait_for(proc.wait(), 10)
+                except asyncio.TimeoutError:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                    await proc.wait()
+            reader.cancel()
+            await runner.cleanup()
+
+    return {
+        "register": server.registered_at - spawned_at,
+        "accept": server.accepted_at - spawned_at,
+        "warm": warm_at - spawned_at,
+    }
+
+
+async def run(args) -> dict:
+    samples = {stage: [] for stage in STAGES}
+    for i in range(args.runs):
+        samples["import"].append(measure_import())
+        for stage, seconds in (await measure_worker(args.timeout_s)).items():
+            samples[stage].append(seconds)
+        print(f"run {i + 1}/{args.runs}: " + "  ".join(f"{stage} {samples[stage][-1]:.2f}s" for stage in STAGES))
+
+    return {
+        "runs": args.runs,
+        "median_s": {stage: round(statistics.median(values), 3) for stage, values in samples.items()},
+        "max_s": {stage: round(max(values), 3) for stage, values in samples.items()},
+        "budget_s": {stage: getattr(args, f"budget_{stage}_s") for stage in STAGES},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure agent import/registration/warm-up time against a budget")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout-s", type=float, default=60)
+    parser.add_argument("--budget-import-s", type=float, default=3.0)
+    parser.add_argument("--budget-register-s", type=float, default=8.0)
+    parser.add_argument("--budget-accept-s", type=float, default=8.5)
+    parser.add_argument("--budget-warm-s", type=float, default=8.0)
+    parser.add_argument("--baseline", help="result JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown over --baseline")
+    parser.add_argument("--profile", action="store_true", help="also list the slowest imports")
+    parser.add_argument("--json", help="write the result to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    baseline = json.loads(Path(args.baseline).read_text())["median_s"] if args.baseline else {}
+
+    print(f"\n{'stage':<10} {'median':>8} {'max':>8} {'budget':>8} {'baseline':>9}")
+    over = []
+    for stage in STAGES:
+        median = result["median_s"][stage]
+        limit = result["budget_s"][stage]
+        if stage in baseline:
+            limit = min(limit, baseline[stage] * (1 + args.tolerance))
+        if median > limit:
+            over.append(stage)
+        base = f"{baseline[stage]:>8.2f}s" if stage in baseline else f"{'-':>9}"
+        print(
+            f"{stage:<10} {median:>7.2f}s {result['max_s'][stage]:>7.2f}s "
+            f"{result['budget_s'][stage]:>7.2f}s {base}{'  OVER' if median > limit else ''}"
+        )
+
+    if args.profile:
+        print("\nslowest imports (cumulative)")
+        for seconds, module in import_profile():
+            print(f"  {seconds * 1000:>7.0f} ms  {module}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+    if over:
+        print(f"\nStartup budget exceeded: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
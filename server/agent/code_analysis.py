@@ -0,0 +1,623 @@
+"""
+Local static analysis of the candidate's JavaScript
+A small tokenizer plus a few structural passes (functions, loop nesting, unused
+variables, off-by-one patterns, unbalanced brackets) that turn the buffer into compact,
+line-numbered findings. They are injected into the live prompt and the report prompts
+so the LLM starts from concrete, checkable hints instead of scanning raw code.
+
+Analysis is pure CPU work, so it runs in an executor (a dedicated thread, or a process
+with CODE_ANALYSIS_POOL=process), never on the event loop. Results are cached per code
+snapshot; the live prompt, the pause comment and the report share them.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_KEYWORDS = {
+    "break", "case", "catch", "class", "const", "continue", "debugger", "default", "delete",
+    "do", "else", "export", "extends", "finally", "for", "function", "if", "import", "in",
+    "instanceof", "let", "new", "of", "return", "static", "super", "switch", "this", "throw",
+    "try", "typeof", "var", "void", "while", "with", "yield", "async", "await", "null",
+    "true", "false", "undefined",
+}
+_LOOP_KEYWORDS = {"for", "while", "do"}
+_DECLARATIONS = {"let", "const", "var"}
+# After these a `/` starts a regex literal rather than a division
+_REGEX_AFTER_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+_WRITE_OPERATORS = {"=", "+=", "-=", "*=", "/=", "%=", "**=", "<<=", ">>=", ">>>=", "&=", "|=", "^=", "&&=", "||=", "??="}
+_OPENERS = {"(": ")", "[": "]", "{": "}"}
+_CLOSERS = {v: k for k, v in _OPENERS.items()}
+
+_TOKEN = re.compile(
+    r"(?P<ws>[ \t\r\f\v]+)"
+    r"|(?P<nl>\n)"
+    r"|(?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|$))"
+    r"|(?P<num>(?:0[xXbBoO][\da-fA-F_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?)n?)"
+    r"|(?P<ident>[A-Za-z_$][\w$]*)"
+    r"|(?P<str>\"(?:[^\"\\\n]|\\.)*\"?|'(?:[^'\\\n]|\\.)*'?)"
+    r"|(?P<punct>>>>=|\.\.\.|===|!==|\*\*=|<<=|>>=|>>>|&&=|\|\|=|\?\?=|=>|==|!=|<=|>=|&&|\|\||\?\?|\?\.|\+\+|--"
+    r"|\+=|-=|\*=|/=|%=|&=|\|=|\^=|\*\*|<<|>>|[{}()\[\];,<>+\-*/%&|^!~?:=.@#])"
+)
+_REGEX_LITERAL = re.compile(r"/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*")
+
+
+@dataclass
+class Token:
+    kind: str  # ident | keyword | num | str | template | regex | punct
+    value: str
+    line: int  # 1-based, as in the editor
+
+
+@dataclass
+class Finding:
+    line: int
+    kind: str  # syntax | off_by_one | nested_loop | unused
+    message: str
+
+
+@dataclass
+class FunctionInfo:
+    name: str
+    params: list
+    start_line: int
+    end_line: int
+    max_loop_depth: int = 0
+
+
+@dataclass
+class Analysis:
+    lines: int = 0
+    tokens: int = 0
+    functions: list = field(default_factory=list)
+    findings: list = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+    def render(self, max_findings: int = 12) -> str:
+        """Compact, line-numbered summary for a prompt; empty when there is nothing to say"""
+        if not self.tokens:
+            return ""
+        out = [f"- {self.lines} lines, {self.tokens} tokens, {len(self.functions)} function(s)"]
+        for fn in self.functions[:8]:
+            depth = f", loop depth {fn.max_loop_depth}" if fn.max_loop_depth else ""
+            out.append(f"- function {fn.name}({', '.join(fn.params)}) L{fn.start_line}-L{fn.end_line}{depth}")
+        findings = sorted(self.findings, key=lambda f: f.line)
+        for finding in findings[:max_findings]:
+            out.append(f"- L{finding.line} [{finding.kind}] {finding.message}")
+        if len(findings) > max_findings:
+            out.append(f"- ... {len(findings) - max_findings} more finding(s)")
+        return "\n".join(out)
+
+
+# ============================================================================
+# TOKENIZER
+# ============================================================================
+
+def _regex_allowed(previous: Optional[Token]) -> bool:
+    if previous is None:
+        return True
+    if previous.kind == "punct":
+        return previous.value not in (")", "]", "}", "++", "--")
+    return previous.kind == "keyword" and previous.value in _REGEX_AFTER_KEYWORDS
+
+
+def _scan_template(code: str, pos: int, line: int, tokens: list, findings: list):
+    """
+    Template literal starting at `pos`. Its text pieces become `template` tokens and each
+    `${...}` is tokenized in between, wrapped in parentheses, so the identifiers it uses
+    count as reads. Returns the position and line after the literal.
+    """
+    start, first_line, i = pos, line, pos + 1
+    while i < len(code):
+        ch = code[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "`":
+            tokens.append(Token("template", code[start:i + 1], line))
+            return i + 1, line + code.count("\n", start, i + 1)
+        if code.startswith("${", i):
+            tokens.append(Token("template", code[start:i + 2], line))
+            line += code.count("\n", start, i + 2)
+            tokens.append(Token("punct", "(", line))
+            i, line = _tokenize(code, i + 2, line, tokens, findings, nested=True)
+            tokens.append(Token("punct", ")", line))
+            start = i - 1  # the next piece starts at the interpolation's `}`
+            continue
+        i += 1
+    findings.append(Finding(first_line, "syntax", "template literal is never closed"))
+    tokens.append(Token("template", code[start:], line))
+    return len(code), line + code.count("\n", start)
+
+
+def _tokenize(code: str, pos: int, line: int, tokens: list, findings: list, nested: bool = False):
+    """Append tokens from `pos`; `nested` stops after the `}` closing a template interpolation"""
+    depth = 0
+    while pos < len(code):
+        ch = code[pos]
+        if ch == "`":
+            pos, line = _scan_template(code, pos, line, tokens, findings)
+            continue
+        if ch == "/" and _regex_allowed(tokens[-1] if tokens else None) and not code.startswith(("//", "/*"), pos):
+            match = _REGEX_LITERAL.match(code, pos)
+            if match:
+                tokens.append(Token("regex", match.group(), line))
+                pos = match.end()
+                continue
+
+        match = _TOKEN.match(code, pos)
+        if match is None:
+            # Stray character (e.g. non-ASCII identifier): skip it
+            pos += 1
+            continue
+        kind, value = match.lastgroup, match.group()
+        if kind == "nl":
+            line += 1
+        elif kind == "comment":
+            if value.startswith("/*") and not value.endswith("*/"):
+                findings.append(Finding(line, "syntax", "block comment is never closed"))
+            line += value.count("\n")
+        elif kind == "str":
+            if len(value) < 2 or value[-1] != value[0]:
+                findings.append(Finding(line, "syntax", "string literal is not closed on its line"))
+            tokens.append(Token("str", value, line))
+        elif kind != "ws":
+            if nested and value == "}" and depth == 0:
+                return match.end(), line
+            if nested and value in ("{", "}"):
+                depth += 1 if value == "{" else -1
+            if kind == "ident" and value in _KEYWORDS:
+                kind = "keyword"
+            tokens.append(Token(kind, value, line))
+        pos = match.end()
+    return pos, line
+
+
+def tokenize(code: str):
+    """Tokens with line numbers, plus syntax findings (unterminated literals)"""
+    tokens, findings = [], []
+    _tokenize(code, 0, 1, tokens, findings)
+    return tokens, findings
+
+
+# ============================================================================
+# STRUCTURE
+# ============================================================================
+
+class _Structure:
+    """Token stream with bracket matching and statement extents"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.match = {}
+        self.findings = []
+        stack = []
+        for i, token in enumerate(tokens):
+            if token.kind != "punct":
+                continue
+            if token.value in _OPENERS:
+                stack.append(i)
+            elif token.value in _CLOSERS:
+                if stack and tokens[stack[-1]].value == _CLOSERS[token.value]:
+                    opener = stack.pop()
+                    self.match[opener] = i
+                    self.match[i] = opener
+                else:
+                    self.findings.append(Finding(token.line, "syntax", f"unmatched `{token.value}`"))
+        for opener in stack:
+            token = tokens[opener]
+            self.findings.append(Finding(token.line, "syntax", f"`{token.value}` opened here is never closed"))
+
+    def value(self, i: int) -> Optional[str]:
+        return self.tokens[i].value if 0 <= i < len(self.tokens) else None
+
+    def close_of(self, i: int) -> int:
+        return self.match.get(i, len(self.tokens) - 1)
+
+    def statement_end(self, i: int) -> int:
+        """Index of the last token of the statement starting at `i`"""
+        n = len(self.tokens)
+        if i >= n:
+            return n - 1
+        value = self.value(i)
+        if value == "{":
+            return self.close_of(i)
+        if value in ("for", "while", "if") and self.value(i + 1) == "(":
+            end = self.statement_end(self.close_of(i + 1) + 1)
+            if value == "if" and self.value(end + 1) == "else":
+                end = self.statement_end(end + 2)
+            return end
+        if value == "do":
+            end = self.statement_end(i + 1)
+            if self.value(end + 1) == "while" and self.value(end + 2) == "(":
+                end = self.close_of(end + 2)
+                if self.value(end + 1) == ";":
+                    end += 1
+            return end
+        j = i
+        while j < n:
+            value = self.value(j)
+            if value == ";":
+                return j
+            if value in _OPENERS:
+                j = self.close_of(j) + 1
+                continue
+            if value in _CLOSERS:
+                return j - 1
+            j += 1
+        return n - 1
+
+
+def _loops(structure: _Structure):
+    """(keyword index, body end index) for every loop; `while` trailers of `do` excluded"""
+    loops, trailers = [], set()
+    for i, token in enumerate(structure.tokens):
+        if token.kind != "keyword" or token.value not in _LOOP_KEYWORDS or i in trailers:
+            continue
+        if token.value == "do":
+            end = structure.statement_end(i)
+            body_end = structure.statement_end(i + 1)
+            trailers.add(body_end + 1)
+            loops.append((i, end))
+        elif structure.value(i + 1) == "(":
+            loops.append((i, structure.statement_end(i)))
+    return loops
+
+
+def _functions(structure: _Structure):
+    """(FunctionInfo, first index, last index) for declarations, expressions, arrows and methods"""
+    tokens = structure.tokens
+    found = []
+
+    def params_of(open_index: int) -> list:
+        close = structure.close_of(open_index)
+        names, depth, expect = [], 0, True
+        for j in range(open_index + 1, close):
+            value = tokens[j].value
+            if value in _OPENERS:
+                depth += 1
+            elif value in _CLOSERS:
+                depth -= 1
+            elif value == "," and depth == 0:
+                expect = True
+            elif depth == 0 and expect and tokens[j].kind == "ident":
+                names.append(tokens[j].value)
+                expect = False
+            elif depth == 0 and expect and value in ("{", "["):
+                names.append("{...}")
+                expect = False
+        return names
+
+    def add(name: str, open_index: int, first: int):
+        close = structure.close_of(open_index)
+        after = close + 1
+        if structure.value(after) == "=>":
+            after += 1
+        if structure.value(after) == "{":
+            last = structure.close_of(after)
+        elif tokens[close + 1 if close + 1 < len(tokens) else close].value == "=>":
+            last = structure.statement_end(after) if after < len(tokens) else close
+        else:
+            return
+        found.append((FunctionInfo(name, params_of(open_index), tokens[first].line, tokens[last].line), first, last))
+
+    for i, token in enumerate(tokens):
+        value = token.value
+        if token.kind == "keyword" and value == "function":
+            j = i + 1
+            if structure.value(j) == "*":
+                j += 1
+            name = "(anonymous)"
+            if j < len(tokens) and tokens[j].kind == "ident":
+                name, j = tokens[j].value, j + 1
+            # `const name = function (...)`
+            if name == "(anonymous)" and structure.value(i - 1) == "=" and i >= 2 and tokens[i - 2].kind == "ident":
+                name = tokens[i - 2].value
+            if structure.value(j) == "(":
+                add(name, j, i)
+        elif value == "=>" and token.kind == "punct":
+            # `(a, b) => ...` or `a => ...`; named when assigned
+            if structure.value(i - 1) == ")":
+                open_index = structure.match.get(i - 1)
+                if open_index is None:
+                    continue
+                start = open_index - 1 if structure.value(open_index - 1) == "async" else open_index
+                name = "(anonymous)"
+                if structure.value(start - 1) == "=" and start >= 2 and tokens[start - 2].kind == "ident":
+                    name = tokens[start - 2].value
+                    first = start - 2
+                else:
+                    first = open_index
+                add(name, open_index, first)
+            elif i >= 1 and tokens[i - 1].kind == "ident":
+                param = tokens[i - 1].value
+                name = "(anonymous)"
+                if structure.value(i - 2) == "=" and i >= 3 and tokens[i - 3].kind == "ident":
+                    name = tokens[i - 3].value
+                last = structure.value(i + 1) == "{" and structure.close_of(i + 1) or structure.statement_end(i + 1)
+                found.append((FunctionInfo(name, [param], token.line, tokens[min(last, len(tokens) - 1)].line), i - 1, last))
+        elif (
+            token.kind == "ident"
+            and structure.value(i + 1) == "("
+            and structure.value(structure.close_of(i + 1) + 1) == "{"
+            and structure.value(i - 1) in (None, "{", "}", ";", "static", "async", "get", "set")
+        ):
+            # Class / object-literal method: `name(...) { ... }`
+            add(value, i + 1, i)
+    return found
+
+
+# ============================================================================
+# PASSES
+# ============================================================================
+
+def _member_chain_before(tokens, end: int) -> int:
+    """Start index of `a.b.c` ending at `end` (inclusive), walking back over `.ident`"""
+    start = end
+    while start >= 2 and tokens[start - 1].value in (".", "?.") and tokens[start - 2].kind in ("ident", "keyword"):
+        start -= 2
+    return start
+
+
+def _off_by_one(structure: _Structure, loops) -> list:
+    tokens = structure.tokens
+    findings = []
+    headers = []
+    for keyword, _ in loops:
+        if tokens[keyword].value in ("for", "while") and structure.value(keyword + 1) == "(":
+            headers.append((keyword + 1, structure.close_of(keyword + 1)))
+
+    for open_index, close_index in headers:
+        header = tokens[open_index + 1:close_index]
+        values = [t.value for t in header]
+        # `i <= xs.length` in a loop condition
+        for j, token in enumerate(header):
+            if token.value != "<=" or j + 1 >= len(header):
+                continue
+            k = j + 1
+            while k + 2 < len(header) and header[k + 1].value in (".", "?.") and header[k + 2].kind in ("ident", "keyword"):
+                k += 2
+            if header[k].value == "length" and k > j + 1 and (k + 1 >= len(header) or header[k + 1].value not in ("-", "+")):
+                chain = "".join(t.value for t in header[j + 1:k + 1])
+                findings.append(Finding(token.line, "off_by_one", f"`{header[j - 1].value} <= {chain}` runs one past the last index"))
+        # `for (let i = xs.length; i >= 0; i--)`
+        if tokens[open_index - 1].value == "for" and values.count(";") == 2:
+            init = header[:values.index(";")]
+            condition = header[values.index(";") + 1:len(values) - values[::-1].index(";") - 1]
+            if (
+                len(init) >= 3
+                and init[-1].value == "length"
+                and init[-2].value in (".", "?.")
+                and any(t.value == ">=" for t in condition)
+            ):
+                findings.append(Finding(init[-1].line, "off_by_one", "counts down from `.length`, one past the last index"))
+
+    # `xs[xs.length]` read (an assignment to it is the push idiom)
+    for i, token in enumerate(tokens):
+        if token.value != "[" or i == 0 or tokens[i - 1].kind not in ("ident", "keyword"):
+            continue
+        close = structure.match.get(i)
+        if close is None or close - i < 4 or tokens[close - 1].value != "length":
+            continue
+        inner = "".join(t.value for t in tokens[i + 1:close - 2])
+        outer = "".join(t.value for t in tokens[_member_chain_before(tokens, i - 1):i])
+        if inner == outer and structure.value(close + 1) not in _WRITE_OPERATORS:
+            findings.append(Finding(token.line, "off_by_one", f"`{outer}[{inner}.length]` is always undefined (last index is length - 1)"))
+    return findings
+
+
+def _nested_loops(structure: _Structure, loops) -> list:
+    findings = []
+    for keyword, end in loops:
+        depth = 1 + sum(1 for other, other_end in loops if other < keyword and end <= other_end)
+        if depth >= 2:
+            token = structure.tokens[keyword]
+            findings.append(Finding(token.line, "nested_loop", f"`{token.value}` at loop depth {depth}: O(n^{depth}) if each loop scans the input"))
+    return findings
+
+
+def _declared_names(structure: _Structure, start: int):
+    """Bindings introduced by the `let/const/var` at `start`: [(name, index)]"""
+    tokens = structure.tokens
+    names = []
+    i = start + 1
+    while i < len(tokens):
+        token = tokens[i]
+        if token.kind == "ident":
+            names.append((token.value, i))
+            i += 1
+        elif token.value in ("{", "["):
+            close = structure.close_of(i)
+            for j in range(i + 1, close):
+                following = structure.value(j + 1)
+                if tokens[j].kind == "ident" and following in (",", "}", "]", "=") and structure.value(j - 1) != ".":
+                    names.append((tokens[j].value, j))
+            i = close + 1
+        else:
+            return names
+        # Skip the initializer up to the next declarator
+        while i < len(tokens):
+            value = structure.value(i)
+            if value in _OPENERS:
+                i = structure.close_of(i) + 1
+                continue
+            if value == ",":
+                i += 1
+                break
+            if value in (";", "of", "in") or value in _CLOSERS:
+                return names
+            if value in _DECLARATIONS or value in ("return", "if", "for", "while", "function", "class"):
+                return names
+            # Automatic semicolon insertion: a new line after a complete expression
+            if i > start + 1 and tokens[i].line > tokens[i - 1].line and tokens[i - 1].kind in ("ident", "num", "str", "template", "keyword") and tokens[i].kind == "ident":
+                return names
+            i += 1
+        else:
+            return names
+    return names
+
+
+def _unused(structure: _Structure, function_names) -> list:
+    tokens = structure.tokens
+    declared = {}
+    for i, token in enumerate(tokens):
+        if token.kind == "keyword" and token.value in _DECLARATIONS:
+            for name, index in _declared_names(structure, i):
+                # `const solve = (...) => ...` is the entry point the test harness calls
+                if name not in function_names:
+                    declared.setdefault(name, index)
+
+    reads, writes = {}, {}
+    for i, token in enumerate(tokens):
+        if token.kind != "ident" or token.value not in declared or i == declared[token.value]:
+            continue
+        if structure.value(i - 1) in (".", "?."):
+            continue  # property, not the variable
+        following = structure.value(i + 1)
+        if following in _WRITE_OPERATORS and following != "=" or following in ("++", "--") or structure.value(i - 1) in ("++", "--"):
+            # Compound updates read the old value only to write it back
+            writes[token.value] = writes.get(token.value, 0) + 1
+        elif following == "=":
+            writes[token.value] = writes.get(token.value, 0) + 1
+        else:
+            reads[token.value] = reads.get(token.value, 0) + 1
+
+    findings = []
+    for name, index in declared.items():
+        if name.startswith("_") or reads.get(name):
+            continue
+        line = tokens[index].line
+        if writes.get(name):
+            findings.append(Finding(line, "unused", f"`{name}` is assigned but never read"))
+        else:
+            findings.append(Finding(line, "unused", f"`{name}` is declared but never used"))
+    return findings
+
+
+def analyze(code: str) -> Analysis:
+    """Analyze a JavaScript buffer. Pure function, safe to run in a worker thread or process."""
+    started = time.perf_counter()
+    tokens, findings = tokenize(code)
+    structure = _Structure(tokens)
+    findings.extend(structure.findings)
+
+    loops = _loops(structure)
+    functions = []
+    for info, first, last in _functions(structure):
+        inner = [(k, e) for k, e in loops if first <= k <= last]
+        if inner:
+            info.max_loop_depth = max(
+                1 + sum(1 for o, oe in inner if o < k and e <= oe) for k, e in inner
+            )
+        functions.append(info)
+
+    findings.extend(_nested_loops(structure, loops))
+    findings.extend(_off_by_one(structure, loops))
+    findings.extend(_unused(structure, {fn.name for fn in functions}))
+
+    return Analysis(
+        lines=code.count("\n") + 1 if code else 0,
+        tokens=len(tokens),
+        functions=functions,
+        findings=findings,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+
+# ============================================================================
+# OFF-LOOP RUNNER
+# ============================================================================
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        if os.environ.get("CODE_ANALYSIS_POOL", "thread") == "process":
+            # forkserver: the worker only imports this module, not the agent
+            _executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("forkserver")
+            )
+        else:
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="code-analysis")
+    return _executor
+
+
+class CodeAnalyzer:
+    """
+    Per-session front end: `await analyze(code)` runs the analysis in the executor and
+    caches the latest result, so repeated calls for the same snapshot are free.
+    """
+
+    def __init__(self, max_findings: int = 12, enabled: bool = True):
+        self.max_findings = max_findings
+        self.enabled = enabled
+        self._code = None
+        self._result: Optional[Analysis] = None
+        self._pending: Optional[asyncio.Future] = None
+        self.stats = {"runs": 0, "cache_hits": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+    @classmethod
+    def from_env(cls) -> "CodeAnalyzer":
+        return cls(
+            max_findings=int(os.environ.get("CODE_ANALYSIS_MAX_FINDINGS", "12")),
+            enabled=os.environ.get("CODE_ANALYSIS", "1") != "0",
+        )
+
+    async def analyze(self, code: str) -> Optional[Analysis]:
+        if not self.enabled:
+            return None
+        if code == self._code:
+            self.stats["cache_hits"] += 1
+            # Concurrent callers for the same snapshot share the in-flight run
+            pending = self._pending
+            if pending is None:
+                return self._result
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                return None  # logged and counted by the caller that started the run
+
+        self._code, self._result = code, None
+        self._pending = asyncio.get_running_loop().run_in_executor(_get_executor(), analyze, code)
+        pending = self._pending
+        try:
+            result = await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"[ANALYSIS] Static analysis failed: {e}")
+            if self._pending is pending:
+                self._code, self._pending = None, None
+            return None
+        self.stats["runs"] += 1
+        self.stats["total_ms"] += result.elapsed_ms
+        self.stats["max_ms"] = max(self.stats["max_ms"], result.elapsed_ms)
+        if self._pending is pending:
+            self._result, self._pending = result, None
+        return result
+
+    async def render(self, code: str) -> str:
+        result = await self.analyze(code)
+        return result.render(self.max_findings) if result is not None else ""
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "total_ms": round(self.stats["total_ms"], 1)}
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
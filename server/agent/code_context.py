@@ -0,0 +1,154 @@
+"""
+Incremental, windowed code context
+Keeps a line-numbered model of the candidate's buffer, tracks which regions changed
+between snapshots and renders a bounded view for the system prompt: recently edited
+regions verbatim (with line numbers) plus a compact outline of everything else.
+"""
+import difflib
+import os
+import re
+
+# Rough prompt-token estimate; good enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+_CONTROL_WORDS = {"if", "for", "while", "switch", "catch", "return", "function"}
+
+_OUTLINE_PATTERNS = [
+    re.compile(r"^\s*(export\s+)?(default\s+)?(async\s+)?function\b\s*\*?\s*\w*\s*\("),
+    re.compile(r"^\s*(export\s+)?(default\s+)?class\s+\w+"),
+    re.compile(r"^\s*(export\s+)?(const|let|var)\s+\w+\s*=\s*(async\s+)?(function\b|\([^)]*\)\s*=>|\w+\s*=>)"),
+    re.compile(r"^\s*(static\s+)?(async\s+)?(get\s+|set\s+)?(\w+)\s*\([^)]*\)\s*\{"),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _is_outline_line(line: str) -> bool:
+    for pattern in _OUTLINE_PATTERNS:
+        match = pattern.match(line)
+        if not match:
+            continue
+        # The method pattern also matches `if (...) {` and friends
+        if pattern is _OUTLINE_PATTERNS[-1] and match.group(4) in _CONTROL_WORDS:
+            continue
+        return True
+    return False
+
+
+class CodeContext:
+    """
+    Line model of the editor buffer. Call `update(code)` with each snapshot and
+    `render()` to get the prompt-sized view. Line numbers are 1-based, as in the editor.
+    """
+
+    def __init__(self, token_budget: int = 1200, context_lines: int = 3, max_regions: int = 6):
+        self.token_budget = token_budget
+        self.context_lines = context_lines
+        self.max_regions = max_regions
+
+        self.lines = []
+        # Edited regions in current line numbering, newest first: [start, end] (0-based, inclusive)
+        self.regions = []
+        self.version = 0
+
+    @classmethod
+    def from_env(cls) -> "CodeContext":
+        return cls(token_budget=int(os.environ.get("CODE_CONTEXT_TOKENS", "1200")))
+
+    @staticmethod
+    def _remap(line: int, opcodes) -> int:
+        """Map an old line index to its position in the new buffer"""
+        for tag, i1, i2, j1, j2 in opcodes:
+            if i1 <= line < i2 or (i1 == i2 == line):
+                if tag == "equal":
+                    return j1 + (line - i1)
+                return j1
+        return opcodes[-1][4] if opcodes else line
+
+    def update(self, code: str):
+        new_lines = code.split("\n")
+        if new_lines == self.lines:
+            return
+
+        matcher = difflib.SequenceMatcher(a=self.lines, b=new_lines, autojunk=False)
+        opcodes = matcher.get_opcodes()
+
+        # Carry older regions over to the new numbering
+        remapped = []
+        for start, end in self.regions:
+            new_start = self._remap(start, opcodes)
+            new_end = max(new_start, self._remap(end, opcodes))
+            remapped.append([new_start, new_end])
+
+        fresh = []
+        # The first snapshot is the starter code, not an edit
+        if self.lines:
+            for tag, i1, i2, j1, j2 in opcodes:
+                if tag == "equal":
+                    continue
+                # Deletions leave a zero-width hole; point at the line after it
+                fresh.append([j1, max(j1, j2 - 1)])
+
+        self.lines = new_lines
+        self.version += 1
+
+        last = max(0, len(new_lines) - 1)
+        merged = []
+        for start, end in reversed(fresh):
+            merged.append([min(start, last), min(end, last)])
+        for region in remapped:
+            region = [min(region[0], last), min(region[1], last)]
+            if any(r[0] <= region[1] + 1 and region[0] <= r[1] + 1 for r in merged):
+                continue
+            merged.append(region)
+        self.regions = merged[:self.max_regions]
+
+    def _numbered(self, start: int, end: int) -> str:
+        return "\n".join(f"{i + 1:>4}| {self.lines[i]}" for i in range(start, end + 1))
+
+    def render(self) -> str:
+        if not self.lines or self.lines == [""]:
+            return "// No code yet"
+
+        full = self._numbered(0, len(self.lines) - 1)
+        if estimate_tokens(full) <= self.token_budget:
+            return full
+
+        budget = self.token_budget
+        shown = set()
+        sections = []
+
+        # Nothing edited yet: anchor on the top of the file
+        for start, end in self.regions or [[0, 0]]:
+            lo = max(0, start - self.context_lines)
+            hi = min(len(self.lines) - 1, end + self.context_lines)
+            block = self._numbered(lo, hi)
+            cost = estimate_tokens(block)
+            if cost > budget:
+                # Keep the edited lines themselves if the padded window doesn't fit
+                hi = min(hi, lo + max(1, budget * CHARS_PER_TOKEN // 80))
+                block = self._numbered(lo, hi)
+                cost = estimate_tokens(block)
+                if cost > budget:
+                    break
+            sections.append(f"// --- recently edited: lines {lo + 1}-{hi + 1} ---\n{block}")
+            shown.update(range(lo, hi + 1))
+            budget -= cost
+
+        outline = [
+            f"{i + 1:>4}| {self.lines[i].strip()}"
+            for i in range(len(self.lines))
+            if i not in shown and _is_outline_line(self.lines[i])
+        ]
+        outline_block = "\n".join(outline)
+        while outline and estimate_tokens(outline_block) > budget:
+            outline = outline[: len(outline) // 2]
+            outline_block = "\n".join(outline)
+
+        header = f"// {len(self.lines)} lines total; showing edited regions and an outline of the rest"
+        parts = [header] + sections
+        if outline:
+            parts.append(f"// --- outline of other code ---\n{outline_block}")
+        return "\n".join(parts)
@@ -0,0 +1,162 @@
+"""
+Bounded conversation memory
+The agent's chat_ctx keeps the full transcript (the report needs it), but the live LLM
+only sees: instructions + a rolling summary of older turns + the last K turns verbatim,
+under a hard token ceiling. Older turns are folded into the summary in the background,
+so summarization never sits on the reply's critical path.
+"""
+import asyncio
+import logging
+import os
+
+from livekit.agents import ChatContext
+
+from code_context import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain running notes of a live technical interview.
+Merge the previous notes with the new exchanges into concise notes (bullet points).
+Keep: the candidate's stated approach, complexity claims, bugs discussed, hints already given,
+open questions and any commitments. Drop pleasantries. Never exceed 200 words."""
+
+
+def _item_text(item) -> str:
+    text = getattr(item, "text_content", None)
+    if text:
+        return text
+    # Tool calls/outputs and other non-message items
+    return str(getattr(item, "output", "") or getattr(item, "arguments", "") or "")
+
+
+def _item_tokens(item) -> int:
+    return estimate_tokens(_item_text(item)) + 4
+
+
+class ConversationMemory:
+    """
+    `prepare(chat_ctx)` returns the bounded ChatContext to send to the LLM for this turn.
+    `summarize_fn(previous_summary, transcript) -> str` folds old turns into the summary.
+    """
+
+    def __init__(self, summarize_fn, keep_turns: int = 6, max_prompt_tokens: int = 6000, max_summary_tokens: int = 400):
+        self.summarize_fn = summarize_fn
+        self.keep_turns = keep_turns
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_summary_tokens = max_summary_tokens
+
+        self.summary = ""
+        self._folded_ids = set()
+        self._summary_task = None
+        self.turn_stats = []
+
+    @classmethod
+    def from_env(cls, summarize_fn) -> "ConversationMemory":
+        return cls(
+            summarize_fn,
+            keep_turns=int(os.environ.get("MEMORY_KEEP_TURNS", "6")),
+            max_prompt_tokens=int(os.environ.get("MEMORY_MAX_PROMPT_TOKENS", "6000")),
+            max_summary_tokens=int(os.environ.get("MEMORY_MAX_SUMMARY_TOKENS", "400")),
+        )
+
+    @staticmethod
+    def _split(chat_ctx):
+        """Separate instruction messages from the dialogue"""
+        instructions, dialogue = [], []
+        for item in chat_ctx.items:
+            if getattr(item, "type", None) == "message" and item.role in ("system", "developer"):
+                instructions.append(item)
+            else:
+                dialogue.append(item)
+        return instructions, dialogue
+
+    def _recent_start(self, dialogue) -> int:
+        """Index of the first item belonging to the last `keep_turns` user turns"""
+        seen = 0
+        for i in range(len(dialogue) - 1, -1, -1):
+            item = dialogue[i]
+            if getattr(item, "type", None) == "message" and item.role == "user":
+                seen += 1
+                if seen == self.keep_turns:
+                    return i
+        return 0
+
+    def prepare(self, chat_ctx):
+        instructions, dialogue = self._split(chat_ctx)
+        recent_start = self._recent_start(dialogue)
+
+        older = dialogue[:recent_start]
+        unfolded = [item for item in older if item.id not in self._folded_ids]
+        if unfolded:
+            self._schedule_fold(unfolded)
+
+        # Older turns the summary hasn't absorbed yet stay verbatim until it has
+        verbatim = unfolded + dialogue[recent_start:]
+
+        summary = self.summary
+        if estimate_tokens(summary) > self.max_summary_tokens:
+            summary = summary[: self.max_summary_tokens * 4]
+
+        budget = self.max_prompt_tokens
+        budget -= sum(_item_tokens(item) for item in instructions)
+        budget -= estimate_tokens(summary) if summary else 0
+
+        # Hard ceiling: drop the oldest verbatim items, but always keep the latest one
+        while len(verbatim) > 1 and sum(_item_tokens(item) for item in verbatim) > budget:
+            verbatim.pop(0)
+
+        bounded = ChatContext(list(instructions))
+        if summary:
+            bounded.add_message(role="system", content=f"Notes from earlier in this interview:\n{summary}")
+        bounded.items.extend(verbatim)
+
+        prompt_tokens = sum(_item_tokens(item) for item in bounded.items)
+        self.turn_stats.append({
+            "turn": len(self.turn_stats) + 1,
+            "prompt_tokens": prompt_tokens,
+            "full_history_tokens": sum(_item_tokens(item) for item in chat_ctx.items),
+            "verbatim_items": len(verbatim),
+            "summary_tokens": estimate_tokens(summary) if summary else 0,
+        })
+        logger.info(
+            f"[MEMORY] Turn {len(self.turn_stats)}: ~{prompt_tokens} prompt tokens "
+            f"({len(verbatim)} verbatim items, {len(self._folded_ids)} folded)"
+        )
+        return bounded
+
+    def _schedule_fold(self, items):
+        if self._summary_task is not None and not self._summary_task.done():
+            return
+        self._summary_task = asyncio.create_task(self._fold(list(items)))
+
+    async def _fold(self, items):
+        transcript = "\n".join(
+            f"{'CANDIDATE' if getattr(item, 'role', None) == 'user' else 'SOCRATIS'}: {_item_text(item)}"
+            for item in items
+            if _item_text(item)
+        )
+        try:
+            if transcript:
+                summary = await self.summarize_fn(self.summary, transcript)
+                self.summary = summary.strip()
+            self._folded_ids.update(item.id for item in items)
+            logger.info(f"[MEMORY] Folded {len(items)} items into summary (~{estimate_tokens(self.summary)} tokens)")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Unfolded items simply stay verbatim and are retried next turn
+            logger.warning(f"[MEMORY] Summarization failed: {e}")
+
+    async def aclose(self):
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
+
+    def get_stats(self) -> dict:
+        tokens = [t["prompt_tokens"] for t in self.turn_stats]
+        return {
+            "turns": len(self.turn_stats),
+            "folded_items": len(self._folded_ids),
+            "summary_tokens": estimate_tokens(self.summary) if self.summary else 0,
+            "max_prompt_tokens": max(tokens) if tokens else 0,
+            "last_prompt_tokens": tokens[-1] if tokens else 0,
+        }
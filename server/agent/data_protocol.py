@@ -0,0 +1,231 @@
+"""
+Typed data-channel protocol between the interview page and the agent
+Packets are JSON objects tagged by `type` and decoded straight into msgspec Structs
+(one pass, validated, no intermediate dicts). Mirrors client/lib/dataProtocol.ts.
+
+Version 1 adds `code_delta`: the client sends a single splice against the previous
+sequence number instead of the whole buffer, zlib-compressed when large. Offsets are
+UTF-16 code units (JavaScript string indices). On a sequence gap the agent ignores
+deltas and asks for a full snapshot with `code_resync`.
+Packets without `v` are version 0 (plain `problem` / `code`) and still accepted.
+"""
+import base64
+import logging
+import zlib
+from typing import Optional, Union
+
+import msgspec
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 1
+
+# Upper bound for a decompressed code payload (zip-bomb guard)
+MAX_CODE_BYTES = 1024 * 1024
+
+
+class Problem(msgspec.Struct, tag="problem"):
+    title: str = "Unknown"
+    description: str = ""
+    v: int = 0
+
+
+class ProblemAck(msgspec.Struct, tag="problem_ack"):
+    title: str
+    v: int = PROTOCOL_VERSION
+
+
+class Code(msgspec.Struct, tag="code"):
+    """Full snapshot of the editor buffer; `z` carries it zlib-compressed and base64-encoded"""
+    content: str = ""
+    z: Optional[str] = None
+    seq: int = 0
+    v: int = 0
+
+
+class CodeDelta(msgspec.Struct, tag="code_delta"):
+    """Replace [start, end) of the buffer at `base_seq` with `text` (or compressed `z`)"""
+    seq: int
+    base_seq: int
+    start: int
+    end: int
+    text: str = ""
+    z: Optional[str] = None
+    length: Optional[int] = None  # resulting buffer length, as a cheap integrity check
+    v: int = PROTOCOL_VERSION
+
+
+class CodeResync(msgspec.Struct, tag="code_resync"):
+    """Agent -> client: deltas can't be applied, send a full snapshot"""
+    seq: int
+    v: int = PROTOCOL_VERSION
+
+
+Packet = Union[Problem, ProblemAck, Code, CodeDelta, CodeResync]
+
+_decoder = msgspec.json.Decoder(Packet)
+_encoder = msgspec.json.Encoder()
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def decode_packet(data: bytes) -> Packet:
+    try:
+        return _decoder.decode(data)
+    except msgspec.DecodeError as e:
+        raise ProtocolError(f"invalid packet: {e}") from e
+
+
+def encode_packet(packet: Packet) -> bytes:
+    return _encoder.encode(packet)
+
+
+def packet_type(packet: Packet) -> str:
+    return type(packet).__struct_config__.tag
+
+
+def compress_text(text: str) -> str:
+    return base64.b64encode(zlib.compress(text.encode("utf-8"))).decode("ascii")
+
+
+def decompress_text(z: str) -> str:
+    inflater = zlib.decompressobj()
+    data = inflater.decompress(base64.b64decode(z), MAX_CODE_BYTES)
+    if inflater.unconsumed_tail:
+        raise ProtocolError(f"compressed code payload exceeds {MAX_CODE_BYTES} bytes")
+    return data.decode("utf-8")
+
+
+def _payload(text: str, z: Optional[str]) -> str:
+    return decompress_text(z) if z is not None else text
+
+
+def utf16_len(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-16-le")) // 2
+
+
+def splice_utf16(content: str, start: int, end: int, text: str) -> str:
+    """content[start:end] = text, with offsets in UTF-16 code units"""
+    if content.isascii():
+        return content[:start] + text + content[end:]
+    units = content.encode("utf-16-le")
+    return (units[:start * 2] + text.encode("utf-16-le") + units[end * 2:]).decode("utf-16-le")
+
+
+def make_delta(old: str, new: str, seq: int, compress_over: int = 512) -> CodeDelta:
+    """The single splice turning `old` into `new` (what the client sends; used by loadtest.py)"""
+    if not (old.isascii() and new.isascii()):
+        old, new = old.encode("utf-16-le"), new.encode("utf-16-le")
+        unit = 2
+    else:
+        unit = 1
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]:
+        suffix += 1
+    # Keep the cut on code unit boundaries, and never between the halves of a surrogate pair
+    prefix -= prefix % unit
+    suffix -= suffix % unit
+    if unit == 2:
+        if prefix and 0xD800 <= int.from_bytes(old[prefix - 2:prefix], "little") <= 0xDBFF:
+            prefix -= 2
+        if suffix and 0xDC00 <= int.from_bytes(new[len(new) - suffix:len(new) - suffix + 2], "little") <= 0xDFFF:
+            suffix -= 2
+    inserted = new[prefix:len(new) - suffix]
+    if unit == 2:
+        inserted = inserted.decode("utf-16-le")
+
+    delta = CodeDelta(
+        seq=seq,
+        base_seq=seq - 1,
+        start=prefix // unit,
+        end=(len(old) - suffix) // unit,
+        length=len(new) // unit,
+    )
+    if len(inserted) > compress_over:
+        delta.z = compress_text(inserted)
+    else:
+        delta.text = inserted
+    return delta
+
+
+class CodeBuffer:
+    """
+    The agent's copy of the candidate's editor buffer, rebuilt from snapshots and deltas.
+    `apply()` returns True when the content changed. After a gap, deltas are dropped
+    until the next snapshot; `take_resync()` returns the `code_resync` request to send.
+    """
+
+    # Ask again if this many deltas are dropped after a resync request went unanswered
+    RESYNC_RETRY_AFTER = 20
+
+    def __init__(self, content: str = ""):
+        self.content = content
+        self.seq = 0
+        self.synced = False
+        self.resync_needed = False
+        self._dropped_since_request = None
+        self.stats = {"snapshots": 0, "deltas": 0, "gaps": 0, "resyncs": 0}
+
+    def apply(self, packet) -> bool:
+        if isinstance(packet, Code):
+            content = _payload(packet.content, packet.z)
+            self.stats["snapshots"] += 1
+            self.seq = packet.seq
+            self.synced = True
+            self.resync_needed = False
+            self._dropped_since_request = None
+            changed = content != self.content
+            self.content = content
+            return changed
+
+        if not isinstance(packet, CodeDelta):
+            return False
+
+        if not self.synced or packet.base_seq != self.seq:
+            self.stats["gaps"] += 1
+            if self.synced:
+                logger.warning(f"[PROTOCOL] Code delta gap: have seq {self.seq}, delta is {packet.base_seq}->{packet.seq}")
+            self._desync()
+            return False
+
+        length = utf16_len(self.content)
+        if not 0 <= packet.start <= packet.end <= length:
+            logger.warning(f"[PROTOCOL] Code delta out of range ({packet.start}, {packet.end}) for length {length}")
+            self._desync()
+            return False
+
+        content = splice_utf16(self.content, packet.start, packet.end, _payload(packet.text, packet.z))
+        if packet.length is not None and utf16_len(content) != packet.length:
+            logger.warning("[PROTOCOL] Code delta length mismatch, requesting snapshot")
+            self._desync()
+            return False
+
+        self.stats["deltas"] += 1
+        self.seq = packet.seq
+        changed = content != self.content
+        self.content = content
+        return changed
+
+    def _desync(self):
+        self.synced = False
+        if self._dropped_since_request is None:
+            self.resync_needed = True
+            return
+        self._dropped_since_request += 1
+        if self._dropped_since_request >= self.RESYNC_RETRY_AFTER:
+            self.resync_needed = True
+
+    def take_resync(self) -> Optional[CodeResync]:
+        """The resync request to send, if one is due"""
+        if not self.resync_needed:
+            return None
+        self.resync_needed = False
+        self._dropped_since_request = 0
+        self.stats["resyncs"] += 1
+        return CodeResync(seq=self.seq)
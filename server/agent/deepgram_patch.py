@@ -2,62 +2,240 @@
 WORKING Deepgram TTS Monkey-Patch
 Replaces broken synthesize method with working HTTP-based synthesis
 """
-import aiohttp
 import asyncio
-import numpy as np
 from livekit import rtc
 from livekit.agents import tts
 import logging
 import os
+from typing import Optional
+
+import http_pool
+import latency_metrics
+import tts_cache
+import tts_hedge
+from audio_format import resample_frames
 
 logger = logging.getLogger(__name__)
 
-async def direct_deepgram_synthesize(text: str, api_key: str, model: str = "aura-helios-en", sample_rate: int = 24000):
+# Streaming mode: yield fixed-duration frames as bytes arrive instead of
+# waiting for the whole utterance. Set TTS_STREAMING=0 to restore buffered mode.
+TTS_STREAMING = os.environ.get("TTS_STREAMING", "1") != "0"
+TTS_FRAME_MS = int(os.environ.get("TTS_FRAME_MS", "20"))
+
+BYTES_PER_SAMPLE = 2  # linear16 mono
+
+# Point at a local stand-in (see fake_services.py) for offline load tests
+DEEPGRAM_BASE_URL = os.environ.get("DEEPGRAM_BASE_URL", "https://api.deepgram.com").rstrip("/")
+
+
+def speak_url(model: str, sample_rate: int, encoding: str = "linear16") -> str:
+    return f"{DEEPGRAM_BASE_URL}/v1/speak?model={model}&encoding={encoding}&sample_rate={sample_rate}"
+
+
+def speak_chunks(text: str, api_key: str, model: str, sample_rate: int):
+    """Response body chunks of one speak request (hedged and circuit-broken, see tts_hedge.py)"""
+    return tts_hedge.get_client().stream(
+        http_pool.get_session(),
+        speak_url(model, sample_rate),
+        {"text": text},
+        {
+            "Authorization": f"Token {api_key}",
+            "Content-Type": "application/json"
+        },
+    )
+
+
+class PcmFramer:
+    """
+    Cuts a linear16 byte stream into fixed-duration AudioFrames.
+    Whole frames are memoryview slices of the received chunk (no NumPy round trip);
+    only the few bytes straddling a chunk boundary are copied into a carry buffer.
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: int = TTS_FRAME_MS):
+        self.sample_rate = sample_rate
+        self.samples_per_frame = max(1, sample_rate * frame_ms // 1000)
+        self.frame_bytes = self.samples_per_frame * BYTES_PER_SAMPLE
+        self.total_bytes = 0
+        self._carry = bytearray()
+
+    def _frame(self, data):
+        return rtc.AudioFrame(
+            data=data,
+            sample_rate=self.sample_rate,
+            num_channels=1,
+            samples_per_channel=len(data) // BYTES_PER_SAMPLE,
+        )
+
+    def push(self, chunk):
+        """Yield every complete frame available after appending `chunk`"""
+        self.total_bytes += len(chunk)
+        view = memoryview(chunk)
+
+        # Top up a partial frame left over from the previous chunk first
+        if self._carry:
+            need = self.frame_bytes - len(self._carry)
+            self._carry += view[:need]
+            view = view[need:]
+            if len(self._carry) < self.frame_bytes:
+                return
+            yield self._frame(bytes(self._carry))
+            self._carry.clear()
+
+        whole = len(view) - len(view) % self.frame_bytes
+        for start in range(0, whole, self.frame_bytes):
+            yield self._frame(view[start:start + self.frame_bytes])
+        if whole < len(view):
+            self._carry += view[whole:]
+
+    def flush(self):
+        """Yield the short tail frame, dropping a dangling half sample"""
+        odd = len(self._carry) % BYTES_PER_SAMPLE
+        if odd:
+            logger.warning(f"[DirectDG] Dropping {odd} trailing byte(s)")
+            del self._carry[-odd:]
+        if self._carry:
+            yield self._frame(bytes(self._carry))
+            self._carry.clear()
+
+
+def pcm_to_frames(pcm: bytes, sample_rate: int, frame_ms: int = TTS_FRAME_MS):
+    """Split a complete linear16 buffer into fixed-duration frames"""
+    framer = PcmFramer(sample_rate, frame_ms)
+    yield from framer.push(pcm)
+    yield from framer.flush()
+
+
+async def fetch_deepgram_pcm(text: str, api_key: str, model: str = "aura-helios-en", sample_rate: int = 24000) -> bytes:
     """
     Direct Deepgram synthesis bypassing broken plugin
-    Returns audio frame directly
+    Returns the raw linear16 bytes of the whole utterance
     """
-    print(f"[DirectDG] Synthesizing: '{text[:50]}...'")
     logger.info(f"[DirectDG] Synthesizing: '{text[:50]}...'")
     
-    session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30))
+    latency_metrics.mark("tts_request_start")
     
     try:
-        url = f"https://api.deepgram.com/v1/speak?model={model}&encoding=linear16&sample_rate={sample_rate}"
-        
-        async with session.post(
-            url,
-            json={"text": text},
-            headers={
-                "Authorization": f"Token {api_key}",
-                "Content-Type": "application/json"
-            }
-        ) as resp:
-            if resp.status != 200:
-                error = await resp.text()
-                raise Exception(f"Deepgram API error {resp.status}: {error}")
-            
-            audio_bytes = await resp.read()
-            samples = np.frombuffer(audio_bytes, dtype=np.int16)
-            
-            print(f"[DirectDG] Got {len(samples)} samples ({len(samples)/sample_rate:.2f}s)")
-            logger.info(f"[DirectDG] Got {len(samples)} samples ({len(samples)/sample_rate:.2f}s)")
-            
-            frame = rtc.AudioFrame(
-                data=samples.tobytes(),
-                sample_rate=sample_rate,
-                num_channels=1,
-                samples_per_channel=len(samples),
-            )
-            
-            return frame
+        chunks = []
+        async for chunk in speak_chunks(text, api_key, model, sample_rate):
+            if not chunks:
+                latency_metrics.mark("tts_first_byte")
+            chunks.append(chunk)
+        latency_metrics.mark("tts_last_byte")
+        audio_bytes = b"".join(chunks)
+        num_samples = len(audio_bytes) // BYTES_PER_SAMPLE
+        logger.info(f"[DirectDG] Got {num_samples} samples ({num_samples/sample_rate:.2f}s)")
+        return audio_bytes
             
     except Exception as e:
-        print(f"[DirectDG] Error: {e}")
         logger.error(f"[DirectDG] Error: {e}")
         raise
-    finally:
-        await session.close()
+
+
+async def direct_deepgram_synthesize(text: str, api_key: str, model: str = "aura-helios-en", sample_rate: int = 24000):
+    """
+    Buffered synthesis
+    Returns the utterance as a list of correctly sized frames sliced from the response
+    """
+    audio_bytes = await fetch_deepgram_pcm(text, api_key, model, sample_rate)
+    return list(pcm_to_frames(audio_bytes, sample_rate))
+
+
+async def stream_deepgram_synthesize(text: str, api_key: str, model: str = "aura-helios-en", sample_rate: int = 24000, frame_ms: int = TTS_FRAME_MS):
+    """
+    Streaming Deepgram synthesis
+    Yields fixed-duration audio frames as soon as enough bytes have arrived
+    """
+    logger.info(f"[DirectDG] Streaming: '{text[:50]}...'")
+
+    latency_metrics.mark("tts_request_start")
+
+    try:
+        # Network chunks rarely line up with frames (or even with int16
+        # samples); the framer carries the remainder over to the next chunk.
+        framer = PcmFramer(sample_rate, frame_ms)
+        first_chunk = True
+        chunks = speak_chunks(text, api_key, model, sample_rate)
+        try:
+            async for chunk in chunks:
+                if first_chunk:
+                    latency_metrics.mark("tts_first_byte")
+                    first_chunk = False
+                for frame in framer.push(chunk):
+                    yield frame
+        finally:
+            # Closing early (barge-in) releases the HTTP response mid-stream
+            await chunks.aclose()
+        latency_metrics.mark("tts_last_byte")
+        for frame in framer.flush():
+            yield frame
+
+        total_samples = framer.total_bytes // BYTES_PER_SAMPLE
+        logger.info(f"[DirectDG] Streamed {total_samples} samples ({total_samples/sample_rate:.2f}s)")
+
+    except Exception as e:
+        logger.error(f"[DirectDG] Error: {e}")
+        raise
+
+
+async def synthesize_frames(text: str, api_key: str, model: str = "aura-helios-en", sample_rate: int = 24000, output_rate: Optional[int] = None):
+    """
+    Frames for `text` at `output_rate` (default: the requested `sample_rate`).
+    Pass a TTSFormat's rates (see audio_format.py): they only differ when Deepgram
+    can't produce the audio source's rate, and then frames are resampled here.
+    """
+    frames = _synthesize_frames(text, api_key, model, sample_rate)
+    async for frame in resample_frames(frames, sample_rate, output_rate or sample_rate):
+        yield frame
+
+
+async def _synthesize_frames(text: str, api_key: str, model: str, sample_rate: int):
+    """
+    Cache-aware synthesis
+    Serves cached phrases from the TTS cache, otherwise calls Deepgram
+    (streamed or buffered) and stores the result if the cache admits it
+    """
+    cache = tts_cache.get_cache()
+    pcm = await cache.lookup(model, sample_rate, text)
+    if pcm is not None:
+        logger.info(f"[DirectDG] Cache hit: '{text[:50]}...'")
+        for stage in ("tts_request_start", "tts_first_byte", "tts_last_byte"):
+            latency_metrics.mark(stage)
+        for frame in pcm_to_frames(pcm, sample_rate):
+            yield frame
+        return
+
+    if not TTS_STREAMING:
+        pcm = await fetch_deepgram_pcm(text, api_key, model, sample_rate)
+        if cache.admit(model, sample_rate, text):
+            await cache.store(model, sample_rate, text, pcm)
+        for frame in pcm_to_frames(pcm, sample_rate):
+            yield frame
+        return
+
+    collected = bytearray() if cache.admit(model, sample_rate, text) else None
+    async for frame in stream_deepgram_synthesize(text, api_key, model, sample_rate):
+        if collected is not None:
+            collected += frame.data
+        yield frame
+    if collected:
+        await cache.store(model, sample_rate, text, bytes(collected))
+
+
+async def prewarm_phrases(phrases, api_key: str, model: str = "aura-helios-en", sample_rate: int = 24000):
+    """Register fixed phrases as stock and make sure they are in the cache (disk hits only cost a file read)"""
+    cache = tts_cache.get_cache()
+    cache.add_stock_phrases(phrases)
+
+    async def _warm(phrase):
+        try:
+            async for _ in synthesize_frames(phrase, api_key, model, sample_rate):
+                pass
+        except Exception as e:
+            logger.warning(f"[TTSCache] Could not prewarm '{phrase[:30]}...': {e}")
+
+    await asyncio.gather(*(_warm(phrase) for phrase in phrases))
+    logger.info(f"[TTSCache] Prewarmed {len(phrases)} phrases. Stats: {cache.get_stats()}")
 
 
 def patch_deepgram_tts():
@@ -67,7 +245,6 @@ def patch_deepgram_tts():
     """
     from livekit.plugins import deepgram
     
-    print(f"[PATCH] Applying Deepgram TTS monkey-patch...")
     logger.info("[PATCH] Applying Deepgram TTS monkey-patch...")
     
     # Store original synthesize
@@ -75,7 +252,7 @@ def patch_deepgram_tts():
     
     def patched_synthesize(self, text: str, **kwargs):
         """Patched synthesize that uses working HTTP approach"""
-        print(f"[PATCH] Patched synthesis called for {len(text)} chars: {text[:30]}...")
+        logger.debug(f"[PATCH] Patched synthesis called for {len(text)} chars: {text[:30]}...")
         
         # Get API key from instance or env
         api_key = getattr(self, '_api_key', None) or getattr(self, '_opts', None)
@@ -85,13 +262,19 @@ def patch_deepgram_tts():
             api_key = os.environ.get("DEEPGRAM_API_KEY")
         
         # Get model
-        model = getattr(self, '_model', "aura-helios-en")
+        model = getattr(self, '_model', None) or getattr(getattr(self, '_opts', None), 'model', None) or "aura-helios-en"
         sample_rate = getattr(self, '_sample_rate', 24000)
         
         # Return a simple async generator that yields the audio
         async def _generate():
-            frame = await direct_deepgram_synthesize(text, api_key, model, sample_rate)
-            yield tts.SynthesizedAudio(request_id="", frame=frame)
+            # Hold one frame back so the last one can be marked final
+            previous = None
+            async for frame in synthesize_frames(text, api_key, model, sample_rate):
+                if previous is not None:
+                    yield tts.SynthesizedAudio(request_id="", frame=previous)
+                previous = frame
+            if previous is not None:
+                yield tts.SynthesizedAudio(request_id="", frame=previous, is_final=True)
         
         # Create a simple wrapper that looks like ChunkedStream
         class SimpleStream:
@@ -105,12 +288,12 @@ def patch_deepgram_tts():
                 return await self._gen.__anext__()
             
             async def aclose(self):
-                pass
+                # Closing the generator also closes the HTTP response mid-stream
+                await self._gen.aclose()
         
         return SimpleStream()
     
     # Apply patch
     deepgram.TTS.synthesize = patched_synthesize
     
-    print(f"[PATCH] Deepgram TTS patched successfully!")
     logger.info("[PATCH] Deepgram TTS patched successfully!")
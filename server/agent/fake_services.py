@@ -0,0 +1,386 @@
+"""
+Local stand-ins for the agent's external services
+One aiohttp app serving:
+    POST /v1/speak                       Deepgram-style linear16 TTS (configurable latency and chunking,
+                                         optional injected stalls and 503s)
+    POST /openai/v1/chat/completions     OpenAI-compatible streaming chat (stands in for Groq)
+    POST /api/save-analysis              the backend's report endpoint
+
+Responses are deterministic, so load-test runs are reproducible offline (e.g. in CI).
+
+Standalone:  python fake_services.py --port 18080
+Then point the agent at it with DEEPGRAM_BASE_URL, GROQ_BASE_URL and BACKEND_URL.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import struct
+import time
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Roughly conversational speech: ~15 characters per second of audio
+SPEECH_SECONDS_PER_CHAR = 0.065
+
+# Mirrors audio_format.DEEPGRAM_LINEAR16_RATES
+LINEAR16_RATES = (8000, 16000, 24000, 32000, 48000)
+
+INTERVIEWER_REPLY = (
+    "I'm looking at line 3 of your loop. How would that handle an empty array, "
+    "and what happens when the same value appears twice?"
+)
+
+SUMMARY_REPLY = (
+    "- Candidate proposed a hash map approach, O(n) time and O(n) space.\n"
+    "- Hint given about duplicate values; not yet addressed."
+)
+
+CODE_AUDIT_REPLY = {
+    "correctness": False,
+    "code_issues": [
+        {
+            "line_number": 3,
+            "code_snippet": "for (let i = 0; i <= nums.length; i++)",
+            "issue": "Off-by-one: the loop reads past the end of the array.",
+            "suggestion": "Use i < nums.length.",
+            "severity": "error",
+        }
+    ],
+}
+
+TRANSCRIPT_AUDIT_REPLY = {
+    "transcript_issues": [
+        {
+            "quote": "I think it's like a hashtable thing",
+            "issue": "Vague naming of the data structure.",
+            "what_should_have_been_said": "I'll use a Map from value to index.",
+            "category": "communication",
+        }
+    ],
+    "notes": "Hash map approach, O(n); duplicates hint given.",
+}
+
+SCORES_REPLY = {
+    "overall_score": 5,
+    "dimension_scores": {
+        "problem_solving": 6,
+        "algorithmic_thinking": 5,
+        "code_implementation": 4,
+        "testing": 3,
+        "time_management": 6,
+        "communication": 5,
+    },
+}
+
+NARRATIVE_REPLY = """### Summary
+**Verdict:** Weak Yes
+Reasonable approach, shaky execution.
+
+### Strengths
+- **Approach:** Identified the O(n) hash map solution quickly.
+
+### Areas for Improvement
+- **Boundaries:** Line 3 iterates one element too far.
+- **Testing:** No edge cases were walked through.
+
+### Code Review
+The structure is fine but the loop bound is wrong."""
+
+
+def reply_for(system_prompt: str) -> str:
+    """Pick a canned completion from the (report engine / memory / interviewer) system prompt"""
+    if "DEEP CODE AUDIT" in system_prompt:
+        # Fenced like real model output; the report engine has to parse through it
+        return f"```json\n{json.dumps(CODE_AUDIT_REPLY, indent=2)}\n```"
+    if "TRANSCRIPT FORENSICS" in system_prompt:
+        return json.dumps(TRANSCRIPT_AUDIT_REPLY, indent=2)
+    if "# TASK: SCORING" in system_prompt:
+        return json.dumps(SCORES_REPLY, indent=2)
+    if "WRITTEN FEEDBACK" in system_prompt:
+        return NARRATIVE_REPLY
+    if "running notes" in system_prompt:
+        return SUMMARY_REPLY
+    return INTERVIEWER_REPLY
+
+
+def _tokens(text: str):
+    """Whitespace-preserving pseudo-tokens (~4 chars each)"""
+    start = 0
+    for i, ch in enumerate(text):
+        if ch.isspace() and i > start:
+            yield text[start:i]
+            start = i
+    if start < len(text):
+        yield text[start:]
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def tone_pcm(sample_rate: int, seconds: float, freq: float = 220.0) -> bytes:
+    """Deterministic linear16 mono sine tone"""
+    n = int(sample_rate * seconds)
+    return struct.pack(
+        f"<{n}h",
+        *(int(8000 * math.sin(2 * math.pi * freq * i / sample_rate)) for i in range(n)),
+    )
+
+
+class FakeServices:
+    def __init__(
+        self,
+        tts_latency_s: float = 0.15,
+        tts_chunk_bytes: int = 4800,
+        tts_chunk_interval_s: float = 0.01,
+        llm_ttft_s: float = 0.2,
+        llm_tokens_per_s: float = 400.0,
+        backend_latency_s: float = 0.02,
+        tts_stall_rate: float = 0.0,
+        tts_stall_s: float = 5.0,
+        tts_error_rate: float = 0.0,
+        fault_seed: int = 1,
+    ):
+        self.tts_latency_s = tts_latency_s
+        self.tts_chunk_bytes = tts_chunk_bytes
+        self.tts_chunk_interval_s = tts_chunk_interval_s
+        self.llm_ttft_s = llm_ttft_s
+        self.llm_tokens_per_s = llm_tokens_per_s
+        self.backend_latency_s = backend_latency_s
+        # Injected TTS faults (to exercise tts_hedge.py): a share of speak requests hang
+        # before their first byte, another share fails with 503
+        self.tts_stall_rate = tts_stall_rate
+        self.tts_stall_s = tts_stall_s
+        self.tts_error_rate = tts_error_rate
+        self._faults = random.Random(fault_seed)
+
+        self._tones = {}
+        self.saved_reports = {}
+        self.stats = {
+            "speak_requests": 0,
+            "speak_bytes": 0,
+            "speak_stalls": 0,
+            "speak_errors": 0,
+            "chat_requests": 0,
+            "chat_tokens": 0,
+            "save_requests": 0,
+            "partial_requests": 0,
+            "failed_reports": 0,
+        }
+
+    def set_fault_source(self, source):
+        """Decide injected TTS faults with `source.random()` instead of the seeded RNG (tests)"""
+        self._faults = source
+
+    def _tone(self, sample_rate: int) -> bytes:
+        # One second of tone per rate, repeated to the requested duration
+        if sample_rate not in self._tones:
+            self._tones[sample_rate] = tone_pcm(sample_rate, 1.0)
+        return self._tones[sample_rate]
+
+    async def speak(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        text = body.get("text", "")
+        if not request.headers.get("Authorization", "").startswith("Token "):
+            return web.json_response({"err_msg": "missing token"}, status=401)
+        if request.query.get("encoding", "linear16") != "linear16":
+            return web.json_response({"err_msg": "only linear16 is supported"}, status=400)
+
+        sample_rate = int(request.query.get("sample_rate", "24000"))
+        if sample_rate not in LINEAR16_RATES:
+            return web.json_response({"err_msg": f"unsupported sample_rate {sample_rate}"}, status=400)
+        total = int(sample_rate * SPEECH_SECONDS_PER_CHAR * max(1, len(text))) * 2
+        tone = self._tone(sample_rate)
+        self.stats["speak_requests"] += 1
+
+        fault = self._faults.random()
+        if fault < self.tts_error_rate:
+            self.stats["speak_errors"] += 1
+            return web.json_response({"err_msg": "injected failure"}, status=503)
+        if fault < self.tts_error_rate + self.tts_stall_rate:
+            self.stats["speak_stalls"] += 1
+            await asyncio.sleep(self.tts_stall_s)
+
+        self.stats["speak_bytes"] += total
+        await asyncio.sleep(self.tts_latency_s)
+        resp = web.StreamResponse(headers={"Content-Type": "audio/l16"})
+        try:
+            await resp.prepare(request)
+            sent = 0
+            while sent < total:
+                size = min(self.tts_chunk_bytes, total - sent)
+                offset = sent % len(tone)
+                chunk = (tone[offset:] + tone)[:size]
+                await resp.write(chunk)
+                sent += size
+                if self.tts_chunk_interval_s:
+                    await asyncio.sleep(self.tts_chunk_interval_s)
+            await resp.write_eof()
+        except ConnectionResetError:
+            pass  # the client gave up on this request (e.g. a hedge won)
+        return resp
+
+    async def chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        messages = body.get("messages") or []
+        system_prompt = "\n".join(_message_text(m) for m in messages if m.get("role") in ("system", "developer"))
+        text = reply_for(system_prompt)
+        model = body.get("model", "fake-llm")
+        self.stats["chat_requests"] += 1
+
+        await asyncio.sleep(self.llm_ttft_s)
+        if not body.get("stream"):
+            return web.json_response({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            })
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await resp.prepare(request)
+
+        async def send(delta: dict, finish_reason=None, **extra):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            await resp.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        await send({"role": "assistant", "content": ""})
+        interval = 1.0 / self.llm_tokens_per_s if self.llm_tokens_per_s > 0 else 0.0
+        tokens = 0
+        for token in _tokens(text):
+            await send({"content": token})
+            tokens += 1
+            if interval:
+                await asyncio.sleep(interval)
+        await send({}, finish_reason="stop")
+        self.stats["chat_tokens"] += tokens
+
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = {"prompt_tokens": sum(len(_message_text(m)) for m in messages) // 4, "completion_tokens": tokens}
+            usage["total_tokens"] = usage["prompt_tokens"] + tokens
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [], "usage": usage}
+            await resp.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        return resp
+
+    async def save_analysis(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        session_id = body.get("sessionId")
+        if session_id and body.get("failed"):
+            self.stats["failed_reports"] += 1
+            return web.json_response({"success": True})
+        if not session_id or not isinstance(body.get("analysis"), dict):
+            return web.json_response({"error": "sessionId and analysis are required"}, status=400)
+        await asyncio.sleep(self.backend_latency_s)
+        if body.get("partial"):
+            # Like the backend: a partial update never replaces a final report
+            self.stats["partial_requests"] += 1
+            return web.json_response({"success": True})
+        self.stats["save_requests"] += 1
+        self.saved_reports[session_id] = body["analysis"]
+        return web.json_response({"success": True})
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.stats, "saved_sessions": len(self.saved_reports)})
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post("/v1/speak", self.speak)
+        app.router.add_post("/openai/v1/chat/completions", self.chat_completions)
+        app.router.add_post("/api/save-analysis", self.save_analysis)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        """Start serving; returns (runner, bound_port). Port 0 picks a free port."""
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"[FAKE] Serving on http://{host}:{bound_port}")
+        return runner, bound_port
+
+
+def service_env(port: int, host: str = "127.0.0.1") -> dict:
+    """Environment that points the agent's clients at a FakeServices instance"""
+    base = f"http://{host}:{port}"
+    return {
+        "DEEPGRAM_BASE_URL": base,
+        "DEEPGRAM_API_KEY": "fake-deepgram-key",
+        "GROQ_BASE_URL": f"{base}/openai/v1",
+        "GROQ_API_KEY": "fake-groq-key",
+        "BACKEND_URL": base,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--tts-latency-ms", type=float, default=150, help="delay before the first audio byte")
+    parser.add_argument("--tts-chunk-bytes", type=int, default=4800, help="bytes per streamed audio chunk")
+    parser.add_argument("--tts-chunk-interval-ms", type=float, default=10, help="delay between audio chunks")
+    parser.add_argument("--llm-ttft-ms", type=float, default=200, help="delay before the first LLM token")
+    parser.add_argument("--llm-tokens-per-s", type=float, default=400, help="LLM streaming rate")
+    parser.add_argument("--backend-latency-ms", type=float, default=20, help="save-analysis handling delay")
+    parser.add_argument("--tts-stall-rate", type=float, default=0.0, help="share of speak requests that hang before the first byte")
+    parser.add_argument("--tts-stall-ms", type=float, default=5000, help="how long an injected stall lasts")
+    parser.add_argument("--tts-error-rate", type=float, default=0.0, help="share of speak requests that fail with 503")
+
+
+def from_args(args) -> FakeServices:
+    return FakeServices(
+        tts_latency_s=args.tts_latency_ms / 1000,
+        tts_chunk_bytes=args.tts_chunk_bytes,
+        tts_chunk_interval_s=args.tts_chunk_interval_ms / 1000,
+        llm_ttft_s=args.llm_ttft_ms / 1000,
+        llm_tokens_per_s=args.llm_tokens_per_s,
+        backend_latency_s=args.backend_latency_ms / 1000,
+        tts_stall_rate=args.tts_stall_rate,
+        tts_stall_s=args.tts_stall_ms / 1000,
+        tts_error_rate=args.tts_error_rate,
+        fault_seed=getattr(args, "seed", 1),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Deepgram/Groq/backend stand-ins")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080, help="0 picks a free port")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    async def _run():
+        runner, port = await from_args(args).start(args.host, args.port)
+        # Parent processes (loadtest.py) wait for this line to learn the port
+        print(f"READY {port}", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
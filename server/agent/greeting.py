@@ -0,0 +1,134 @@
+"""
+Overlapped greeting
+The candidate hears nothing until the greeting plays, so its latency is the most visible
+one in the interview. Done in order, it is: wait for the problem packet, wait for the
+candidate to subscribe to our audio, then a full TTS round trip. Here the two waits and
+the synthesis overlap:
+
+    - Synthesis starts the moment the problem packet arrives; frames are buffered in
+      memory as Deepgram streams them.
+    - The candidate subscribing to the agent's audio track (LiveKit's
+      `local_track_subscribed`) replaces a fixed stabilization sleep.
+    - Playback starts as soon as both are ready and keeps draining the buffer while the
+      rest of the greeting is still being synthesized.
+
+If the subscription never arrives within GREETING_SUBSCRIBE_TIMEOUT_MS the greeting plays
+anyway, and if synthesis fails before the first frame the session's own TTS speaks it. A
+failure after audio has started can't be taken back: the greeting ends early, and this is
+logged and counted as `truncated`.
+"""
+import asyncio
+import logging
+import os
+import time
+
+import latency_metrics
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class OverlappedGreeting:
+    """
+    Per-session greeting.
+
+    - `synthesize(text)` returns an async iterator of audio frames
+    - `speak(text, frames)` plays the greeting; `frames` is an async iterator or None
+      (None lets the session synthesize it)
+    """
+
+    def __init__(self, synthesize, speak, subscribe_timeout_s: float = 5.0):
+        self.synthesize = synthesize
+        self.speak = speak
+        self.subscribe_timeout_s = subscribe_timeout_s
+
+        self.text = None
+        self._frames = asyncio.Queue()
+        self._task = None
+        self._subscribed = asyncio.Event()
+        # Monotonic timestamps of each step, reported relative to `created`
+        self._at = {"created": time.monotonic()}
+        self.stats = {"waited_for": None, "fallback": False, "failed": False, "truncated": False}
+
+    @classmethod
+    def from_env(cls, synthesize, speak) -> "OverlappedGreeting":
+        return cls(
+            synthesize,
+            speak,
+            subscribe_timeout_s=float(os.environ.get("GREETING_SUBSCRIBE_TIMEOUT_MS", "5000")) / 1000,
+        )
+
+    def prepare(self, text: str):
+        """Start synthesizing `text`. Only the first call counts; safe from sync event handlers."""
+        if self._task is not None:
+            return
+        self.text = text
+        self._at["prepared"] = time.monotonic()
+        self._task = asyncio.create_task(self._synthesize(text))
+
+    def track_subscribed(self):
+        """The candidate subscribed to the agent's audio track"""
+        if not self._subscribed.is_set():
+            self._at["subscribed"] = time.monotonic()
+            self._subscribed.set()
+
+    async def _synthesize(self, text: str):
+        # Prefetched before any turn; its TTS stages would land on whatever turn is open
+        latency_metrics.detach()
+        try:
+            async for frame in self.synthesize(text):
+                if "synthesized" not in self._at:
+                    self._at["synthesized"] = time.monotonic()
+                self._frames.put_nowait(frame)
+        except Exception as e:
+            self.stats["failed"] = True
+            if "synthesized" in self._at:
+                self.stats["truncated"] = True
+                logger.error(f"[GREETING] Synthesis failed mid-greeting, it will end early: {e}")
+            else:
+                logger.error(f"[GREETING] Synthesis failed: {e}")
+        finally:
+            self._frames.put_nowait(_END)
+
+    async def play(self, text: str):
+        """Play the prepared greeting (or `text`, if nothing was prepared) once it can be heard"""
+        self.prepare(text)
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), timeout=self.subscribe_timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"[GREETING] No subscriber to our audio after {self.subscribe_timeout_s:.1f}s, playing anyway"
+            )
+            self.stats["waited_for"] = "subscribe_timeout"
+
+        first = await self._frames.get()
+        self._at["started"] = time.monotonic()
+        if self.stats["waited_for"] is None:
+            # Whichever finished last is what the candidate waited on
+            synthesized = self._at.get("synthesized", self._at["started"])
+            self.stats["waited_for"] = "subscription" if self._at["subscribed"] > synthesized else "synthesis"
+        logger.info(f"[GREETING] Playing after {self._at['started'] - self._at['created']:.2f}s: {self.text}")
+
+        if first is _END:
+            self.stats["fallback"] = True
+            await self.speak(self.text, None)
+        else:
+            await self.speak(self.text, self._drain(first))
+
+    async def _drain(self, first):
+        yield first
+        while (frame := await self._frames.get()) is not _END:
+            yield frame
+
+    async def aclose(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        created = self._at["created"]
+        return {
+            **self.stats,
+            **{f"{step}_s": round(at - created, 3) for step, at in self._at.items() if step != "created"},
+        }
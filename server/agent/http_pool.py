@@ -0,0 +1,143 @@
+"""
+Process-wide pooled HTTP client
+One keep-alive aiohttp session per worker process, shared by TTS synthesis
+and report submission so each request skips the TCP/TLS handshake and DNS lookup
+"""
+import aiohttp
+import asyncio
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HttpPool:
+    """
+    Lifecycle-managed aiohttp session with connection reuse counters.
+    The session itself is created lazily on the running event loop, so the pool
+    can be configured from the (synchronous) prewarm hook.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 60.0,
+        dns_cache_ttl: int = 300,
+        connect_timeout: float = 5.0,
+        total_timeout: float = 30.0,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connect_timeout = connect_timeout
+        self.total_timeout = total_timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "HttpPool":
+        return cls(
+            limit=int(os.environ.get("HTTP_POOL_LIMIT", "100")),
+            limit_per_host=int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", "20")),
+            keepalive_timeout=float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", "60")),
+            dns_cache_ttl=int(os.environ.get("HTTP_DNS_CACHE_TTL", "300")),
+            connect_timeout=float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5")),
+            total_timeout=float(os.environ.get("HTTP_TOTAL_TIMEOUT", "30")),
+        )
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.stats["requests"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.stats["connections_reused"] += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self.stats["dns_cache_hits"] += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            self.stats["dns_cache_misses"] += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+
+    def session(self) -> aiohttp.ClientSession:
+        """Return the shared session, (re)creating it on the running loop if needed"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=self.total_timeout,
+                    sock_connect=self.connect_timeout,
+                ),
+                trace_configs=[self._trace_config()],
+            )
+            logger.info(
+                f"[HTTP] Pool created (limit={self.limit}, per_host={self.limit_per_host}, "
+                f"keepalive={self.keepalive_timeout}s)"
+            )
+        return self._session
+
+    def reuse_ratio(self) -> float:
+        total = self.stats["connections_created"] + self.stats["connections_reused"]
+        return self.stats["connections_reused"] / total if total else 0.0
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            # Give the SSL transports a moment to shut down cleanly
+            await asyncio.sleep(0.25)
+            logger.info(f"[HTTP] Pool closed. Stats: {self.stats} (reuse ratio {self.reuse_ratio():.0%})")
+        self._session = None
+
+
+_pool: Optional[HttpPool] = None
+
+
+def init_pool() -> HttpPool:
+    """Configure the process-wide pool (call from prewarm)"""
+    global _pool
+    if _pool is None:
+        _pool = HttpPool.from_env()
+    return _pool
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Shared session for the current worker process"""
+    return init_pool().session()
+
+
+def get_stats() -> dict:
+    pool = init_pool()
+    return {**pool.stats, "reuse_ratio": pool.reuse_ratio()}
+
+
+async def close_pool():
+    if _pool is not None:
+        await _pool.close()
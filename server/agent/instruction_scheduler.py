@@ -0,0 +1,120 @@
+"""
+Coalesced instruction updates
+Code packets arrive at keystroke rate; rebuilding and pushing the system prompt for
+each one floods the event loop that is also driving audio. This scheduler debounces
+bursts, caps the update rate, skips no-op updates and cancels superseded ones.
+"""
+import asyncio
+import hashlib
+import inspect
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class InstructionScheduler:
+    """
+    Per-session scheduler for `agent.update_instructions`.
+
+    - `state_fn()` returns the inputs the prompt depends on (title, description, code...)
+    - `build_fn()` renders the instructions from the current state (may be async, e.g.
+      to await off-loop analysis; a superseded update cancels it)
+    - `apply_fn(instructions)` pushes them to the agent
+    """
+
+    def __init__(self, apply_fn, build_fn, state_fn, max_updates_per_sec: float = 2.0, debounce_s: float = 0.25):
+        self.apply_fn = apply_fn
+        self.build_fn = build_fn
+        self.state_fn = state_fn
+        self.min_interval = 1.0 / max_updates_per_sec if max_updates_per_sec > 0 else 0.0
+        self.debounce_s = debounce_s
+
+        self._timer = None
+        self._inflight = None
+        self._applied_key = None
+        self._last_applied_at = float("-inf")
+        self.stats = {
+            "requested": 0,
+            "coalesced": 0,
+            "skipped_unchanged": 0,
+            "cancelled": 0,
+            "applied": 0,
+            "failed": 0,
+        }
+
+    @classmethod
+    def from_env(cls, apply_fn, build_fn, state_fn) -> "InstructionScheduler":
+        return cls(
+            apply_fn,
+            build_fn,
+            state_fn,
+            max_updates_per_sec=float(os.environ.get("INSTRUCTION_UPDATES_PER_SEC", "2")),
+            debounce_s=float(os.environ.get("INSTRUCTION_DEBOUNCE_MS", "250")) / 1000,
+        )
+
+    def _state_key(self) -> str:
+        digest = hashlib.sha1()
+        for part in self.state_fn():
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def request(self):
+        """Note that the state changed. Safe to call from sync event handlers on the loop."""
+        self.stats["requested"] += 1
+
+        if self._timer is not None:
+            self.stats["coalesced"] += 1
+            return
+
+        if self._state_key() == self._applied_key:
+            self.stats["skipped_unchanged"] += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        delay = max(self.debounce_s, self._last_applied_at + self.min_interval - loop.time())
+        self._timer = loop.call_later(delay, self._fire)
+
+    def _fire(self):
+        self._timer = None
+
+        key = self._state_key()
+        if key == self._applied_key:
+            self.stats["skipped_unchanged"] += 1
+            return
+
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
+            self.stats["cancelled"] += 1
+
+        self._applied_key = key
+        self._last_applied_at = asyncio.get_running_loop().time()
+        self._inflight = asyncio.create_task(self._apply(key))
+
+    async def _apply(self, key: str):
+        try:
+            instructions = self.build_fn()
+            if inspect.isawaitable(instructions):
+                instructions = await instructions
+            await self.apply_fn(instructions)
+            self.stats["applied"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            # Let the next request retry this state
+            if self._applied_key == key:
+                self._applied_key = None
+            logger.error(f"[SCHEDULER] Instruction update failed: {e}")
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
+
+    def get_stats(self) -> dict:
+        dropped = self.stats["coalesced"] + self.stats["skipped_unchanged"] + self.stats["cancelled"]
+        return {**self.stats, "dropped": dropped}
@@ -0,0 +1,160 @@
+"""
+Incremental JSON parsing of streamed LLM output
+Report sections arrive token by token as one JSON object, often wrapped in ``` fences or
+a sentence of chatter. The parser scans each new chunk once (a small state machine over
+strings, escapes and bracket depth) and reports members of the top-level object, and
+elements of its top-level arrays, the moment they close, so they can be published
+before the rest of the response has been generated.
+"""
+import json
+
+_OPEN = "{["
+_CLOSE = "}]"
+_INVALID = object()
+
+
+def _decode(text: str):
+    """A closed value, or _INVALID for malformed output (skipped; `result()` will fail)"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return _INVALID
+
+
+class IncrementalJSONParser:
+    """
+    `feed(text)` returns the events completed by the new text:
+
+      ("item", key, index, value)   an element of the top-level array `key` closed
+      ("field", key, value)         the top-level member `key` closed (arrays included)
+
+    `result()` returns the whole object once the root has closed.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._root_start = None
+        self._root_end = None
+        self._stack = []  # open containers: "{" or "["
+        self._in_string = False
+        self._escape = False
+        # Top-level member being read: where its `"key"` starts, its decoded key and value
+        # offset once `:` is seen
+        self._member_start = None
+        self._member_key = None
+        self._value_start = None
+        self._member_has_value = False
+        # Element of a top-level array being read
+        self._item_start = None
+        self._item_index = 0
+
+    @property
+    def done(self) -> bool:
+        return self._root_end is not None
+
+    def feed(self, chunk: str) -> list:
+        if self.done or not chunk:
+            return []
+        self._text += chunk
+        events = []
+        text = self._text
+        pos = self._pos
+        end = len(text)
+        while pos < end:
+            ch = text[pos]
+
+            if self._root_start is None:
+                if ch == "{":
+                    self._root_start = pos
+                    self._stack.append("{")
+                pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                pos += 1
+                continue
+
+            depth = len(self._stack)
+            if ch == '"':
+                self._in_string = True
+                self._value_starts(pos, depth)
+            elif ch in _OPEN:
+                self._value_starts(pos, depth)
+                self._stack.append(ch)
+            elif ch in _CLOSE:
+                self._end_scalar(pos, depth, events)
+                self._stack.pop()
+                depth = len(self._stack)
+                if depth == 0:
+                    self._root_end = pos + 1
+                    self._pos = pos + 1
+                    return events
+                self._container_closed(pos, depth, events)
+            elif ch == ",":
+                self._end_scalar(pos, depth, events)
+            elif ch == ":" and depth == 1 and self._member_start is not None and self._member_key is None:
+                self._member_key = _decode(text[self._member_start:pos].strip())
+                self._value_start = pos + 1
+            elif not ch.isspace():
+                # Number / true / false / null
+                self._value_starts(pos, depth)
+            pos += 1
+        self._pos = pos
+        return events
+
+    # --- bookkeeping -------------------------------------------------------
+
+    def _value_starts(self, pos: int, depth: int):
+        if depth == 1:
+            if self._member_start is None:
+                self._member_start = pos  # the key string
+            elif self._member_key is not None:
+                self._member_has_value = True
+        elif depth == 2 and self._stack[1] == "[" and self._item_start is None:
+            self._item_start = pos
+
+    def _emit_member(self, end: int, events: list):
+        if self._member_key not in (None, _INVALID) and self._member_has_value:
+            value = _decode(self._text[self._value_start:end])
+            if value is not _INVALID:
+                events.append(("field", self._member_key, value))
+        self._member_start = None
+        self._member_key = None
+        self._member_has_value = False
+        self._item_index = 0
+
+    def _emit_item(self, end: int, events: list):
+        if self._item_start is not None:
+            value = _decode(self._text[self._item_start:end])
+            if value is not _INVALID:
+                events.append(("item", self._member_key, self._item_index, value))
+            self._item_index += 1
+        self._item_start = None
+
+    def _end_scalar(self, pos: int, depth: int, events: list):
+        """`,` or a closing bracket at `depth` ends a scalar value there"""
+        if depth == 1 and self._member_start is not None and self._member_key is not None:
+            self._emit_member(pos, events)
+        elif depth == 2 and self._stack[1] == "[":
+            self._emit_item(pos, events)
+
+    def _container_closed(self, pos: int, depth: int, events: list):
+        """A container closed at `pos`; `depth` is the depth it was a value at"""
+        if depth == 1:
+            self._emit_member(pos + 1, events)
+        elif depth == 2 and self._stack[1] == "[":
+            self._emit_item(pos + 1, events)
+
+    def result(self) -> dict:
+        if self._root_start is None:
+            raise ValueError("no JSON object in response")
+        if self._root_end is None:
+            raise ValueError("JSON object in response is incomplete")
+        return json.loads(self._text[self._root_start:self._root_end])
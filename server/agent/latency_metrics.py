@@ -0,0 +1,376 @@
+"""
+Per-turn voice pipeline latency tracing
+Each conversational turn records timestamps for the pipeline stages below, from the
+moment the user starts speaking. Finished turns are appended to a JSONL file shared by all
+job processes and folded into per-session and per-worker histograms.
+
+Job processes also append their sessions' event-loop lag histograms (see loop_health.py).
+
+A Prometheus-style text endpoint aggregates the JSONL across processes:
+    python latency_metrics.py --port 9464          # serve /metrics
+    python latency_metrics.py --summary            # print p50/p95/p99 per stage
+"""
+import argparse
+import bisect
+import contextvars
+import json
+import logging
+import os
+import time
+from collections import deque
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+STAGES = [
+    "vad_end",
+    "stt_final",
+    "llm_first_token",
+    "llm_last_token",
+    "tts_request_start",
+    "tts_first_byte",
+    "tts_last_byte",
+    "first_audio_frame",
+]
+
+# Derived per-stage durations (seconds): name -> (from_stage, to_stage)
+# `end_of_turn` is whichever of vad_end / stt_final came last: Deepgram's final transcript
+# often lands before Silero's end of speech, and the LLM can't start before both.
+SPANS = {
+    "stt": ("vad_end", "end_of_turn"),
+    "llm_ttft": ("end_of_turn", "llm_first_token"),
+    "llm_total": ("end_of_turn", "llm_last_token"),
+    "tts_ttfb": ("tts_request_start", "tts_first_byte"),
+    "tts_total": ("tts_request_start", "tts_last_byte"),
+    "publish": ("tts_first_byte", "first_audio_frame"),
+    "turn": ("vad_end", "first_audio_frame"),
+}
+
+BUCKETS_S = [0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0]
+# Event-loop scheduling lag (see loop_health.py)
+LAG_BUCKETS_S = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+DEFAULT_JSONL_PATH = Path(__file__).parent / ".metrics" / "latency.jsonl"
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram plus a bounded reservoir for percentiles"""
+
+    def __init__(self, buckets=BUCKETS_S, reservoir: int = 4096):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._samples = deque(maxlen=reservoir)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self._samples.append(value)
+
+    def percentile(self, p: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "p99": round(self.percentile(99), 4),
+        }
+
+    def export(self) -> dict:
+        """Bucket counts for merging in another process (percentiles don't survive this)"""
+        return {"buckets": self.buckets, "counts": self.counts, "sum": round(self.sum, 6), "count": self.count}
+
+    def merge(self, exported: dict):
+        if exported.get("buckets") != self.buckets:
+            raise ValueError("histogram buckets differ")
+        self.counts = [a + b for a, b in zip(self.counts, exported["counts"])]
+        self.sum += exported["sum"]
+        self.count += exported["count"]
+
+    def prometheus_lines(self, metric: str, labels: str = "") -> list:
+        sep = "," if labels else ""
+        tail = f"{{{labels}}}" if labels else ""
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        lines.append(f"{metric}_sum{tail} {self.sum:.6f}")
+        lines.append(f"{metric}_count{tail} {self.count}")
+        return lines
+
+
+class LatencyRegistry:
+    """Histograms keyed by span name"""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def observe(self, spans: dict):
+        for name, value in spans.items():
+            self.histograms.setdefault(name, LatencyHistogram()).observe(value)
+
+    def summary(self) -> dict:
+        return {name: hist.summary() for name, hist in sorted(self.histograms.items())}
+
+    def to_prometheus(self, metric: str = "socratis_turn_latency_seconds") -> str:
+        lines = [
+            f"# HELP {metric} Voice pipeline latency per turn, by stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, hist in sorted(self.histograms.items()):
+            lines.extend(hist.prometheus_lines(metric, f'stage="{name}"'))
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide (per worker process) histograms
+WORKER_REGISTRY = LatencyRegistry()
+
+
+def spans_for(stages: dict) -> dict:
+    ends = [stages[stage] for stage in ("vad_end", "stt_final") if stage in stages]
+    if ends:
+        stages = {**stages, "end_of_turn": max(ends)}
+    spans = {}
+    for name, (start, end) in SPANS.items():
+        if start in stages and end in stages and stages[end] >= stages[start]:
+            spans[name] = stages[end] - stages[start]
+    return spans
+
+
+class TurnTracer:
+    """
+    Per-session tracer. A user turn starts when the user starts speaking
+    (`start_user_turn`); `vad_end` and `stt_final` may then arrive in either order,
+    and a transcript finalized mid-utterance is superseded by the last one. Stages
+    marked with no turn open (e.g. the greeting) open an agent-initiated turn.
+
+    A turn is closed when the next one starts, when the agent stops speaking (unless
+    the user is still mid-utterance, i.e. they barged in), or when the session ends.
+    """
+
+    def __init__(self, session_id: str, jsonl_path=None):
+        self.session_id = session_id
+        self.jsonl_path = Path(jsonl_path) if jsonl_path else None
+        self.registry = LatencyRegistry()
+        self.turns = 0
+        self._current = None
+
+    @classmethod
+    def from_env(cls, session_id: str) -> "TurnTracer":
+        path = os.environ.get("LATENCY_JSONL", str(DEFAULT_JSONL_PATH))
+        return cls(session_id, jsonl_path=path or None)
+
+    def _open_turn(self, origin: str):
+        self.end_turn()
+        self.turns += 1
+        self._current = {"turn": self.turns, "origin": origin, "t0": time.perf_counter(), "wall": time.time(), "stages": {}}
+
+    def start_user_turn(self):
+        self._open_turn("user")
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        if self._current is None:
+            # End of speech with no start seen: the turn's stages still count
+            self._open_turn("user" if stage in ("vad_end", "stt_final") else "agent")
+
+        stages = self._current["stages"]
+        # First occurrence wins, except "last" markers which track the latest event
+        if stage not in stages or stage in ("stt_final", "llm_last_token", "tts_last_byte"):
+            stages[stage] = now - self._current["t0"]
+
+    def agent_stopped(self):
+        """The agent stopped speaking: its turn is over, unless the user is talking over it"""
+        turn = self._current
+        if turn is not None and turn["origin"] == "user" and "vad_end" not in turn["stages"]:
+            return
+        self.end_turn()
+
+    def end_turn(self):
+        turn, self._current = self._current, None
+        if turn is None or not turn["stages"]:
+            return
+
+        stages = {name: round(value, 4) for name, value in turn["stages"].items()}
+        spans = spans_for(turn["stages"])
+        self.registry.observe(spans)
+        WORKER_REGISTRY.observe(spans)
+
+        record = {
+            "session": self.session_id,
+            "pid": os.getpid(),
+            "turn": turn["turn"],
+            "origin": turn["origin"],
+            "ts": turn["wall"],
+            "stages": stages,
+            "spans": {name: round(value, 4) for name, value in spans.items()},
+        }
+        self._append(record)
+
+        if "turn" in spans:
+            logger.info(f"[LATENCY] Turn {turn['turn']}: {spans['turn'] * 1000:.0f} ms to first audio {record['spans']}")
+
+    def _append(self, record: dict):
+        if not self.jsonl_path:
+            return
+        try:
+            self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+            # One short O_APPEND write per record; safe across job processes
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.warning(f"[LATENCY] Could not write {self.jsonl_path}: {e}")
+
+    def record_loop_lag(self, session_lag):
+        """Append the session's event-loop lag histogram (a loop_health.SessionLag)"""
+        worst = session_lag.worst
+        self._append({
+            "session": self.session_id,
+            "pid": os.getpid(),
+            "ts": time.time(),
+            "loop_lag": session_lag.lag.export(),
+            "stalls": session_lag.stalls,
+            "worst_stall": {"duration_ms": round(worst.duration_s * 1000, 1), "where": worst.where} if worst else None,
+        })
+        logger.info(
+            f"[LATENCY] Session {self.session_id} loop lag: {session_lag.lag.summary()}, "
+            f"{session_lag.stalls} stall(s)" + (f", worst {worst.duration_s * 1000:.0f} ms at {worst.where}" if worst else "")
+        )
+
+    def close(self) -> dict:
+        self.end_turn()
+        summary = self.registry.summary()
+        logger.info(f"[LATENCY] Session {self.session_id} summary: {summary}")
+        return summary
+
+
+# The tracer for the session running in the current task tree (set in entrypoint)
+current_tracer = contextvars.ContextVar("current_tracer", default=None)
+
+
+def mark(stage: str):
+    """Record a stage for the current session's turn; a no-op outside a traced session"""
+    tracer = current_tracer.get()
+    if tracer is not None:
+        tracer.mark(stage)
+
+
+def detach():
+    """
+    Stop recording stages from the current task. Background synthesis (speculative pause
+    comments, the greeting prefetch) calls this first: its task runs in a copy of the
+    session's context, so the turns the candidate hears keep their tracer.
+    """
+    current_tracer.set(None)
+
+
+# ----------------------------------------------------------------------------
+# Cross-process aggregation and export
+# ----------------------------------------------------------------------------
+
+class JsonlAggregator:
+    """Incrementally tails the shared JSONL file into a registry"""
+
+    def __init__(self, path=DEFAULT_JSONL_PATH):
+        self.path = Path(path)
+        self.registry = LatencyRegistry()
+        # Per-session loop-lag records folded together (bucket counts only)
+        self.loop_lag = LatencyHistogram(buckets=LAG_BUCKETS_S)
+        self.loop_stalls = 0
+        self._offset = 0
+
+    def refresh(self) -> LatencyRegistry:
+        if not self.path.exists():
+            return self.registry
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        # Only consume complete lines; a partial last line is picked up next time
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+                if "loop_lag" in record:
+                    self.loop_lag.merge(record["loop_lag"])
+                    self.loop_stalls += record.get("stalls", 0)
+                else:
+                    self.registry.observe(record["spans"])
+            except (ValueError, KeyError, TypeError):
+                continue
+        return self.registry
+
+    def loop_lag_prometheus(self) -> str:
+        metric = "socratis_loop_lag_seconds"
+        lines = [
+            f"# HELP {metric} Event-loop scheduling lag in job processes, over all sessions.",
+            f"# TYPE {metric} histogram",
+            *self.loop_lag.prometheus_lines(metric),
+            "# HELP socratis_loop_stalls_total Event-loop stalls over LOOP_BLOCK_THRESHOLD_MS.",
+            "# TYPE socratis_loop_stalls_total counter",
+            f"socratis_loop_stalls_total {self.loop_stalls}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+async def serve_metrics(port: int, path=DEFAULT_JSONL_PATH, host: str = "127.0.0.1"):
+    from aiohttp import web
+
+    aggregator = JsonlAggregator(path)
+
+    async def metrics(request):
+        body = aggregator.refresh().to_prometheus() + aggregator.loop_lag_prometheus()
+        return web.Response(text=body, content_type="text/plain", charset="utf-8")
+
+    async def summary(request):
+        return web.json_response(aggregator.refresh().summary())
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/summary", summary)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"[LATENCY] Serving metrics on http://{host}:{port}/metrics")
+    return runner
+
+
+def main():
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Socratis voice latency metrics")
+    parser.add_argument("--jsonl", default=os.environ.get("LATENCY_JSONL", str(DEFAULT_JSONL_PATH)))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("METRICS_PORT", "9464")))
+    parser.add_argument("--summary", action="store_true", help="print percentiles and exit")
+    args = parser.parse_args()
+
+    if args.summary:
+        summary = JsonlAggregator(args.jsonl).refresh().summary()
+        print(f"{'stage':<12} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name, s in summary.items():
+            print(f"{name:<12} {s['count']:>7} {s['p50'] * 1000:>9.0f} {s['p95'] * 1000:>9.0f} {s['p99'] * 1000:>9.0f}")
+        return
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def _run():
+        await serve_metrics(args.port, args.jsonl)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
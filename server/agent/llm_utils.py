@@ -0,0 +1,38 @@
+"""
+Small helpers for one-shot LLM calls outside the voice pipeline
+(summaries, report sections)
+"""
+import os
+
+from livekit.agents import ChatContext
+
+
+async def stream_text(llm, system_prompt: str, user_content: str):
+    """Run a single system+user exchange, yielding text deltas as they arrive"""
+    chat_ctx = ChatContext()
+    chat_ctx.add_message(role="system", content=system_prompt)
+    chat_ctx.add_message(role="user", content=user_content)
+
+    async with llm.chat(chat_ctx=chat_ctx) as stream:
+        async for chunk in stream:
+            if chunk.delta and chunk.delta.content:
+                yield chunk.delta.content
+
+
+async def complete(llm, system_prompt: str, user_content: str) -> str:
+    """Run a single system+user exchange and return the full text response"""
+    parts = []
+    async for delta in stream_text(llm, system_prompt, user_content):
+        parts.append(delta)
+    return "".join(parts)
+
+
+def groq_llm():
+    """The Groq-hosted Llama model used for interviewing and reporting"""
+    from livekit.plugins import openai
+
+    return openai.LLM(
+        base_url=os.environ.get("GROQ_BASE_URL", "https://api.groq.com/openai/v1"),
+        api_key=os.environ.get("GROQ_API_KEY"),
+        model=os.environ.get("GROQ_MODEL", "llama-3.3-70b-versatile"),
+    )
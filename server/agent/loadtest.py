@@ -0,0 +1,522 @@
+"""
+Offline load test
+Drives N concurrent simulated interview sessions through the agent's real code paths
+against local stand-ins (fake_services.py) for Deepgram, Groq and the backend:
+  - problem/code packets through the on_data_received logic and the instruction scheduler
+  - interviewer turns: LLM reply (llm_utils) + patched Deepgram `synthesize`
+  - the per-session transcript log, and the post-interview report streamed from it
+    (generate_assessment_report -> /api/save-analysis)
+
+Reports throughput, latency percentiles, memory per session and event-loop lag.
+Needs no network access, so it can run in CI:
+
+    python loadtest.py --sessions 20 --turns 4 --json loadtest.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+
+import fake_services
+import loop_health
+from data_protocol import Code, Problem, encode_packet, make_delta
+from latency_metrics import LatencyRegistry
+
+HERE = Path(__file__).parent
+
+
+SOLUTION_LINES = [
+    "function twoSum(nums, target) {",
+    "  const seen = new Map();",
+    "  for (let i = 0; i < nums.length; i++) {",
+    "    const need = target - nums[i];",
+    "    if (seen.has(need)) {",
+    "      return [seen.get(need), i];",
+    "    }",
+    "    seen.set(nums[i], i);",
+    "  }",
+    "  return [];",
+    "}",
+]
+
+CANDIDATE_LINES = [
+    "I think I'll use a hash map from value to index so lookups are constant time.",
+    "So for each number I check whether the complement is already in the map.",
+    "If the same value appears twice we only store the first index, that should be fine.",
+    "It's O(n) time and O(n) space, one pass.",
+    "An empty array just falls through and returns an empty result.",
+]
+
+
+def rss_bytes() -> int:
+    """Current resident set size (falls back to the peak where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class LoopMonitor:
+    """Event-loop health as the agent sees it (lag, stalls with stacks; loop_health.py) and peak RSS"""
+
+    def __init__(self, interval_s: float = 0.02):
+        self.interval_s = interval_s
+        self.health = None
+        self.peak_rss = 0
+        self._task = None
+
+    def start(self):
+        self.health = loop_health.get_monitor()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_s)
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        await self.health.stop()
+
+
+def mic_audio(sample_rate: int = 16000, seconds: float = 4.0, seed: int = 1) -> bytes:
+    """Deterministic noise bursts standing in for microphone input (linear16 mono)"""
+    rng = random.Random(seed)
+    samples = []
+    for i in range(int(sample_rate * seconds)):
+        # ~1 s of "speech" then ~1 s of near-silence
+        loud = (i // sample_rate) % 2 == 0
+        samples.append(int(rng.gauss(0, 6000 if loud else 60)))
+    return array("h", [max(-32768, min(32767, v)) for v in samples]).tobytes()
+
+
+class LoadTest:
+    def __init__(self, agent, args, vad=None):
+        self.agent = agent
+        self.args = args
+        self.vad = vad
+        # Same sentence pipeline the agent's tts_node uses (None with --no-tts-pipeline)
+        self.tts_pipeline = agent.make_tts_pipeline()
+        self._mic = mic_audio(seed=args.seed) if vad is not None else b""
+        self.registry = LatencyRegistry()
+        self.counters = {
+            "sessions_ok": 0,
+            "sessions_failed": 0,
+            "packets": 0,
+            "packet_bytes": 0,
+            "turns": 0,
+            "audio_seconds": 0.0,
+            "reports": 0,
+            "vad_inference_s": 0.0,
+        }
+        self.scheduler_stats = {}
+        self.analysis_stats = {}
+        self.transcript_stats = {}
+        self.session_lag = {}
+        self.errors = []
+
+    def record_vad(self, metrics):
+        self.counters["vad_inference_s"] += metrics.inference_duration_total
+
+    async def feed_vad(self, index: int):
+        """Push 20 ms microphone frames through a VAD stream in real time, like a live participant"""
+        from livekit import rtc
+
+        # Silero runs at 16 kHz; feeding that rate keeps resampling out of the measurement
+        sample_rate = 16000
+        frame_bytes = sample_rate // 50 * 2
+        offset = (index * 7919 * 2) % (len(self._mic) - frame_bytes)
+        offset -= offset % 2
+        stream = self.vad.stream()
+
+        async def drain():
+            async for _ in stream:
+                pass
+
+        drainer = asyncio.create_task(drain())
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        try:
+            while True:
+                if offset + frame_bytes > len(self._mic):
+                    offset = 0
+                data = self._mic[offset:offset + frame_bytes]
+                offset += frame_bytes
+                stream.push_frame(rtc.AudioFrame(data, sample_rate, 1, frame_bytes // 2))
+                next_at += 0.02
+                await asyncio.sleep(max(0.0, next_at - loop.time()))
+        finally:
+            stream.end_input()
+            await stream.aclose()
+            drainer.cancel()
+
+    async def run_session(self, index: int, llm, tts):
+        from livekit.agents import ChatContext
+        import llm_utils
+
+        agent = self.agent
+        args = self.args
+        rng = random.Random(args.seed * 1000 + index)
+        session_id = f"loadtest-{args.seed}-{index}"
+
+        await asyncio.sleep(index * args.ramp_s / max(1, args.sessions))
+        loop_monitor = loop_health.get_monitor()
+        loop_monitor.track(session_id)
+
+        state = agent.new_interview_state()
+        live_instructions = {"text": agent.build_interview_instructions()}
+
+        async def apply_instructions(text: str):
+            live_instructions["text"] = text
+
+        analyzer = agent.CodeAnalyzer.from_env()
+        scheduler = agent.make_instruction_scheduler(state, apply_instructions, analyzer)
+        chat_ctx = ChatContext()
+        transcript_log = agent.TranscriptLog.from_env(session_id)
+        code_lines = []
+        sent = {"code": None, "seq": 0}
+
+        def send_code():
+            # What the frontend sends: a snapshot first, then single-splice deltas
+            content = "\n".join(code_lines)
+            sent["seq"] += 1
+            if sent["code"] is None:
+                packet = Code(content=content, seq=sent["seq"], v=1)
+            else:
+                packet = make_delta(sent["code"], content, sent["seq"])
+            sent["code"] = content
+            on_packet(packet)
+
+        def on_packet(packet):
+            # Same work as on_data_received, minus the LiveKit room plumbing
+            data = encode_packet(packet)
+            self.counters["packet_bytes"] += len(data)
+            started = time.perf_counter()
+            packet = agent.apply_data_packet(state, data)
+            if agent.has_problem_context(state):
+                scheduler.request()
+            if isinstance(packet, Problem):
+                transcript_log.problem(state["problem_title"], state["problem_desc"])
+            else:
+                transcript_log.code(state["latest_code"])
+            self.registry.observe({"packet": time.perf_counter() - started})
+            self.counters["packets"] += 1
+
+        vad_task = asyncio.create_task(self.feed_vad(index)) if self.vad is not None else None
+        try:
+            on_packet(Problem(
+                title="Two Sum",
+                description="Return the indices of the two numbers that add up to target.",
+                v=1,
+            ))
+
+            for turn in range(args.turns):
+                # The candidate types for a while...
+                for _ in range(args.packets_per_turn):
+                    if len(code_lines) < len(SOLUTION_LINES) and rng.random() < 0.3:
+                        code_lines.append(SOLUTION_LINES[len(code_lines)])
+                    elif rng.random() < 0.1:
+                        code_lines.append(f"  // note {rng.randint(0, 99)}")
+                    send_code()
+                    await asyncio.sleep(args.packet_interval_ms / 1000 * rng.uniform(0.5, 1.5))
+
+                # ...then speaks, and the interviewer replies
+                utterance = CANDIDATE_LINES[turn % len(CANDIDATE_LINES)]
+                chat_ctx.add_message(role="user", content=utterance)
+                transcript_log.turn("user", utterance)
+
+                turn_started = time.perf_counter()
+                first_frame_at = None
+                audio_seconds = 0.0
+                if self.tts_pipeline is not None:
+                    # As in the agent: LLM deltas stream into the sentence pipeline
+                    parts = []
+                    llm_done = None
+
+                    async def reply_text():
+                        nonlocal llm_done
+                        async for delta in llm_utils.stream_text(llm, live_instructions["text"], utterance):
+                            parts.append(delta)
+                            yield delta
+                        llm_done = time.perf_counter()
+
+                    async for frame in self.tts_pipeline.frames(reply_text()):
+                        if first_frame_at is None:
+                            first_frame_at = time.perf_counter()
+                        audio_seconds += frame.duration
+                    reply = "".join(parts)
+                else:
+                    reply = await llm_utils.complete(llm, live_instructions["text"], utterance)
+                    llm_done = time.perf_counter()
+
+                    stream = tts.synthesize(reply)
+                    try:
+                        async for audio in stream:
+                            if first_frame_at is None:
+                                first_frame_at = time.perf_counter()
+                            audio_seconds += audio.frame.duration
+                    finally:
+                        await stream.aclose()
+                tts_done = time.perf_counter()
+
+                chat_ctx.add_message(role="assistant", content=reply)
+                transcript_log.turn("assistant", reply)
+                spans = {
+                    "llm_total": llm_done - turn_started,
+                    "tts_total": tts_done - llm_done,
+                    "turn_first_audio": (first_frame_at or tts_done) - turn_started,
+                }
+                if self.tts_pipeline is None:
+                    # Pipelined audio starts before the LLM finishes, so this span only applies here
+                    spans["tts_first_frame"] = (first_frame_at or tts_done) - llm_done
+                self.registry.observe(spans)
+                self.counters["turns"] += 1
+                self.counters["audio_seconds"] += audio_seconds
+                await asyncio.sleep(args.think_ms / 1000 * rng.uniform(0.5, 1.5))
+
+            if vad_task is not None:
+                vad_task.cancel()
+            scheduler.close()
+            for key, value in scheduler.get_stats().items():
+                if isinstance(value, (int, float)):
+                    self.scheduler_stats[key] = self.scheduler_stats.get(key, 0) + value
+            for key, value in analyzer.get_stats().items():
+                if key == "max_ms":
+                    self.analysis_stats[key] = max(self.analysis_stats.get(key, 0.0), value)
+                else:
+                    self.analysis_stats[key] = round(self.analysis_stats.get(key, 0) + value, 1)
+
+            transcript_log.close()
+            for key, value in transcript_log.stats.items():
+                self.transcript_stats[key] = self.transcript_stats.get(key, 0) + value
+
+            report_started = time.perf_counter()
+            await agent.generate_assessment_report(
+                llm, session_id, state["problem_title"], state["latest_code"], chat_ctx, transcript_log.path
+            )
+            self.registry.observe({"report": time.perf_counter() - report_started})
+            self.counters["reports"] += 1
+            self.counters["sessions_ok"] += 1
+        except Exception as e:
+            if vad_task is not None:
+                vad_task.cancel()
+            scheduler.close()
+            transcript_log.close("failed")
+            self.counters["sessions_failed"] += 1
+            self.errors.append(f"{session_id}: {type(e).__name__}: {e}")
+        finally:
+            session_lag = loop_monitor.untrack(session_id)
+            self.session_lag[session_id] = {**session_lag.lag.summary(), "stalls": session_lag.stalls}
+
+
+def start_fake_services(args):
+    """Run the stand-ins in their own process so they don't skew our loop lag or RSS"""
+    cmd = [
+        sys.executable, str(HERE / "fake_services.py"), "--port", "0",
+        "--tts-latency-ms", str(args.tts_latency_ms),
+        "--tts-chunk-bytes", str(args.tts_chunk_bytes),
+        "--tts-chunk-interval-ms", str(args.tts_chunk_interval_ms),
+        "--llm-ttft-ms", str(args.llm_ttft_ms),
+        "--llm-tokens-per-s", str(args.llm_tokens_per_s),
+        "--backend-latency-ms", str(args.backend_latency_ms),
+        "--tts-stall-rate", str(args.tts_stall_rate),
+        "--tts-stall-ms", str(args.tts_stall_ms),
+        "--tts-error-rate", str(args.tts_error_rate),
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("READY "):
+        proc.kill()
+        raise RuntimeError(f"fake services failed to start: {line!r}")
+    return proc, int(line.split()[1])
+
+
+def configure_env(port: int, tts_cache: bool = False, tts_pipeline: bool = True, loop_budget_ms: float = 0.0):
+    os.environ.update(fake_services.service_env(port))
+    os.environ["LOOP_BLOCK_BUDGET_MS"] = str(loop_budget_ms)
+    os.environ["TTS_PIPELINE"] = "1" if tts_pipeline else "0"
+    # Every run starts cold and leaves nothing behind
+    os.environ["TTS_CACHE_DIR"] = ""
+    if not tts_cache:
+        # The stand-in LLM repeats its replies, which would turn every TTS call into a cache hit
+        os.environ["TTS_CACHE_MAX_TEXT_CHARS"] = "0"
+    os.environ["LATENCY_JSONL"] = ""
+    os.environ["TRANSCRIPT_LOG"] = "1"
+    os.environ["TRANSCRIPT_LOG_DIR"] = tempfile.mkdtemp(prefix="socratis-loadtest-")
+
+
+async def run(args) -> dict:
+    proc, port = start_fake_services(args)
+    try:
+        configure_env(port, args.tts_cache, not args.no_tts_pipeline, args.loop_budget_ms)
+        # Imported only now: module-level settings (base URLs) are read at import time
+        agent = importlib.import_module("agent")
+        import http_pool
+        import llm_utils
+        import tts_hedge
+
+        # What prewarm does in a job process: plugin imports + the Deepgram TTS patch
+        deepgram, silero = agent.load_plugins()
+
+        llm = llm_utils.groq_llm()
+        tts = deepgram.TTS(model=agent.TTS_MODEL, sample_rate=agent.TTS_SAMPLE_RATE)
+
+        vad = None
+        if args.vad:
+            vad = silero.VAD.load()
+        test = LoadTest(agent, args, vad)
+        if vad is not None:
+            vad.on("metrics_collected", test.record_vad)
+        # Warm-up outside the measurement: client construction, TLS-free connects, first imports
+        await llm_utils.complete(llm, "warm-up", "warm-up")
+        stream = tts.synthesize("warm-up")
+        async for _ in stream:
+            pass
+        await stream.aclose()
+
+        monitor = LoopMonitor()
+        baseline_rss = rss_bytes()
+        monitor.start()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(test.run_session(i, llm, tts) for i in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+
+        await monitor.stop()
+        pool_stats = http_pool.get_stats()
+        hedge_stats = tts_hedge.get_client().get_stats()
+        await http_pool.close_pool()
+
+        import aiohttp
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/stats") as resp:
+                backend_stats = await resp.json()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        if os.environ.get("TRANSCRIPT_LOG_DIR"):
+            shutil.rmtree(os.environ["TRANSCRIPT_LOG_DIR"], ignore_errors=True)
+
+    counters = test.counters
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {
+            "turns_per_s": round(counters["turns"] / elapsed, 3),
+            "packets_per_s": round(counters["packets"] / elapsed, 1),
+            "reports_per_s": round(counters["reports"] / elapsed, 3),
+            "audio_x_realtime": round(counters["audio_seconds"] / elapsed, 2),
+        },
+        # Share of one core spent in VAD inference
+        "vad_busy": round(counters["vad_inference_s"] / elapsed, 4),
+        "counters": {
+            **counters,
+            "audio_seconds": round(counters["audio_seconds"], 2),
+            "vad_inference_s": round(counters["vad_inference_s"], 3),
+        },
+        "latency_s": test.registry.summary(),
+        "loop_lag_s": {**monitor.health.lag.summary(), "max": round(monitor.health.max_lag_s, 4)},
+        "loop_health": {
+            **monitor.health.get_stats(),
+            "worst_session_p95_s": max((lag["p95"] for lag in test.session_lag.values()), default=0.0),
+            "violation_stacks": [stall.to_dict() for stall in monitor.health.violations[:10]],
+        },
+        "memory": {
+            "baseline_rss_mb": round(baseline_rss / 2**20, 1),
+            "peak_rss_mb": round(monitor.peak_rss / 2**20, 1),
+            "per_session_kb": round(max(0, monitor.peak_rss - baseline_rss) / 1024 / max(1, args.sessions), 1),
+        },
+        "instruction_scheduler": test.scheduler_stats,
+        "code_analysis": test.analysis_stats,
+        "transcript_log": test.transcript_stats,
+        "tts_pipeline": test.tts_pipeline.stats if test.tts_pipeline is not None else None,
+        "http_pool": pool_stats,
+        "tts_hedge": hedge_stats,
+        "fake_services": backend_stats,
+        "errors": test.errors[:20],
+    }
+
+
+def print_report(result: dict):
+    print(f"\n== {result['config']['sessions']} sessions in {result['elapsed_s']:.1f}s ==")
+    for name, value in result["throughput"].items():
+        print(f"{name:<20} {value}")
+    print(f"\n{'latency':<20} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, s in result["latency_s"].items():
+        print(f"{name:<20} {s['count']:>7} {s['p50'] * 1000:>9.1f} {s['p95'] * 1000:>9.1f} {s['p99'] * 1000:>9.1f}")
+    lag = result["loop_lag_s"]
+    print(f"{'loop_lag':<20} {lag['count']:>7} {lag['p50'] * 1000:>9.1f} {lag['p95'] * 1000:>9.1f} {lag['p99'] * 1000:>9.1f}  (max {lag['max'] * 1000:.1f} ms)")
+    health = result["loop_health"]
+    print(f"loop stalls: {health['stalls']}, worst session p95 lag {health['worst_session_p95_s'] * 1000:.1f} ms")
+    for where, count in health["hotspots"].items():
+        print(f"  {count:>4}x {where}")
+    for stall in health["violation_stacks"]:
+        print(f"BLOCKED {stall['duration_ms']} ms > budget {health['budget_ms']} ms at {stall['where']}")
+        print("".join(stall["stack"][-8:]), end="")
+    hedge = result["tts_hedge"]
+    print(
+        f"TTS hedging: {hedge['hedged']}/{hedge['requests']} hedged ({hedge['hedge_wins']} won), "
+        f"{hedge['retried']} retried, {hedge['failed']} failed, {hedge['rejected']} rejected by the breaker, "
+        f"deadline {hedge['deadline_ms']} ms"
+    )
+    memory = result["memory"]
+    if result["config"].get("vad"):
+        print(f"VAD inference: {result['vad_busy'] * 100:.1f}% of a core")
+    print(f"\nRSS {memory['baseline_rss_mb']} -> {memory['peak_rss_mb']} MB, ~{memory['per_session_kb']} KiB per session")
+    print(
+        f"Reports saved by backend: {result['fake_services'].get('saved_sessions')}/{result['config']['sessions']}"
+        f" ({result['fake_services'].get('partial_requests', 0)} partial updates before them)"
+    )
+    for error in result["errors"]:
+        print(f"ERROR {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Socratis agent load test")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=4, help="interviewer turns per session")
+    parser.add_argument("--packets-per-turn", type=int, default=20, help="code packets typed between turns")
+    parser.add_argument("--packet-interval-ms", type=float, default=50)
+    parser.add_argument("--think-ms", type=float, default=200, help="pause after each interviewer turn")
+    parser.add_argument("--ramp-s", type=float, default=1.0, help="spread session starts over this long")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--vad", action="store_true", help="also run Silero VAD on simulated microphone audio per session")
+    parser.add_argument("--tts-cache", action="store_true", help="let repeated replies hit the TTS cache")
+    parser.add_argument("--no-tts-pipeline", action="store_true", help="synthesize whole replies after the LLM finishes")
+    parser.add_argument("--json", help="also write the results here")
+    parser.add_argument(
+        "--loop-budget-ms", type=float, default=float(os.environ.get("LOOP_BLOCK_BUDGET_MS", "0")),
+        help="debug mode: fail if the event loop is ever blocked longer than this (0 = off)",
+    )
+    fake_services.add_arguments(parser)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+    # Non-zero exit for CI when anything was dropped
+    missing = args.sessions - (result["fake_services"].get("saved_sessions") or 0)
+    if result["counters"]["sessions_failed"] or missing or result["loop_health"]["violations"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
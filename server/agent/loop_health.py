@@ -0,0 +1,229 @@
+"""
+Event-loop health
+Realtime audio, VAD and the data channel all share one event loop per job process, so any
+synchronous work in a callback (decoding a large code packet, rebuilding a prompt,
+converting a whole utterance) delays every frame behind it.
+
+    - A sampler on the loop measures scheduling lag (oversleep of a short periodic timer)
+      into a process histogram and one histogram per tracked session.
+    - A watchdog thread notices when the sampler's heartbeat goes stale for longer than
+      LOOP_BLOCK_THRESHOLD_MS and captures the loop thread's stack while it is still
+      blocked, so the stall is attributed to the code that caused it.
+    - With LOOP_BLOCK_BUDGET_MS set (debug mode), every stall over the budget is recorded
+      as a violation; loadtest.py and bench_capacity.py fail when there are any.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from latency_metrics import LAG_BUCKETS_S, LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+HERE = Path(__file__).parent
+
+
+@dataclass
+class Stall:
+    """One period the loop was blocked for longer than the threshold"""
+    duration_s: float
+    at: float
+    sessions: tuple = ()
+    stack: list = field(default_factory=list)  # formatted frames, outermost first
+
+    @property
+    def where(self) -> str:
+        """Innermost frame in our own code (falls back to the innermost frame)"""
+        return _where(self.stack)
+
+    def to_dict(self) -> dict:
+        return {
+            "duration_ms": round(self.duration_s * 1000, 1),
+            "at": self.at,
+            "sessions": list(self.sessions),
+            "where": self.where,
+            "stack": self.stack,
+        }
+
+
+@dataclass
+class SessionLag:
+    """Lag observed while one session was active"""
+    lag: LatencyHistogram = field(default_factory=lambda: LatencyHistogram(buckets=LAG_BUCKETS_S))
+    stalls: int = 0
+    worst: Optional[Stall] = None
+
+
+def _where(stack: list) -> str:
+    if not stack:
+        return "<unknown: the loop resumed before its stack was captured>"
+    # Only the callback the loop is running counts, not the frames that started the loop
+    for i in range(len(stack) - 1, -1, -1):
+        if "asyncio" in stack[i] and "in _run\n" in stack[i]:
+            stack = stack[i + 1:] or stack
+            break
+    for entry in reversed(stack):
+        if str(HERE) in entry:
+            return entry.strip().splitlines()[0]
+    return stack[-1].strip().splitlines()[0]
+
+
+class LoopHealth:
+    """
+    Per-process monitor for the running loop. Sessions register with `track(session_id)`
+    and get the lag observed while they were active back from `untrack(session_id)`.
+    """
+
+    def __init__(self, interval_s: float = 0.02, threshold_s: float = 0.1, budget_s: float = 0.0,
+                 capture_stacks: bool = True, max_stalls: int = 50):
+        self.interval_s = interval_s
+        # In debug mode every block over the budget must be caught, even below the threshold
+        self.threshold_s = min(threshold_s, budget_s) if budget_s > 0 else threshold_s
+        self.budget_s = budget_s
+        self.capture_stacks = capture_stacks
+
+        self.lag = LatencyHistogram(buckets=LAG_BUCKETS_S, reservoir=100_000)
+        self.max_lag_s = 0.0
+        self.stalls = deque(maxlen=max_stalls)
+        self.violations = []
+        self.hotspots = Counter()  # Stall.where -> count
+        self._sessions = {}
+
+        self._loop = None
+        self._loop_thread = None
+        self._task = None
+        # Written by the sampler, read by the watchdog (plain attribute reads are atomic)
+        self._beat = 0
+        self._beat_at = time.monotonic()
+        self._captured = None  # (beat, stack) taken by the watchdog during a stall
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    @classmethod
+    def from_env(cls) -> "LoopHealth":
+        return cls(
+            interval_s=float(os.environ.get("LOOP_LAG_INTERVAL_MS", "20")) / 1000,
+            threshold_s=float(os.environ.get("LOOP_BLOCK_THRESHOLD_MS", "100")) / 1000,
+            budget_s=float(os.environ.get("LOOP_BLOCK_BUDGET_MS", "0")) / 1000,
+            capture_stacks=os.environ.get("LOOP_BLOCK_STACKS", "1") != "0",
+        )
+
+    @property
+    def debug(self) -> bool:
+        return self.budget_s > 0
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat_at = time.monotonic()
+        self._task = asyncio.create_task(self._sample())
+        if self.capture_stacks:
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-health-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, 1.0)
+            self._watchdog = None
+
+    # --- sessions ------------------------------------------------------------
+
+    def track(self, session_id: str) -> SessionLag:
+        return self._sessions.setdefault(session_id, SessionLag())
+
+    def untrack(self, session_id: str) -> Optional[SessionLag]:
+        return self._sessions.pop(session_id, None)
+
+    # --- sampling ------------------------------------------------------------
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_s)
+            lag = max(0.0, loop.time() - started - self.interval_s)
+            self._beat += 1
+            self._beat_at = time.monotonic()
+
+            self.lag.observe(lag)
+            for session in self._sessions.values():
+                session.lag.observe(lag)
+            if lag > self.max_lag_s:
+                self.max_lag_s = lag
+            if lag >= self.threshold_s:
+                self._record_stall(lag)
+
+    def _record_stall(self, lag: float):
+        captured, self._captured = self._captured, None
+        # A capture belongs to this stall only if no beat happened since it was taken
+        stack = captured[1] if captured is not None and captured[0] == self._beat - 1 else []
+        stall = Stall(duration_s=lag, at=time.time(), sessions=tuple(self._sessions), stack=stack)
+        self.stalls.append(stall)
+        self.hotspots[stall.where] += 1
+        for session in self._sessions.values():
+            session.stalls += 1
+            if session.worst is None or lag > session.worst.duration_s:
+                session.worst = stall
+
+        if self.debug and lag > self.budget_s:
+            self.violations.append(stall)
+            logger.error(
+                f"[LOOP] Event loop blocked for {lag * 1000:.0f} ms (budget {self.budget_s * 1000:.0f} ms) "
+                f"at {stall.where}\n{''.join(stall.stack)}"
+            )
+        else:
+            logger.warning(f"[LOOP] Event loop blocked for {lag * 1000:.0f} ms at {stall.where}")
+
+    def _watch(self):
+        """Watchdog thread: snapshot the loop thread's stack while it is blocked"""
+        poll_s = max(0.005, self.threshold_s / 4)
+        while not self._stop.wait(poll_s):
+            beat = self._beat
+            if time.monotonic() - self._beat_at < self.threshold_s + self.interval_s:
+                continue
+            if self._captured is not None and self._captured[0] == beat:
+                continue  # already have this stall
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            self._captured = (beat, traceback.format_stack(frame))
+
+    # --- export --------------------------------------------------------------
+
+    def get_stats(self) -> dict:
+        return {
+            "lag_s": {**self.lag.summary(), "max": round(self.max_lag_s, 4)},
+            "stalls": sum(self.hotspots.values()),
+            "violations": len(self.violations),
+            "budget_ms": round(self.budget_s * 1000, 1) if self.debug else None,
+            "hotspots": dict(self.hotspots.most_common(5)),
+        }
+
+
+_monitor: Optional[LoopHealth] = None
+
+
+def get_monitor() -> LoopHealth:
+    """The process's monitor, started on the running loop on first use"""
+    global _monitor
+    if _monitor is None or _monitor._loop is not asyncio.get_running_loop():
+        _monitor = LoopHealth.from_env()
+        _monitor.start()
+    return _monitor
@@ -0,0 +1,281 @@
+"""
+Speculative pause comments
+During silent observation the interviewer comments on a specific line once the candidate
+has stopped typing for PAUSE_COMMENT_AFTER_S. Generating that comment only when the pause
+is reached costs a full LLM + TTS round trip, so it is prepared ahead of time: whenever
+the code settles for a moment, a comment is generated against it and synthesized into
+memory. When the pause threshold is reached the ready audio plays immediately.
+
+A speculation belongs to the code it was generated from. Whitespace-only edits keep it;
+anything else (beyond PAUSE_SPECULATION_MAX_CHANGED_LINES changed lines, or lines moving
+so that line numbers shift) invalidates it and its tokens are counted as wasted.
+"""
+import asyncio
+import difflib
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import latency_metrics
+from code_context import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+PAUSE_COMMENT_PROMPT = """You are Socratis, a calm Senior Software Engineer interviewing a candidate.
+The candidate has stopped typing. Write ONE short spoken remark (max 2 sentences) about a
+SPECIFIC line of their code, by line number: a Socratic question about an edge case, a bug
+or the next step. Never give the answer or write code. Plain text only, no markdown."""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def code_fingerprint(code: str) -> tuple:
+    """Per-line content with whitespace collapsed; line count is kept so numbering matters"""
+    return tuple(_WHITESPACE.sub(" ", line).strip() for line in code.rstrip().splitlines())
+
+
+def changed_lines(old: tuple, new: tuple) -> Optional[int]:
+    """Lines rewritten in place between two fingerprints, or None when lines moved"""
+    if old == new:
+        return 0
+    if len(old) != len(new):
+        return None
+    changed = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+        if tag == "equal":
+            continue
+        if tag != "replace" or i2 - i1 != j2 - j1:
+            return None
+        changed += i2 - i1
+    return changed
+
+
+def number_lines(code: str) -> str:
+    return "\n".join(f"{n}| {line}" for n, line in enumerate(code.splitlines(), start=1))
+
+
+@dataclass
+class Speculation:
+    fingerprint: tuple
+    prompt_tokens: int
+    text: str = ""
+    frames: list = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+    ready_at: Optional[float] = None
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + (estimate_tokens(self.text) if self.text else 0)
+
+
+class PauseSpeculator:
+    """
+    Per-session pause-comment scheduler.
+
+    - `generate(code)` returns the comment text for the code (an LLM call)
+    - `synthesize(text)` returns an async iterator of audio frames
+    - `speak(text, frames)` plays the comment; `frames` is an async iterator or None
+      (None lets the session synthesize it)
+    - `can_speak()` says whether the floor is free (nobody talking, nothing queued)
+    """
+
+    def __init__(self, generate, synthesize, speak, can_speak, prompt_tokens=lambda code: 0,
+                 pause_after_s: float = 30.0, speculate: bool = True, settle_s: float = 3.0,
+                 max_changed_lines: int = 0):
+        self.generate = generate
+        self.synthesize = synthesize
+        self.speak = speak
+        self.can_speak = can_speak
+        self.prompt_tokens = prompt_tokens
+        self.pause_after_s = pause_after_s
+        self.speculate = speculate
+        self.settle_s = settle_s
+        self.max_changed_lines = max_changed_lines
+
+        self._code = None
+        self._fingerprint = None
+        self._settle_timer = None
+        self._pause_timer = None
+        self._speculation: Optional[Speculation] = None
+        self._commented = None  # fingerprint of the code last commented on
+        self._speaking = None
+        self.stats = {
+            "pauses": 0,
+            "speculations": 0,
+            "invalidated": 0,
+            "hits": 0,
+            "late_hits": 0,  # speculation still in flight at the pause, then used
+            "misses": 0,
+            "failed": 0,
+            "used_tokens": 0,
+            "wasted_tokens": 0,
+        }
+
+    @classmethod
+    def from_env(cls, generate, synthesize, speak, can_speak, prompt_tokens=lambda code: 0) -> "PauseSpeculator":
+        return cls(
+            generate,
+            synthesize,
+            speak,
+            can_speak,
+            prompt_tokens=prompt_tokens,
+            pause_after_s=float(os.environ.get("PAUSE_COMMENT_AFTER_S", "30")),
+            speculate=os.environ.get("PAUSE_SPECULATION", "1") != "0",
+            settle_s=float(os.environ.get("PAUSE_SPECULATION_SETTLE_MS", "3000")) / 1000,
+            max_changed_lines=int(os.environ.get("PAUSE_SPECULATION_MAX_CHANGED_LINES", "0")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.pause_after_s > 0
+
+    def _is_fresh(self, speculation: Speculation) -> bool:
+        changed = changed_lines(speculation.fingerprint, self._fingerprint)
+        return changed is not None and changed <= self.max_changed_lines
+
+    def code_changed(self, code: str):
+        """The candidate edited the buffer. Safe to call from sync event handlers on the loop."""
+        if not self.enabled or code == self._code:
+            return
+        self._code = code
+        self._fingerprint = code_fingerprint(code)
+        loop = asyncio.get_running_loop()
+
+        self._restart_pause_timer()
+
+        if self._speculation is not None and not self._is_fresh(self._speculation):
+            self._discard("invalidated")
+
+        if self.speculate and self._speculation is None and self._fingerprint != self._commented:
+            if self._settle_timer is not None:
+                self._settle_timer.cancel()
+            self._settle_timer = loop.call_later(self.settle_s, self._start_speculation)
+
+    def activity(self):
+        """Someone spoke: the silence clock starts over"""
+        if self._pause_timer is not None:
+            self._restart_pause_timer()
+
+    def _restart_pause_timer(self):
+        if self._pause_timer is not None:
+            self._pause_timer.cancel()
+        self._pause_timer = asyncio.get_running_loop().call_later(self.pause_after_s, self._on_pause)
+
+    def _start_speculation(self):
+        self._settle_timer = None
+        if self._speculation is not None or self._fingerprint == self._commented:
+            return
+        speculation = Speculation(self._fingerprint, self.prompt_tokens(self._code))
+        speculation.task = asyncio.create_task(self._prepare(speculation, self._code))
+        speculation.task.add_done_callback(_log_failure)
+        self._speculation = speculation
+        self.stats["speculations"] += 1
+
+    async def _prepare(self, speculation: Speculation, code: str):
+        # Speculative work must not overwrite the TTS stages of the turn being spoken
+        latency_metrics.detach()
+        started = time.perf_counter()
+        speculation.text = (await self.generate(code)).strip()
+        if not speculation.text:
+            raise ValueError("empty pause comment")
+        async for frame in self.synthesize(speculation.text):
+            speculation.frames.append(frame)
+        speculation.ready_at = time.perf_counter()
+        logger.info(f"[PAUSE] Speculative comment ready in {speculation.ready_at - started:.2f}s")
+
+    def _discard(self, reason: str):
+        speculation, self._speculation = self._speculation, None
+        if speculation.task is not None and not speculation.task.done():
+            speculation.task.cancel()
+        self.stats[reason] += 1
+        self.stats["wasted_tokens"] += speculation.tokens
+
+    def _on_pause(self):
+        self._pause_timer = None
+        if self._fingerprint == self._commented:
+            return
+        if not self.can_speak() or (self._speaking is not None and not self._speaking.done()):
+            # Not a silent pause after all; look again after another full interval
+            self._restart_pause_timer()
+            return
+        self.stats["pauses"] += 1
+        self._commented = self._fingerprint
+        self._speaking = asyncio.create_task(self._comment(self._code))
+
+    async def _comment(self, code: str):
+        speculation, self._speculation = self._speculation, None
+        fingerprint = self._fingerprint
+        try:
+            if speculation is not None and speculation.task.done() and speculation.task.exception() is None:
+                self.stats["hits"] += 1
+            elif speculation is not None and not speculation.task.done():
+                await speculation.task
+                self.stats["late_hits"] += 1
+            else:
+                if speculation is not None:
+                    # Speculation failed; its tokens were spent all the same
+                    self.stats["failed"] += 1
+                    self.stats["wasted_tokens"] += speculation.tokens
+                self.stats["misses"] += 1
+                speculation = None
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Already logged by _log_failure
+            self.stats["failed"] += 1
+            self.stats["wasted_tokens"] += speculation.tokens
+            self.stats["misses"] += 1
+            speculation = None
+
+        # The candidate may have resumed typing while we waited on the speculation
+        if self._fingerprint != fingerprint:
+            if speculation is not None:
+                self.stats["wasted_tokens"] += speculation.tokens
+            self._commented = None
+            return
+
+        try:
+            if speculation is not None:
+                self.stats["used_tokens"] += speculation.tokens
+                logger.info(f"[PAUSE] Playing prepared comment: '{speculation.text[:60]}'")
+                await self.speak(speculation.text, _replay(speculation.frames))
+            else:
+                text = (await self.generate(code)).strip()
+                self.stats["used_tokens"] += self.prompt_tokens(code) + estimate_tokens(text)
+                if text:
+                    logger.info(f"[PAUSE] Playing on-demand comment: '{text[:60]}'")
+                    await self.speak(text, None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"[PAUSE] Pause comment failed: {e}")
+
+    async def aclose(self):
+        for timer in (self._settle_timer, self._pause_timer):
+            if timer is not None:
+                timer.cancel()
+        self._settle_timer = self._pause_timer = None
+        if self._speculation is not None:
+            self._discard("invalidated")
+        if self._speaking is not None and not self._speaking.done():
+            self._speaking.cancel()
+            await asyncio.gather(self._speaking, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        answered = self.stats["hits"] + self.stats["late_hits"] + self.stats["misses"]
+        hit_rate = round(self.stats["hits"] / answered, 3) if answered else None
+        return {**self.stats, "hit_rate": hit_rate}
+
+
+def _log_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"[PAUSE] Speculative comment failed: {task.exception()}")
+
+
+async def _replay(frames: list):
+    for frame in frames:
+        yield frame
@@ -0,0 +1,380 @@
+"""
+Decomposed report engine
+Runs focused sub-analyses concurrently (code audit, transcript audit, dimension
+scores, markdown narrative) instead of one monolithic call, then merges them into the
+JSON schema the backend and result page expect. Long transcripts are chunked and
+audited map-reduce style.
+
+JSON sections are parsed while they stream: each code issue, the correctness flag and
+the scores are validated and handed to `on_partial` as soon as they close, so the result
+page can show them before the narrative has finished.
+
+The code audit, scores and narrative are required: if any of them fails the engine raises
+ReportSectionError so the report queue retries the job. Only the transcript audit has a
+fallback; a report that needed it is marked `degraded`.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+
+import llm_utils
+import report_schema
+from code_analysis import CodeAnalyzer
+from json_stream import IncrementalJSONParser
+
+logger = logging.getLogger("socratis-agent")
+
+REPORT_CHUNK_CHARS = int(os.environ.get("REPORT_CHUNK_CHARS", "12000"))
+REPORT_MAX_CONCURRENCY = int(os.environ.get("REPORT_MAX_CONCURRENCY", "4"))
+
+EVALUATOR_IDENTITY = """
+You are the **Socratis Report Agent**, an elite, hyper-critical technical interview evaluator for top-tier tech companies (Google, Netflix, HFT firms).
+The interview has concluded. Your job is one focused part of a **Forensic, Deep-Dive Analysis**.
+
+## YOUR CHARACTERISTICS:
+- **Ruthlessly Detailed**: Do not glaze over minor errors. Address everything. If the code works but is ugly, say it.
+- **Pinpoint Specificity**: Never say "improve error handling". Say "Line 45 catches a generic Exception which masks the specific internal error."
+- **Evidence-Based**: You MUST cite specific line numbers, variable names, and exact transcript quotes for every claim.
+- **No Filler**: Never praise "Attendance" or "Politeness". Only praise technical or communication *skills*.
+"""
+
+CODE_AUDIT_PROMPT = EVALUATOR_IDENTITY + """
+# TASK: DEEP CODE AUDIT (The "Issues List")
+- **IF CODE IS EMPTY**: You MUST generate a `code_issue` at Line 1 with severity "error" and issue "Missing Implementation".
+- **IF CODE EXISTS**: List EVERY issue found. Do not limit yourself.
+- **STATIC ANALYSIS** findings (if given) are heuristic hints with line numbers, not verified facts. Check each against the code; report it only if it holds, and drop false positives. Then spend your effort on what a static pass cannot see.
+- **Syntactical**: Typos, missing semicolons, wrong strict types.
+- **Logical**: Infinite loops, off-by-one errors, unnecessary computations.
+- **Best Practices**: Variable naming (e.g., 'x' vs 'userIndex'), lack of comments, magic numbers.
+- The `code_issues` array MUST NOT be empty if there are any flaws.
+
+Respond with JSON only:
+{
+  "correctness": <boolean>,
+  "code_issues": [
+    {
+      "line_number": <number>,
+      "code_snippet": "<exact code or 'N/A'>",
+      "issue": "<what is wrong>",
+      "suggestion": "<how to fix>",
+      "severity": "error" | "warning" | "info"
+    }
+  ]
+}
+"""
+
+TRANSCRIPT_AUDIT_PROMPT = EVALUATOR_IDENTITY + """
+# TASK: TRANSCRIPT FORENSICS (The "Verbal Audit")
+- **IF TRANSCRIPT IS SHORT/EMPTY**: You MUST generate a `transcript_issue` stating "Lack of Communication" or "Failure to Explain Approach".
+- You must identify SPECIFIC issues in the spoken responses.
+- **Precision**: Did they say "Hashtable" when they meant "HashSet"?
+- **Clarity**: Did they ramble?
+- **Responsiveness**: Did they ignore a hint from the interviewer?
+- The `transcript_issues` array MUST NOT be empty if there are any flaws.
+- You may be given only one part of a longer transcript. Audit only what you see.
+- `notes` is a short factual digest (max 80 words) of this part: approach, claims, hints given.
+
+Respond with JSON only:
+{
+  "transcript_issues": [
+    {
+      "quote": "<exact quote or 'Silence'>",
+      "issue": "<critique>",
+      "what_should_have_been_said": "<better phrasing>",
+      "category": "communication" | "technical" | "behavior"
+    }
+  ],
+  "notes": "<digest>"
+}
+"""
+
+SCORES_PROMPT = EVALUATOR_IDENTITY + """
+# TASK: SCORING
+Score the candidate strictly. 5 is an average hire-bar performance; reserve 9-10 for flawless work.
+
+Respond with JSON only:
+{
+  "overall_score": <number 1-10>,
+  "dimension_scores": {
+    "problem_solving": <1-10>,
+    "algorithmic_thinking": <1-10>,
+    "code_implementation": <1-10>,
+    "testing": <1-10>,
+    "time_management": <1-10>,
+    "communication": <1-10>
+  }
+}
+"""
+
+NARRATIVE_PROMPT = EVALUATOR_IDENTITY + """
+# TASK: WRITTEN FEEDBACK (MARKDOWN ONLY, NO JSON)
+
+Use these EXACT headers (###). Do NOT use bolding like **Verdict** inside the header lines.
+"Areas for Improvement" must be the DOMINANT section.
+
+### Summary
+**Verdict:** [Strong No / No / Weak Yes / Strong Yes]
+[Executive brief]
+
+### Strengths
+- **[Strength 1]:** [Specific evidence]
+[If none, state "No significant strengths observed."]
+
+### Areas for Improvement
+- **[Weakness 1]:** [Specific evidence]
+- **[Weakness 2]:** [Specific evidence]
+
+### Code Review
+[Detailed critique of the code quality]
+"""
+
+DIMENSIONS = [
+    "problem_solving",
+    "algorithmic_thinking",
+    "code_implementation",
+    "testing",
+    "time_management",
+    "communication",
+]
+
+
+class ReportSectionError(Exception):
+    """A required section of the report failed; the report must not be submitted"""
+
+
+def parse_json_object(text: str) -> dict:
+    """Parse the first JSON object in an LLM response, tolerating ``` fences and chatter"""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("no JSON object in response")
+    return json.loads(text[start:end + 1])
+
+
+def chunk_transcript(transcript: str, max_chars: int = REPORT_CHUNK_CHARS):
+    """Split on line boundaries into chunks of at most ~max_chars"""
+    chunks, current, size = [], [], 0
+    for line in transcript.splitlines(keepends=True):
+        if current and size + len(line) > max_chars:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line)
+    if current:
+        chunks.append("".join(current))
+    return chunks or [""]
+
+
+def _artifacts(problem_title: str, final_code: str, transcript: str = None, notes: str = None, analysis: str = "") -> str:
+    parts = [
+        "# INTERVIEW ARTIFACTS TO ANALYZE",
+        f"## 📋 PROBLEM CONTEXT\n**Problem:** {problem_title}",
+        f"## 💻 CANDIDATE'S FINAL CODE\n```javascript\n{final_code}\n```",
+    ]
+    if analysis:
+        parts.append(f"## 🔎 STATIC ANALYSIS (precomputed; line numbers match the code above)\n{analysis}")
+    if transcript is not None:
+        parts.append(f"## 🎙️ INTERVIEW TRANSCRIPT\n{transcript}")
+    if notes is not None:
+        parts.append(f"## 🎙️ INTERVIEW DIGEST (transcript too long to include verbatim)\n{notes}")
+    return "\n\n".join(parts)
+
+
+class ReportEngine:
+    """
+    `on_partial(doc)`, if given, is called with the validated sections completed so far
+    (a subset of the report: overall_score, dimension_scores, correctness, code_issues)
+    each time one more closes.
+    """
+
+    def __init__(self, llm, max_concurrency: int = REPORT_MAX_CONCURRENCY, chunk_chars: int = REPORT_CHUNK_CHARS,
+                 on_partial=None):
+        self.llm = llm
+        self.chunk_chars = chunk_chars
+        self.on_partial = on_partial
+        self.partial = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.timings = {}
+
+    async def _call(self, name: str, system_prompt: str, user_content: str, as_json: bool = True, on_event=None):
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                if not as_json:
+                    return (await llm_utils.complete(self.llm, system_prompt, user_content)).strip()
+                parser = IncrementalJSONParser()
+                parts = []
+                async for delta in llm_utils.stream_text(self.llm, system_prompt, user_content):
+                    parts.append(delta)
+                    for event in parser.feed(delta):
+                        if on_event is not None:
+                            on_event(event)
+                if parser.done:
+                    try:
+                        return parser.result()
+                    except ValueError:
+                        pass
+                return parse_json_object("".join(parts))
+            finally:
+                self.timings[name] = round(time.perf_counter() - started, 2)
+
+    def _publish(self, key: str, value):
+        self.partial[key] = value
+        if self.on_partial is not None:
+            self.on_partial(dict(self.partial))
+
+    def _on_code_event(self, event):
+        if event[0] == "item" and event[1] == "code_issues":
+            issue = report_schema.validated(event[3], report_schema.CodeIssue)
+            if issue is not None:
+                self._publish("code_issues", self.partial.get("code_issues", []) + [issue])
+        elif event[0] == "field" and event[1] == "correctness" and isinstance(event[2], bool):
+            self._publish("correctness", event[2])
+
+    def _on_scores_event(self, event):
+        if event[0] != "field":
+            return
+        if event[1] == "overall_score":
+            score = report_schema.valid_score(event[2])
+            if score is not None:
+                self._publish("overall_score", score)
+        elif event[1] == "dimension_scores":
+            scores = report_schema.validated(event[2], report_schema.DimensionScores)
+            if scores is not None:
+                self._publish("dimension_scores", scores)
+
+    async def _audit_transcript(self, problem_title: str, final_code: str, chunks):
+        """Map: audit each chunk concurrently. Reduce: concatenate issues and notes."""
+        results = await asyncio.gather(
+            *(
+                self._call(
+                    f"transcript[{i}]",
+                    TRANSCRIPT_AUDIT_PROMPT,
+                    _artifacts(problem_title, final_code, transcript=chunk)
+                    + (f"\n\n(Part {i + 1} of {len(chunks)})" if len(chunks) > 1 else ""),
+                )
+                for i, chunk in enumerate(chunks)
+            ),
+            return_exceptions=True,
+        )
+        issues, notes, seen, failed = [], [], set(), 0
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"[REPORT] Transcript chunk {i} failed: {result}")
+                failed += 1
+                continue
+            for issue in result.get("transcript_issues") or []:
+                key = (issue.get("quote"), issue.get("issue"))
+                if key not in seen:
+                    seen.add(key)
+                    issues.append(issue)
+            if result.get("notes"):
+                notes.append(f"- Part {i + 1}: {result['notes']}")
+        return {"transcript_issues": issues, "notes": "\n".join(notes), "failed_chunks": failed}
+
+    async def generate(self, problem_title: str, final_code: str, transcript: str) -> dict:
+        return await self.generate_chunks(problem_title, final_code, chunk_transcript(transcript, self.chunk_chars))
+
+    async def generate_chunks(self, problem_title: str, final_code: str, chunks) -> dict:
+        """Same as generate(), for a transcript already split into chunks (see transcript_log)"""
+        started = time.perf_counter()
+        chunks = list(chunks) or [""]
+        transcript = chunks[0] if len(chunks) == 1 else None
+        # Line-level hints up front (off the loop), checked by each section against the code
+        analysis = await CodeAnalyzer.from_env().render(final_code)
+        code_task = asyncio.create_task(
+            self._call(
+                "code_audit",
+                CODE_AUDIT_PROMPT,
+                _artifacts(problem_title, final_code, analysis=analysis),
+                on_event=self._on_code_event,
+            )
+        )
+        transcript_task = asyncio.create_task(self._audit_transcript(problem_title, final_code, chunks))
+
+        if len(chunks) == 1:
+            # Everything is independent: run all four concurrently
+            context = _artifacts(problem_title, final_code, transcript=transcript, analysis=analysis)
+        else:
+            # Long interview: scores and narrative work from the map step's digest
+            audit = await transcript_task
+            context = _artifacts(problem_title, final_code, notes=audit["notes"], analysis=analysis)
+
+        scores_task = asyncio.create_task(self._call("scores", SCORES_PROMPT, context, on_event=self._on_scores_event))
+        narrative_task = asyncio.create_task(self._call("narrative", NARRATIVE_PROMPT, context, as_json=False))
+
+        code, audit, scores, narrative = await asyncio.gather(
+            code_task, transcript_task, scores_task, narrative_task, return_exceptions=True
+        )
+        # Only the transcript's length matters there; a multi-chunk one is long by definition
+        report = merge_sections(code, audit, scores, narrative, final_code, transcript if transcript is not None else chunks[0])
+        logger.info(
+            f"[REPORT] Engine finished in {time.perf_counter() - started:.2f}s "
+            f"({len(chunks)} transcript chunk(s); section timings {self.timings})"
+        )
+        return report
+
+
+def _score(name: str, value):
+    score = report_schema.valid_score(value)
+    if score is None:
+        raise ReportSectionError(f"scores: invalid {name} {value!r}")
+    return score
+
+
+def merge_sections(code, audit, scores, narrative, final_code: str, transcript: str) -> dict:
+    """
+    Combine sub-analysis results (or exceptions) into the report schema.
+    Raises ReportSectionError when a required section failed; a failed transcript audit
+    falls back to defaults and is listed in `degraded`.
+    """
+    for name, section, kind in (("code_audit", code, dict), ("scores", scores, dict), ("narrative", narrative, str)):
+        if isinstance(section, Exception):
+            raise ReportSectionError(f"{name} failed: {section}") from section
+        if not isinstance(section, kind):
+            raise ReportSectionError(f"{name}: unexpected {type(section).__name__} response")
+    if not isinstance(code.get("correctness"), bool):
+        raise ReportSectionError(f"code_audit: invalid correctness {code.get('correctness')!r}")
+    if not narrative:
+        raise ReportSectionError("narrative is empty")
+    dimension_scores = scores.get("dimension_scores")
+    if not isinstance(dimension_scores, dict):
+        raise ReportSectionError("scores: missing dimension_scores")
+
+    degraded = []
+    if isinstance(audit, Exception):
+        logger.error(f"[REPORT] Section 'transcript_audit' failed: {audit}")
+        audit, degraded = {}, ["transcript_audit"]
+    elif audit.get("failed_chunks"):
+        degraded = ["transcript_audit"]
+
+    code_issues = report_schema.valid_items(code.get("code_issues"), report_schema.CodeIssue)
+    if not code_issues and not final_code.strip():
+        code_issues.append({
+            "line_number": 1,
+            "code_snippet": "N/A",
+            "issue": "Missing Implementation",
+            "suggestion": "Implement a working solution before the interview ends.",
+            "severity": "error",
+        })
+
+    transcript_issues = report_schema.valid_items(audit.get("transcript_issues"), report_schema.TranscriptIssue)
+    if not transcript_issues and len(transcript.strip()) < 200:
+        transcript_issues.append({
+            "quote": "Silence",
+            "issue": "Lack of Communication",
+            "what_should_have_been_said": "Explain the approach and trade-offs out loud before and while coding.",
+            "category": "communication",
+        })
+
+    return report_schema.validate_report({
+        "overall_score": _score("overall_score", scores.get("overall_score")),
+        "correctness": code["correctness"],
+        "dimension_scores": {name: _score(name, dimension_scores.get(name)) for name in DIMENSIONS},
+        "code_issues": code_issues,
+        "transcript_issues": transcript_issues,
+        "feedback_markdown": narrative,
+        "degraded": degraded,
+    })
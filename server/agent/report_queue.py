@@ -0,0 +1,162 @@
+"""
+Durable local report queue
+Interview jobs enqueue a transcript/code snapshot here and exit; report_worker.py
+drains the queue with retries and exponential backoff. Backed by SQLite (WAL) so
+jobs survive crashes and restarts of either side.
+"""
+import json
+import logging
+import os
+import random
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).parent / ".report_queue.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS report_jobs (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id      TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    snapshot        TEXT NOT NULL,
+    analysis        TEXT,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error      TEXT,
+    created_at      REAL NOT NULL,
+    updated_at      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_report_jobs_ready ON report_jobs (status, next_attempt_at);
+"""
+
+
+class ReportQueue:
+    """
+    Job states: pending -> running -> done | failed.
+    A job that stays `running` past the lease (worker died mid-report) becomes claimable again.
+    """
+
+    def __init__(
+        self,
+        db_path=DEFAULT_DB_PATH,
+        max_attempts: int = 6,
+        backoff_base_s: float = 2.0,
+        backoff_max_s: float = 300.0,
+        lease_s: float = 600.0,
+    ):
+        self.db_path = Path(db_path)
+        self.max_attempts = max_attempts
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.lease_s = lease_s
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> "ReportQueue":
+        return cls(
+            db_path=os.environ.get("REPORT_QUEUE_DB", str(DEFAULT_DB_PATH)),
+            max_attempts=int(os.environ.get("REPORT_MAX_ATTEMPTS", "6")),
+            backoff_base_s=float(os.environ.get("REPORT_BACKOFF_BASE_S", "2")),
+            backoff_max_s=float(os.environ.get("REPORT_BACKOFF_MAX_S", "300")),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def enqueue(self, session_id: str, snapshot: dict, idempotency_key: str = None) -> str:
+        """Persist a report request. Re-enqueueing the same key is a no-op."""
+        key = idempotency_key or f"{session_id}:{int(time.time() * 1000)}"
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO report_jobs "
+                "(session_id, idempotency_key, snapshot, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, key, json.dumps(snapshot), now, now, now),
+            )
+        logger.info(f"[QUEUE] Enqueued report for session {session_id} ({key})")
+        return key
+
+    def claim(self):
+        """Atomically take the next ready job, or return None"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM report_jobs "
+                "WHERE (status = 'pending' AND next_attempt_at <= ?) "
+                "   OR (status = 'running' AND updated_at <= ?) "
+                "ORDER BY next_attempt_at, id LIMIT 1",
+                (now, now - self.lease_s),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE report_jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        job = dict(row)
+        job["attempts"] += 1
+        job["snapshot"] = json.loads(job["snapshot"])
+        job["analysis"] = json.loads(job["analysis"]) if job["analysis"] else None
+        return job
+
+    def save_analysis(self, job_id: int, analysis: dict):
+        """Checkpoint the generated report so a failed submission retries without re-running the LLM"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE report_jobs SET analysis = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(analysis), time.time(), job_id),
+            )
+
+    def complete(self, job_id: int):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE report_jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    def fail(self, job_id: int, attempts: int, error: str, permanent: bool = False) -> bool:
+        """Record a failed attempt; True if the job won't be retried"""
+        now = time.time()
+        permanent = permanent or attempts >= self.max_attempts
+        if permanent:
+            status, next_attempt_at = "failed", now
+            logger.error(f"[QUEUE] Job {job_id} failed permanently after {attempts} attempt(s): {error}")
+        else:
+            delay = min(self.backoff_max_s, self.backoff_base_s * (2 ** (attempts - 1)))
+            delay *= random.uniform(0.8, 1.2)
+            status, next_attempt_at = "pending", now + delay
+            logger.warning(f"[QUEUE] Job {job_id} attempt {attempts} failed, retrying in {delay:.1f}s: {error}")
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE report_jobs SET status = ?, next_attempt_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, next_attempt_at, error[:2000], now, job_id),
+            )
+        return permanent
+
+    def counts(self) -> dict:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM report_jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
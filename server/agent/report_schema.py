@@ -0,0 +1,84 @@
+"""
+Report schema
+The assessment document the backend stores and the result page renders, as msgspec
+Structs. LLM output is validated against it twice: each section as it streams in
+(before it is published as a partial update) and the merged report before submission.
+Malformed issues are dropped rather than failing the whole report.
+"""
+import logging
+from typing import Annotated, Literal, Optional, Union
+
+import msgspec
+
+logger = logging.getLogger("socratis-agent")
+
+_SCORE_RANGE = msgspec.Meta(ge=0, le=10)
+# Whole scores stay ints ("7", not "7.0") in the stored document
+Score = Union[Annotated[int, _SCORE_RANGE], Annotated[float, _SCORE_RANGE]]
+
+
+class CodeIssue(msgspec.Struct):
+    line_number: int
+    issue: str
+    code_snippet: str = "N/A"
+    suggestion: str = ""
+    severity: Literal["error", "warning", "info"] = "warning"
+
+
+class TranscriptIssue(msgspec.Struct):
+    issue: str
+    quote: str = "Silence"
+    what_should_have_been_said: str = ""
+    category: str = "communication"
+
+
+class DimensionScores(msgspec.Struct):
+    problem_solving: Score = 1
+    algorithmic_thinking: Score = 1
+    code_implementation: Score = 1
+    testing: Score = 1
+    time_management: Score = 1
+    communication: Score = 1
+
+
+class Report(msgspec.Struct, omit_defaults=True):
+    overall_score: Score
+    correctness: bool
+    dimension_scores: DimensionScores
+    code_issues: list[CodeIssue]
+    transcript_issues: list[TranscriptIssue]
+    feedback_markdown: str
+    # Optional sections that failed and were filled with defaults
+    degraded: list[str] = []
+
+
+def _convert(value, schema):
+    # strict=False accepts the usual LLM slips, e.g. "12" for a line number
+    return msgspec.to_builtins(msgspec.convert(value, schema, strict=False))
+
+
+def validated(value, schema) -> Optional[dict]:
+    """`value` converted to `schema` as plain builtins, or None if it doesn't fit"""
+    try:
+        return _convert(value, schema)
+    except msgspec.ValidationError as e:
+        logger.warning(f"[REPORT] Dropping invalid {schema.__name__}: {e}")
+        return None
+
+
+def valid_items(values, schema) -> list:
+    if not isinstance(values, list):
+        return []
+    return [item for item in (validated(value, schema) for value in values) if item is not None]
+
+
+def valid_score(value) -> Optional[Union[int, float]]:
+    try:
+        return msgspec.convert(value, Score, strict=False)
+    except msgspec.ValidationError:
+        return None
+
+
+def validate_report(report: dict) -> dict:
+    """The final document; raises msgspec.ValidationError if it doesn't match the schema"""
+    return _convert(report, Report)
@@ -0,0 +1,252 @@
+"""
+Report worker
+Drains the durable report queue: generates the assessment with the report engine and
+submits it to the backend's /api/save-analysis, with retries and exponential backoff.
+A failed required section (ReportSectionError) is retried like any other failure, and a
+degraded report is only submitted as final once the retries are used up. When a job
+fails for good the backend is told (`failed: true`), so the result page stops waiting.
+While a report is generated, its completed sections are pushed to the same endpoint as
+partial updates (REPORT_PROGRESSIVE), so the result page fills in before it finishes.
+
+Run alongside the agent (start.py does this):  python report_worker.py
+"""
+import asyncio
+import logging
+import os
+import signal
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+import http_pool
+import llm_utils
+from report_engine import ReportEngine
+from report_queue import ReportQueue
+from transcript_log import load_session
+
+load_dotenv()
+
+logger = logging.getLogger("socratis-report-worker")
+
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:4000")
+SAVE_ANALYSIS_URL = f"{BACKEND_URL}/api/save-analysis"
+REPORT_PROGRESSIVE = os.environ.get("REPORT_PROGRESSIVE", "1") != "0"
+
+
+class PermanentSubmitError(Exception):
+    """The backend rejected the report in a way retrying won't fix (e.g. unknown session)"""
+
+
+class DegradedReportError(Exception):
+    """The report needed fallback defaults; retried until the queue's last attempt"""
+
+
+async def submit_analysis(session_id: str, analysis: dict, idempotency_key: str = None, partial: bool = False):
+    """
+    POST the report to the backend. The endpoint overwrites session.feedback, so
+    resubmitting the same report is safe; the key is sent for tracing on the backend side.
+    A `partial` report is shown while generation continues and never replaces a final one.
+    """
+    payload = {
+        "sessionId": session_id,
+        "analysis": analysis
+    }
+    if partial:
+        payload["partial"] = True
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+
+    http_session = http_pool.get_session()
+    async with http_session.post(SAVE_ANALYSIS_URL, json=payload, headers=headers) as resp:
+        if resp.status == 200:
+            if not partial:
+                logger.info(f"[REPORT] Saved analysis for session {session_id}.")
+            return
+        body = await resp.text()
+        if 400 <= resp.status < 500 and resp.status not in (408, 429):
+            raise PermanentSubmitError(f"Backend returned {resp.status}: {body}")
+        raise Exception(f"Backend returned {resp.status}: {body}")
+
+
+async def submit_failure(session_id: str, error: str):
+    """Tell the backend the report won't come, so the result page stops waiting. Best effort."""
+    payload = {"sessionId": session_id, "failed": True, "error": error[:500]}
+    try:
+        async with http_pool.get_session().post(SAVE_ANALYSIS_URL, json=payload) as resp:
+            if resp.status != 200:
+                logger.warning(f"[REPORT] Backend returned {resp.status} for the failure notice of {session_id}")
+    except Exception as e:
+        logger.warning(f"[REPORT] Could not report the failure of {session_id} to the backend: {e}")
+
+
+async def fail_job(queue: ReportQueue, job: dict, error: str, permanent: bool = False):
+    if await asyncio.to_thread(queue.fail, job["id"], job["attempts"], error, permanent):
+        await submit_failure(job["session_id"], error)
+
+
+class PartialReportPublisher:
+    """
+    Pushes the report engine's partial documents to the backend. At most one request is
+    in flight and they are spaced REPORT_PARTIAL_INTERVAL_MS apart; updates arriving
+    meanwhile collapse into the latest document. Failures are logged and dropped: the
+    final submission is what counts.
+    """
+
+    def __init__(self, session_id: str, min_interval_s: float = None):
+        self.session_id = session_id
+        if min_interval_s is None:
+            min_interval_s = float(os.environ.get("REPORT_PARTIAL_INTERVAL_MS", "500")) / 1000
+        self.min_interval_s = min_interval_s
+        self._latest = None
+        self._task = None
+        self._closed = asyncio.Event()
+        self.stats = {"updates": 0, "sent": 0, "failed": 0}
+
+    def update(self, doc: dict):
+        """Called by the engine on the loop; never blocks"""
+        if self._closed.is_set():
+            return
+        self._latest = doc
+        self.stats["updates"] += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        while self._latest is not None and not self._closed.is_set():
+            doc, self._latest = self._latest, None
+            started = time.perf_counter()
+            try:
+                await submit_analysis(self.session_id, doc, partial=True)
+                self.stats["sent"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.warning(f"[REPORT] Partial update for {self.session_id} failed: {e}")
+            try:
+                # Spacing between updates; closing cuts it short
+                await asyncio.wait_for(self._closed.wait(), self.min_interval_s - (time.perf_counter() - started))
+            except asyncio.TimeoutError:
+                pass
+
+    async def aclose(self, timeout: float = 5.0):
+        """Stop publishing. Waits for an in-flight update so it can't land after the final report."""
+        self._closed.set()
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except (asyncio.TimeoutError, Exception):
+                pass
+
+
+def partial_publisher(session_id: str):
+    """A publisher for the session, or None with REPORT_PROGRESSIVE=0"""
+    return PartialReportPublisher(session_id) if REPORT_PROGRESSIVE else None
+
+
+async def process_job(queue: ReportQueue, llm, job: dict):
+    session_id = job["session_id"]
+    snapshot = job["snapshot"]
+    publisher = None
+    try:
+        analysis = job["analysis"]
+        if analysis is None:
+            publisher = partial_publisher(session_id)
+            engine = ReportEngine(llm, on_partial=publisher.update if publisher else None)
+            if "transcript_log" in snapshot:
+                # Streamed from the session's append-only log (mmap), chunk by chunk
+                session_log = await asyncio.to_thread(load_session, snapshot["transcript_log"], engine.chunk_chars)
+                analysis = await engine.generate_chunks(
+                    snapshot["problem_title"],
+                    snapshot["final_code"] or session_log.final_code,
+                    session_log.chunks,
+                )
+            else:
+                analysis = await engine.generate(
+                    snapshot["problem_title"],
+                    snapshot["final_code"],
+                    snapshot["transcript"],
+                )
+            if publisher is not None:
+                await publisher.aclose()
+            if analysis.get("degraded") and job["attempts"] < queue.max_attempts:
+                # Show it meanwhile, but retry for the full report; only the last attempt submits it as final
+                await submit_analysis(session_id, analysis, partial=True)
+                raise DegradedReportError(f"sections fell back to defaults: {analysis['degraded']}")
+            await asyncio.to_thread(queue.save_analysis, job["id"], analysis)
+            logger.info(f"[REPORT] Analysis generated for {session_id}. Score: {analysis.get('overall_score')}")
+        else:
+            logger.info(f"[REPORT] Resubmitting checkpointed analysis for {session_id}")
+
+        await submit_analysis(session_id, analysis, job["idempotency_key"])
+        await asyncio.to_thread(queue.complete, job["id"])
+        if "transcript_log" in snapshot:
+            Path(snapshot["transcript_log"]).unlink(missing_ok=True)
+    except PermanentSubmitError as e:
+        await fail_job(queue, job, str(e), True)
+    except FileNotFoundError as e:
+        # The transcript log is gone; retrying won't bring it back
+        await fail_job(queue, job, f"{type(e).__name__}: {e}", True)
+    except Exception as e:
+        await fail_job(queue, job, f"{type(e).__name__}: {e}")
+    finally:
+        if publisher is not None:
+            await publisher.aclose()
+
+
+async def worker_loop(name: str, queue: ReportQueue, llm, stop: asyncio.Event, poll_interval: float):
+    while not stop.is_set():
+        try:
+            job = await asyncio.to_thread(queue.claim)
+        except Exception as e:
+            logger.error(f"[{name}] Failed to claim job: {e}")
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        logger.info(f"[{name}] Processing report job {job['id']} (attempt {job['attempts']})")
+        await process_job(queue, llm, job)
+
+
+async def run_workers(num_workers: int = None, poll_interval: float = None, stop: asyncio.Event = None):
+    num_workers = num_workers or int(os.environ.get("REPORT_WORKERS", "2"))
+    poll_interval = poll_interval or float(os.environ.get("REPORT_POLL_INTERVAL_S", "0.5"))
+    stop = stop or asyncio.Event()
+
+    queue = ReportQueue.from_env()
+    llm = llm_utils.groq_llm()
+    logger.info(f"[WORKER] Starting {num_workers} report worker(s). Queue: {queue.counts()}")
+
+    try:
+        await asyncio.gather(
+            *(worker_loop(f"WORKER-{i}", queue, llm, stop, poll_interval) for i in range(num_workers))
+        )
+    finally:
+        await http_pool.close_pool()
+        logger.info(f"[WORKER] Stopped. Queue: {queue.counts()}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    async def _run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass  # Windows: rely on KeyboardInterrupt
+        await run_workers(stop=stop)
+
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
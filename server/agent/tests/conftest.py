@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The agent's modules are imported top-level (python agent.py runs from server/agent)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
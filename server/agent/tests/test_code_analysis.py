@@ -0,0 +1,124 @@
+import asyncio
+
+import code_analysis
+from code_analysis import CodeAnalyzer, analyze, tokenize
+
+
+def _findings(code, kind=None):
+    return [(f.line, f.message) for f in analyze(code).findings if kind is None or f.kind == kind]
+
+
+def test_off_by_one():
+    code = (
+        "function f(xs) {\n"
+        "  for (let i = 0; i <= xs.length; i++) {}\n"
+        "  for (let j = xs.length; j >= 0; j--) {}\n"
+        "  return xs[xs.length];\n"
+        "}\n"
+    )
+    assert _findings(code, "off_by_one") == [
+        (2, "`i <= xs.length` runs one past the last index"),
+        (3, "counts down from `.length`, one past the last index"),
+        (4, "`xs[xs.length]` is always undefined (last index is length - 1)"),
+    ]
+
+
+def test_off_by_one_leaves_correct_bounds_alone():
+    code = (
+        "function f(xs) {\n"
+        "  xs[xs.length] = 1;\n"  # the push idiom
+        "  for (let i = 0; i <= xs.length - 1; i++) {}\n"
+        "  for (let j = xs.length - 1; j >= 0; j--) {}\n"
+        "}\n"
+    )
+    assert _findings(code) == []
+
+
+def test_nested_loops():
+    code = (
+        "function f(a) {\n"
+        "  for (const x of a) {\n"
+        "    for (const y of a) {\n"
+        "      while (x < y) { break; }\n"
+        "    }\n"
+        "  }\n"
+        "}\n"
+    )
+    assert [line for line, _ in _findings(code, "nested_loop")] == [3, 4]
+    assert "O(n^3)" in _findings(code, "nested_loop")[1][1]
+    (fn,) = analyze(code).functions
+    assert (fn.name, fn.params, fn.max_loop_depth) == ("f", ["a"], 3)
+
+
+def test_unused_variables():
+    code = (
+        "function f(a) {\n"
+        "  let unused = 1;\n"
+        "  let written = 0;\n"
+        "  written = 2;\n"
+        "  let count = 0;\n"
+        "  count++;\n"
+        "  const {p, q} = a;\n"
+        "  let _ignored = 3;\n"
+        "  return p;\n"
+        "}\n"
+    )
+    assert _findings(code, "unused") == [
+        (2, "`unused` is declared but never used"),
+        (3, "`written` is assigned but never read"),
+        (5, "`count` is assigned but never read"),
+        (7, "`q` is declared but never used"),
+    ]
+
+
+def test_template_interpolations_are_reads():
+    code = (
+        "function f(a) {\n"
+        "  const name = 'x';\n"
+        "  const key = 'k';\n"
+        "  return `hi ${name} and ${ {k: a}[key] } ${`in ${a}`}`;\n"
+        "}\n"
+    )
+    assert _findings(code) == []
+    values = [t.value for t in tokenize(code)[0] if t.line == 4]
+    assert values[:6] == ["return", "`hi ${", "(", "name", ")", "} and ${"]
+    # Braces inside an interpolation don't end it; nested templates are tokenized too
+    assert values[values.index("} ${"):] == ["} ${", "(", "`in ${", "(", "a", ")", "}`", ")", "}`", ";"]
+
+
+def test_regex_and_comments():
+    code = (
+        "const r = /ab[/]c\\/d/g; // a ` in a comment\n"
+        "const d = 4 / 2 / 1; /* block\n"
+        " with a ` */ const e = `x`;\n"
+    )
+    tokens, findings = tokenize(code)
+    assert findings == []
+    assert [(t.kind, t.value) for t in tokens if t.kind in ("regex", "template")] == [
+        ("regex", "/ab[/]c\\/d/g"),
+        ("template", "`x`"),
+    ]
+    assert [t.value for t in tokens if t.line == 2] == ["const", "d", "=", "4", "/", "2", "/", "1", ";"]
+    assert tokens[-1].line == 3
+
+
+def test_unterminated_literals():
+    assert _findings("const s = `abc ${x}\nmore", "syntax") == [(1, "template literal is never closed")]
+    assert _findings("/* open\ncomment", "syntax") == [(1, "block comment is never closed")]
+    assert _findings("const s = 'abc\n", "syntax") == [(1, "string literal is not closed on its line")]
+
+
+def test_concurrent_callers_get_none_when_the_analysis_fails(monkeypatch):
+    def broken(code):
+        raise ValueError("boom")
+
+    monkeypatch.setattr(code_analysis, "analyze", broken)
+
+    async def scenario():
+        analyzer = CodeAnalyzer()
+        results = await asyncio.gather(analyzer.analyze("let x = 1;"), analyzer.analyze("let x = 1;"))
+        return analyzer, results
+
+    analyzer, results = asyncio.run(scenario())
+    assert results == [None, None]
+    assert analyzer.stats["failed"] == 1 and analyzer.stats["cache_hits"] == 1
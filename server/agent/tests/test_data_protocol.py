@@ -0,0 +1,88 @@
+import random
+
+from data_protocol import (
+    Code,
+    CodeBuffer,
+    CodeDelta,
+    CodeResync,
+    compress_text,
+    decode_packet,
+    encode_packet,
+    make_delta,
+    splice_utf16,
+    utf16_len,
+)
+
+
+def test_utf16_offsets_count_astral_characters_as_two_units():
+    text = "a😀b"
+    assert utf16_len(text) == 4
+    # JavaScript: "a😀b".slice(0, 1) + "X" + "a😀b".slice(3) === "aXb"
+    assert splice_utf16(text, 1, 3, "X") == "aXb"
+    assert splice_utf16("héllo", 1, 2, "e") == "hello"
+
+
+def test_make_delta_never_splits_a_surrogate_pair():
+    old, new = "x = '😀';", "x = '😁';"
+    delta = make_delta(old, new, seq=2)
+    assert splice_utf16(old, delta.start, delta.end, delta.text) == new
+    assert delta.length == utf16_len(new)
+
+
+def test_buffer_replays_random_edits_with_non_ascii_text():
+    rng = random.Random(7)
+    alphabet = "ab{}()\n 😀é中"
+    buffer = CodeBuffer()
+    current = "function f() {}\n"
+    buffer.apply(Code(content=current, seq=1))
+    for seq in range(2, 200):
+        chars = list(current)
+        i = rng.randint(0, len(chars))
+        j = min(len(chars), i + rng.randint(0, 3))
+        chars[i:j] = rng.choices(alphabet, k=rng.randint(0, 4))
+        new = "".join(chars)
+        delta = decode_packet(encode_packet(make_delta(current, new, seq, compress_over=8)))
+        buffer.apply(delta)
+        assert buffer.content == new and buffer.seq == seq
+        current = new
+    assert buffer.stats["deltas"] == 198 and buffer.stats["gaps"] == 0
+
+
+def test_compressed_snapshot():
+    buffer = CodeBuffer()
+    assert buffer.apply(Code(z=compress_text("let x = 1;"), seq=3))
+    assert buffer.content == "let x = 1;"
+
+
+def test_gap_drops_deltas_and_requests_one_resync():
+    buffer = CodeBuffer()
+    buffer.apply(Code(content="abc", seq=1))
+    assert not buffer.apply(CodeDelta(seq=3, base_seq=2, start=0, end=0, text="x"))
+    assert buffer.take_resync() == CodeResync(seq=1)
+    assert buffer.take_resync() is None
+    # Until a snapshot arrives, even deltas that look contiguous are dropped
+    assert not buffer.apply(CodeDelta(seq=2, base_seq=1, start=0, end=0, text="x"))
+    assert buffer.content == "abc" and buffer.take_resync() is None
+    assert buffer.apply(Code(content="xabc", seq=4))
+    assert buffer.apply(CodeDelta(seq=5, base_seq=4, start=4, end=4, text="d", length=5))
+    assert buffer.content == "xabcd"
+
+
+def test_unanswered_resync_is_repeated():
+    buffer = CodeBuffer()
+    buffer.apply(CodeDelta(seq=2, base_seq=1, start=0, end=0))
+    assert buffer.take_resync() is not None
+    for seq in range(CodeBuffer.RESYNC_RETRY_AFTER):
+        buffer.apply(CodeDelta(seq=seq + 3, base_seq=seq + 2, start=0, end=0))
+    assert buffer.take_resync() is not None
+
+
+def test_out_of_range_or_length_mismatch_desyncs():
+    buffer = CodeBuffer()
+    buffer.apply(Code(content="a😀", seq=1))
+    assert not buffer.apply(CodeDelta(seq=2, base_seq=1, start=0, end=4, text=""))
+    assert buffer.take_resync() is not None
+
+    buffer.apply(Code(content="abc", seq=5))
+    assert not buffer.apply(CodeDelta(seq=6, base_seq=5, start=0, end=1, text="x", length=99))
+    assert buffer.content == "abc" and buffer.take_resync() == CodeResync(seq=5)
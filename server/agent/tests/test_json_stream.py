@@ -0,0 +1,73 @@
+import json
+import random
+
+import pytest
+
+from json_stream import IncrementalJSONParser
+
+REPORT = {
+    "correctness": False,
+    "code_issues": [
+        {"line_number": 3, "issue": "off by one in `i <= n`", "severity": "error"},
+        {"line_number": 7, "issue": 'quote " and brace } inside a string', "code_snippet": "a[\"k\"]"},
+        {"line_number": 9, "issue": "nested", "extra": {"list": [1, [2, 3]], "x": None}},
+    ],
+    "overall_score": 6.5,
+    "notes": "escaped \\ backslash, unicode é 😀",
+}
+TEXT = "Here is the audit:\n```json\n" + json.dumps(REPORT, indent=2, ensure_ascii=False) + "\n```\nDone."
+EXPECTED = [
+    ("field", "correctness", False),
+    *[("item", "code_issues", i, issue) for i, issue in enumerate(REPORT["code_issues"])],
+    ("field", "code_issues", REPORT["code_issues"]),
+    ("field", "overall_score", 6.5),
+    ("field", "notes", REPORT["notes"]),
+]
+
+
+def _feed(chunks) -> tuple:
+    parser = IncrementalJSONParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return parser, events
+
+
+def test_whole_text():
+    parser, events = _feed([TEXT])
+    assert events == EXPECTED
+    assert parser.done and parser.result() == REPORT
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_arbitrary_split_points(seed):
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(TEXT)), rng.randint(1, 60)))
+    bounds = [0, *cuts, len(TEXT)]
+    parser, events = _feed(TEXT[a:b] for a, b in zip(bounds, bounds[1:]))
+    assert events == EXPECTED
+    assert parser.result() == REPORT
+
+
+def test_one_character_at_a_time():
+    parser, events = _feed(TEXT)
+    assert events == EXPECTED
+
+
+def test_text_after_the_root_is_ignored():
+    parser, events = _feed(['{"a": 1}', ' {"b": 2}'])
+    assert events == [("field", "a", 1)]
+    assert parser.result() == {"a": 1}
+
+
+def test_incomplete_object():
+    parser, events = _feed(['{"a": [1, 2', ', 3'])
+    assert events == [("item", "a", 0, 1), ("item", "a", 1, 2)]
+    assert not parser.done
+    with pytest.raises(ValueError):
+        parser.result()
+
+
+def test_malformed_member_is_skipped():
+    parser, events = _feed(['{"a": tru, "b": [1, nope, 3], "c": 2}'])
+    assert events == [("item", "b", 0, 1), ("item", "b", 2, 3), ("field", "c", 2)]
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+import latency_metrics
+from latency_metrics import TurnTracer, spans_for
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(latency_metrics.time, "perf_counter", clock)
+    return clock
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _user_turn(tracer, clock, events):
+    """Start speaking at 0 and mark (offset, stage) pairs in order"""
+    start = clock.now
+    tracer.start_user_turn()
+    for offset, stage in events:
+        clock.now = start + offset
+        tracer.mark(stage)
+
+
+def test_stt_final_before_vad_end(tmp_path, clock):
+    tracer = TurnTracer("room", jsonl_path=tmp_path / "latency.jsonl")
+    _user_turn(tracer, clock, [
+        (1.0, "stt_final"),  # mid-utterance final, superseded
+        (2.0, "stt_final"),
+        (2.6, "vad_end"),
+        (3.0, "llm_first_token"),
+        (3.5, "llm_last_token"),
+        (3.4, "first_audio_frame"),
+    ])
+    tracer.agent_stopped()
+
+    (record,) = _records(tmp_path / "latency.jsonl")
+    assert record["origin"] == "user"
+    assert record["stages"]["stt_final"] == pytest.approx(2.0)
+    spans = record["spans"]
+    assert spans["stt"] == 0  # the transcript was ready before the end of speech
+    assert spans["llm_ttft"] == pytest.approx(0.4)
+    assert spans["llm_total"] == pytest.approx(0.9)
+    assert spans["turn"] == pytest.approx(0.8)
+
+
+def test_vad_end_before_stt_final(tmp_path, clock):
+    tracer = TurnTracer("room", jsonl_path=tmp_path / "latency.jsonl")
+    _user_turn(tracer, clock, [(2.0, "vad_end"), (2.3, "stt_final"), (2.8, "llm_first_token")])
+    tracer.close()
+
+    (record,) = _records(tmp_path / "latency.jsonl")
+    assert record["spans"]["stt"] == pytest.approx(0.3)
+    assert record["spans"]["llm_ttft"] == pytest.approx(0.5)
+
+
+def test_barge_in_keeps_the_user_turn_open(tmp_path, clock):
+    tracer = TurnTracer("room", jsonl_path=tmp_path / "latency.jsonl")
+    tracer.mark("tts_request_start")  # greeting: an agent turn
+    _user_turn(tracer, clock, [(0.5, "stt_final")])
+    tracer.agent_stopped()  # the greeting was cut off while the user talks
+    clock.now += 1.0
+    tracer.mark("vad_end")
+    tracer.agent_stopped()
+
+    records = _records(tmp_path / "latency.jsonl")
+    assert [r["origin"] for r in records] == ["agent", "user"]
+    assert set(records[1]["stages"]) == {"stt_final", "vad_end"}
+
+
+def test_spans_for_drops_missing_and_negative_spans():
+    assert spans_for({}) == {}
+    spans = spans_for({"tts_request_start": 1.0, "tts_first_byte": 0.5, "vad_end": 0.2})
+    assert "tts_ttfb" not in spans
+    assert spans == {"stt": 0}
@@ -0,0 +1,56 @@
+import random
+
+from deepgram_patch import BYTES_PER_SAMPLE, PcmFramer, pcm_to_frames
+
+
+def _pcm(samples: int) -> bytes:
+    return bytes(i % 251 for i in range(samples * BYTES_PER_SAMPLE))
+
+
+def _frames(framer: PcmFramer, chunks) -> list:
+    frames = []
+    for chunk in chunks:
+        frames.extend(framer.push(chunk))
+    frames.extend(framer.flush())
+    return frames
+
+
+def _split(data: bytes, cuts) -> list:
+    bounds = [0, *sorted(cuts), len(data)]
+    return [data[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_whole_buffer_is_cut_into_fixed_frames_plus_tail():
+    framer = PcmFramer(24000, frame_ms=20)  # 480 samples per frame
+    frames = list(pcm_to_frames(_pcm(480 * 3 + 100), 24000, frame_ms=20))
+    assert [f.samples_per_channel for f in frames] == [480, 480, 480, 100]
+    assert framer.frame_bytes == 960
+
+
+def test_frames_carry_across_chunk_boundaries():
+    data = _pcm(480 * 5 + 37)
+    expected = b"".join(bytes(f.data) for f in pcm_to_frames(data, 24000, frame_ms=20))
+    rng = random.Random(4)
+    for _ in range(50):
+        cuts = rng.sample(range(1, len(data)), rng.randint(1, 40))
+        framer = PcmFramer(24000, frame_ms=20)
+        frames = _frames(framer, _split(data, cuts))
+        assert b"".join(bytes(f.data) for f in frames) == expected
+        assert all(f.samples_per_channel == 480 for f in frames[:-1])
+        assert framer.total_bytes == len(data)
+
+
+def test_chunk_smaller_than_a_frame_is_held_until_complete():
+    framer = PcmFramer(16000, frame_ms=10)  # 160 samples, 320 bytes
+    data = _pcm(160)
+    assert list(framer.push(data[:100])) == []
+    assert list(framer.push(data[100:300])) == []
+    frames = list(framer.push(data[300:]))
+    assert len(frames) == 1 and bytes(frames[0].data) == data
+    assert list(framer.flush()) == []
+
+
+def test_flush_drops_a_dangling_half_sample():
+    framer = PcmFramer(24000, frame_ms=20)
+    frames = _frames(framer, [_pcm(10) + b"\x01"])
+    assert [f.samples_per_channel for f in frames] == [10]
@@ -0,0 +1,121 @@
+import asyncio
+import os
+
+import transcript_log
+from transcript_log import TranscriptLog, find_orphans, load_session, recover_orphans, valid_length
+
+
+def _write_session(path, turns=3, close=True) -> TranscriptLog:
+    log = TranscriptLog(path, "room-1")
+    log.problem("Two Sum", "Find two numbers")
+    for i in range(turns):
+        log.turn("user" if i % 2 == 0 else "assistant", f"turn {i}")
+    if close:
+        log.close()
+    else:
+        os.close(log._fd)  # the process died: no End record
+    return log
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "room-1.log"
+
+    async def session():
+        log = TranscriptLog(path, "room-1", code_interval_s=60)
+        log.problem("Two Sum", "Find two numbers")
+        log.code("let a;")
+        log.code("let a = 1;")  # within the interval: written on close
+        log.turn("user", "I'd use a hash map")
+        log.turn("assistant", "Why?")
+        log.close()
+        return log
+
+    log = asyncio.run(session())
+    assert log.stats["code_snapshots"] == 2
+    session_log = load_session(path)
+    assert session_log.session_id == "room-1"
+    assert session_log.problem_title == "Two Sum"
+    assert session_log.final_code == "let a = 1;"
+    assert session_log.chunks == ["CANDIDATE: I'd use a hash map\nSOCRATIS: Why?"]
+    assert session_log.ended == "ended"
+    assert session_log.valid_bytes == os.path.getsize(path)
+
+
+def test_transcript_is_chunked(tmp_path):
+    path = tmp_path / "room-1.log"
+    _write_session(path, turns=40)
+    chunks = load_session(path, chunk_chars=60).chunks
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    assert "".join(chunks).count("turn ") == 40
+
+
+def test_truncated_tail_is_ignored(tmp_path):
+    path = tmp_path / "room-1.log"
+    _write_session(path, close=False)
+    intact = os.path.getsize(path)
+    for cut in range(1, 12):
+        with open(path, "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00partial body"[:cut])
+        assert valid_length(path) == intact
+        assert load_session(path).turns == 3
+        os.truncate(path, intact)
+
+
+def test_crc_corruption_stops_at_the_bad_record(tmp_path):
+    path = tmp_path / "room-1.log"
+    _write_session(path, close=False)
+    before = os.path.getsize(path)
+    log = TranscriptLog(path, "room-1")
+    log.turn("user", "corrupt me")
+    log.close()
+    data = bytearray(path.read_bytes())
+    # Flip a byte inside the first record the second writer appended
+    data[before + 10] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert valid_length(path) == before
+    session = load_session(path)
+    assert session.turns == 3 and session.ended is None
+
+
+def test_reopening_drops_a_torn_tail(tmp_path):
+    path = tmp_path / "room-1.log"
+    _write_session(path, close=False)
+    intact = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b"\xff\xff")
+    log = TranscriptLog(path, "room-1")
+    log.turn("user", "after the crash")
+    log.close()
+    session = load_session(path)
+    assert session.turns == 4 and session.ended == "ended"
+    assert session.valid_bytes == os.path.getsize(path) > intact
+
+
+def test_orphan_recovery(tmp_path, monkeypatch):
+    _write_session(tmp_path / "orphan.log", close=False)
+    _write_session(tmp_path / "silent.log", turns=0, close=False)
+    _write_session(tmp_path / "done.log")
+    orphan = tmp_path / "orphan.log"
+    with open(orphan, "ab") as f:
+        f.write(b"\x10\x00")  # torn tail from the crash
+    monkeypatch.setattr(transcript_log, "_pid_alive", lambda pid: False)
+
+    assert sorted(path.name for path, _ in find_orphans(tmp_path)) == ["orphan.log", "silent.log"]
+    enqueued = []
+    counts = recover_orphans(lambda *args: enqueued.append(args), tmp_path)
+    assert counts == {"recovered": 1, "discarded": 1, "failed": 0}
+    session_id, snapshot, key = enqueued[0]
+    assert (session_id, key) == ("room-1", "room-1:recovered")
+    assert snapshot["transcript_log"] == str(orphan) and snapshot["problem_title"] == "Two Sum"
+    assert not (tmp_path / "silent.log").exists()
+
+    # Closed with the torn tail cut off; a second pass finds nothing
+    session = load_session(orphan)
+    assert session.ended == "recovered" and session.valid_bytes == os.path.getsize(orphan)
+    assert recover_orphans(lambda *args: enqueued.append(args), tmp_path)["recovered"] == 0
+
+
+def test_live_process_is_not_an_orphan(tmp_path):
+    _write_session(tmp_path / "live.log", close=False)
+    assert find_orphans(tmp_path) == []
@@ -0,0 +1,44 @@
+import asyncio
+
+from tts_cache import TTSCache
+
+MODEL, RATE = "aura-helios-en", 24000
+
+
+def test_stock_phrases_are_admitted_at_once():
+    cache = TTSCache(cache_dir=None)
+    cache.add_stock_phrases(["Hello!  I'm Socratis."])
+    assert cache.admit(MODEL, RATE, "Hello! I'm Socratis.")
+
+
+def test_other_phrases_need_repeat_sightings():
+    cache = TTSCache(cache_dir=None, admit_after=2)
+    reply = "Your loop reads xs[i + 1] on the last pass."
+    assert not cache.admit(MODEL, RATE, reply)
+    assert cache.admit(MODEL, RATE, reply)
+    assert cache.get_stats()["not_admitted"] == 1
+
+    stock_only = TTSCache(cache_dir=None, admit_after=0)
+    assert not stock_only.admit(MODEL, RATE, "Take your time.")
+    assert not stock_only.admit(MODEL, RATE, "Take your time.")
+    assert not stock_only.admit(MODEL, RATE, "x" * 500)  # too long to cache at all
+
+
+def test_sightings_are_bounded():
+    cache = TTSCache(cache_dir=None, admit_after=2, max_tracked=2)
+    cache.admit(MODEL, RATE, "one")
+    cache.admit(MODEL, RATE, "two")
+    cache.admit(MODEL, RATE, "three")  # forgets "one"
+    assert not cache.admit(MODEL, RATE, "one")
+
+
+def test_disk_tier_is_pruned_to_its_budget(tmp_path):
+    async def scenario():
+        cache = TTSCache(cache_dir=tmp_path, disk_budget_bytes=3000)
+        for i in range(5):
+            await cache.store(MODEL, RATE, f"phrase {i}", bytes(1000))
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert sum(p.stat().st_size for p in tmp_path.glob("*.pcm")) <= 3000
+    assert cache.stats["disk_evictions"] >= 2
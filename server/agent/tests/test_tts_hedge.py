@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+import tts_hedge
+from fake_services import FakeServices
+from tts_hedge import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, HedgedTTSClient, TTSRequestError
+
+HEADERS = {"Authorization": "Token test"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ScriptedFaults:
+    """Stands in for FakeServices' RNG: one value per speak request, then no faults"""
+
+    def __init__(self, *values):
+        self.values = list(values)
+
+    def random(self):
+        return self.values.pop(0) if self.values else 0.99
+
+
+def test_breaker_transitions(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tts_hedge.time, "monotonic", clock)
+    breaker = CircuitBreaker(failure_threshold=3, reset_after_s=10)
+
+    breaker.failure()
+    breaker.failure()
+    breaker.success()  # not consecutive any more
+    for _ in range(2):
+        breaker.failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.failure()
+    assert breaker.state == OPEN and breaker.trips == 1
+    assert not breaker.allow()
+
+    clock.now += 10
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # a single probe at a time
+    breaker.failure()
+    assert breaker.state == OPEN and breaker.trips == 2
+    assert not breaker.allow()
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release()  # the probe was cancelled: the next request probes instead
+    assert breaker.allow() and not breaker.allow()
+    breaker.success()
+    assert breaker.state == CLOSED and breaker.failures == 0 and breaker.allow()
+
+
+async def _with_fake_tts(faults: ScriptedFaults, client: HedgedTTSClient, requests: int = 1, **fake_options):
+    """Run `requests` speak requests through `client`; returns (results, fake service stats)"""
+    services = FakeServices(tts_latency_s=0.02, **fake_options)
+    services.set_fault_source(faults)
+    runner, port = await services.start()
+    url = f"http://127.0.0.1:{port}/v1/speak?model=aura&encoding=linear16&sample_rate=24000"
+    results = []
+    try:
+        async with aiohttp.ClientSession() as session:
+            for _ in range(requests):
+                started = time.perf_counter()
+                try:
+                    audio = b"".join([chunk async for chunk in client.stream(session, url, {"text": "hello"}, HEADERS)])
+                    results.append((audio, time.perf_counter() - started))
+                except Exception as e:
+                    results.append((e, time.perf_counter() - started))
+            # Let the losing request's observer finish before the server goes away
+            await asyncio.gather(*client._observers, return_exceptions=True)
+    finally:
+        await runner.cleanup()
+    return results, services.stats
+
+
+def test_hedge_wins_over_a_stalled_request():
+    client = HedgedTTSClient(initial_deadline_s=0.1, observe_s=0.2)
+    results, stats = asyncio.run(_with_fake_tts(ScriptedFaults(0.0), client, tts_stall_rate=0.5, tts_stall_s=2.0))
+    audio, elapsed = results[0]
+    assert isinstance(audio, bytes) and audio
+    assert elapsed < 1.0
+    assert stats["speak_requests"] == 2 and stats["speak_stalls"] == 1
+    assert client.stats["hedged"] == 1 and client.stats["hedge_wins"] == 1
+    # The stalled primary stayed silent past the observe window: a lower bound was recorded
+    assert client.stats["saved_censored"] == 1 and client.saved.count == 1
+
+
+def test_fast_retryable_failure_is_retried_at_once():
+    client = HedgedTTSClient(initial_deadline_s=1.5)
+    results, stats = asyncio.run(_with_fake_tts(ScriptedFaults(0.0), client, tts_error_rate=0.5))
+    audio, elapsed = results[0]
+    assert isinstance(audio, bytes) and audio
+    assert elapsed < 1.0  # did not wait for the hedge deadline
+    assert stats["speak_errors"] == 1
+    assert client.stats["retried"] == 1 and client.stats["failed"] == 0
+
+
+def test_fast_retries_count_against_the_hedge_budget():
+    client = HedgedTTSClient(initial_deadline_s=1.5, max_hedge_ratio=0.0, failure_threshold=100)
+    requests = tts_hedge.HEDGE_BURST + 3
+    results, stats = asyncio.run(_with_fake_tts(ScriptedFaults(), client, requests=requests, tts_error_rate=1.0))
+    assert all(isinstance(result, TTSRequestError) for result, _ in results)
+    # Only the burst allowance is retried; the rest fail without a second request
+    assert stats["speak_requests"] == requests + tts_hedge.HEDGE_BURST
+    assert client.stats["retried"] == tts_hedge.HEDGE_BURST
+    assert client.stats["budget_skipped"] == 3
+
+
+def test_breaker_opens_on_repeated_failures_and_rejects():
+    client = HedgedTTSClient(hedge=False, failure_threshold=2, reset_after_s=60)
+    results, stats = asyncio.run(_with_fake_tts(ScriptedFaults(), client, requests=4, tts_error_rate=1.0))
+    errors = [type(result) for result, _ in results]
+    assert errors == [TTSRequestError, TTSRequestError, CircuitOpenError, CircuitOpenError]
+    assert stats["speak_requests"] == 2
+    assert client.stats["rejected"] == 2
+    breaker, = client._breakers.values()
+    assert breaker.state == OPEN and breaker.trips == 1
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    client = HedgedTTSClient(failure_threshold=1)
+
+    async def bad_rate():
+        services = FakeServices(tts_latency_s=0.0)
+        runner, port = await services.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                url = f"http://127.0.0.1:{port}/v1/speak?encoding=linear16&sample_rate=44100"
+                with pytest.raises(TTSRequestError) as raised:
+                    async for _ in client.stream(session, url, {"text": "hi"}, HEADERS):
+                        pass
+                return raised.value
+        finally:
+            await runner.cleanup()
+
+    error = asyncio.run(bad_rate())
+    assert error.status == 400 and not error.retryable
+    assert client.stats["retried"] == 0 and client.stats["failed"] == 0
+    breaker, = client._breakers.values()
+    assert breaker.state == CLOSED
@@ -0,0 +1,326 @@
+"""
+Append-only per-session transcript log
+Every problem event, code snapshot and conversation turn is appended as it happens to
+<TRANSCRIPT_LOG_DIR>/<session>.log, so the interview survives a crash of the job
+process. Records are length-prefixed msgpack with a CRC:
+
+    [u32 length][u32 crc32][msgpack body]   (little-endian)
+
+A torn tail from a crash fails its length or CRC check and is ignored. The report stage
+reads the file through mmap and streams turns into transcript chunks instead of
+rebuilding the conversation from the in-memory chat context.
+
+Logs of sessions whose process died (no `End` record, owner PID gone) are orphans; the
+worker recovers them on restart and enqueues their reports.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import re
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+import msgspec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_DIR = Path(__file__).parent / ".transcripts"
+
+_FRAME = struct.Struct("<II")
+# Upper bound for one record (a pasted 1 MB buffer fits; garbage lengths don't)
+MAX_RECORD_BYTES = 4 * 1024 * 1024
+
+
+class Open(msgspec.Struct, tag="open"):
+    session_id: str
+    pid: int
+    at: float
+
+
+class ProblemEvent(msgspec.Struct, tag="problem"):
+    title: str
+    description: str
+    at: float
+
+
+class CodeSnapshot(msgspec.Struct, tag="code"):
+    content: str
+    at: float
+
+
+class Turn(msgspec.Struct, tag="turn"):
+    role: str  # user | assistant
+    text: str
+    at: float
+
+
+class End(msgspec.Struct, tag="end"):
+    reason: str
+    at: float
+
+
+Record = Union[Open, ProblemEvent, CodeSnapshot, Turn, End]
+
+_encoder = msgspec.msgpack.Encoder()
+_decoder = msgspec.msgpack.Decoder(Record)
+
+
+def log_path(log_dir, session_id: str) -> Path:
+    return Path(log_dir) / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', session_id)}.log"
+
+
+class TranscriptLog:
+    """
+    Writer for one session. Appends are single `os.write` calls on an O_APPEND fd (no
+    user-space buffer to lose). Code snapshots arrive at keystroke rate, so at most one
+    per `code_interval_s` is written; the latest one is always written on close.
+    """
+
+    def __init__(self, path, session_id: str, code_interval_s: float = 2.0):
+        self.path = Path(path)
+        self.session_id = session_id
+        self.code_interval_s = code_interval_s
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        # A job re-dispatched to the same room continues the log; drop a torn tail first
+        if os.fstat(self._fd).st_size:
+            os.ftruncate(self._fd, valid_length(self.path))
+        self._last_code = None
+        self._pending_code = None
+        self._code_timer = None
+        self._last_code_at = float("-inf")
+        self.turns = 0
+        self.stats = {"records": 0, "bytes": 0, "code_snapshots": 0, "code_skipped": 0}
+        self._append(Open(session_id=session_id, pid=os.getpid(), at=time.time()))
+
+    @classmethod
+    def from_env(cls, session_id: str) -> Optional["TranscriptLog"]:
+        """The session's log, or None with TRANSCRIPT_LOG=0"""
+        if os.environ.get("TRANSCRIPT_LOG", "1") == "0":
+            return None
+        log_dir = os.environ.get("TRANSCRIPT_LOG_DIR", str(DEFAULT_LOG_DIR))
+        return cls(
+            log_path(log_dir, session_id),
+            session_id,
+            code_interval_s=float(os.environ.get("TRANSCRIPT_CODE_INTERVAL_S", "2")),
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self._fd is None
+
+    def _append(self, record):
+        if self._fd is None:
+            return
+        body = _encoder.encode(record)
+        os.write(self._fd, _FRAME.pack(len(body), zlib.crc32(body)) + body)
+        self.stats["records"] += 1
+        self.stats["bytes"] += _FRAME.size + len(body)
+
+    def problem(self, title: str, description: str):
+        self._append(ProblemEvent(title=title, description=description, at=time.time()))
+
+    def turn(self, role: str, text: str):
+        if text:
+            self._append(Turn(role=role, text=text, at=time.time()))
+            self.turns += 1
+
+    def code(self, content: str):
+        """Record the latest buffer. Safe to call from sync event handlers on the loop."""
+        if content == self._last_code:
+            return
+        self._pending_code = content
+        if self._code_timer is not None:
+            self.stats["code_skipped"] += 1
+            return
+        loop = asyncio.get_running_loop()
+        delay = self._last_code_at + self.code_interval_s - loop.time()
+        if delay <= 0:
+            self._write_code()
+        else:
+            self._code_timer = loop.call_later(delay, self._write_code)
+
+    def _write_code(self):
+        self._code_timer = None
+        content, self._pending_code = self._pending_code, None
+        if content is None or content == self._last_code:
+            return
+        self._append(CodeSnapshot(content=content, at=time.time()))
+        self._last_code = content
+        self._last_code_at = asyncio.get_running_loop().time()
+        self.stats["code_snapshots"] += 1
+
+    def close(self, reason: str = "ended"):
+        if self._fd is None:
+            return
+        if self._code_timer is not None:
+            self._code_timer.cancel()
+            self._code_timer = None
+        if self._pending_code is not None and self._pending_code != self._last_code:
+            self._append(CodeSnapshot(content=self._pending_code, at=time.time()))
+            self.stats["code_snapshots"] += 1
+        self._append(End(reason=reason, at=time.time()))
+        os.fsync(self._fd)
+        os.close(self._fd)
+        self._fd = None
+
+
+# ============================================================================
+# READING
+# ============================================================================
+
+def valid_length(path) -> int:
+    """Bytes up to the end of the last intact record"""
+    end = 0
+    for _, end in _scan(path):
+        pass
+    return end
+
+
+def _scan(path):
+    """(record, end offset) pairs in order via mmap; stops at the first torn or corrupt record"""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            offset = 0
+            while offset + _FRAME.size <= size:
+                length, crc = _FRAME.unpack_from(view, offset)
+                start = offset + _FRAME.size
+                if length > MAX_RECORD_BYTES or start + length > size:
+                    logger.warning(f"[TRANSCRIPT] {Path(path).name}: torn record at byte {offset}, ignoring the tail")
+                    return
+                body = view[start:start + length]
+                if zlib.crc32(body) != crc:
+                    logger.warning(f"[TRANSCRIPT] {Path(path).name}: bad checksum at byte {offset}, ignoring the tail")
+                    return
+                offset = start + length
+                yield _decoder.decode(body), offset
+
+
+@dataclass
+class SessionLog:
+    """What the report needs from a log, with the transcript already split into chunks"""
+    session_id: str = ""
+    pid: int = 0
+    problem_title: str = "the coding task"
+    problem_desc: str = ""
+    final_code: str = ""
+    chunks: list = field(default_factory=list)
+    turns: int = 0
+    ended: Optional[str] = None  # End.reason, None if the log was never closed
+    valid_bytes: int = 0
+
+
+def load_session(path, chunk_chars: int = 12000) -> SessionLog:
+    """
+    Stream a log into a SessionLog. Transcript lines go straight into chunks of at most
+    ~chunk_chars (the report engine's map step), never into one whole-interview string.
+    """
+    session = SessionLog()
+    current, size = [], 0
+    for record, session.valid_bytes in _scan(path):
+        if isinstance(record, Turn):
+            role = "CANDIDATE" if record.role == "user" else "SOCRATIS"
+            line = f"{role}: {record.text}\n"
+            if current and size + len(line) > chunk_chars:
+                session.chunks.append("".join(current))
+                current, size = [], 0
+            current.append(line)
+            size += len(line)
+            session.turns += 1
+        elif isinstance(record, CodeSnapshot):
+            session.final_code = record.content
+        elif isinstance(record, ProblemEvent):
+            session.problem_title = record.title
+            session.problem_desc = record.description
+        elif isinstance(record, Open):
+            session.session_id = record.session_id
+            session.pid = record.pid
+            session.ended = None  # continued by a later job
+        elif isinstance(record, End):
+            session.ended = record.reason
+    if current:
+        # Drop the trailing newline so a single chunk equals build_transcript's output
+        current[-1] = current[-1].rstrip("\n")
+        session.chunks.append("".join(current))
+    return session
+
+
+# ============================================================================
+# ORPHAN RECOVERY
+# ============================================================================
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def find_orphans(log_dir=None):
+    """(path, SessionLog) for every log that was never closed and whose process is gone"""
+    log_dir = Path(log_dir or os.environ.get("TRANSCRIPT_LOG_DIR", str(DEFAULT_LOG_DIR)))
+    if not log_dir.is_dir():
+        return []
+    orphans = []
+    for path in sorted(log_dir.glob("*.log")):
+        try:
+            session = load_session(path)
+        except Exception as e:
+            logger.error(f"[TRANSCRIPT] Unreadable log {path.name}: {e}")
+            continue
+        if session.ended is None and not _pid_alive(session.pid):
+            orphans.append((path, session))
+    return orphans
+
+
+def recover_orphans(enqueue, log_dir=None) -> dict:
+    """
+    Close every orphaned log and hand sessions with conversation to `enqueue(session_id,
+    snapshot, idempotency_key)`. Logs without turns are removed. Returns counts.
+    """
+    counts = {"recovered": 0, "discarded": 0, "failed": 0}
+    for path, session in find_orphans(log_dir):
+        try:
+            if session.turns == 0:
+                path.unlink(missing_ok=True)
+                counts["discarded"] += 1
+                continue
+            # The key makes a repeated recovery (crash before the End below) a no-op
+            enqueue(
+                session.session_id,
+                {
+                    "problem_title": session.problem_title,
+                    "final_code": session.final_code,
+                    "transcript_log": str(path),
+                },
+                f"{session.session_id}:recovered",
+            )
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.ftruncate(fd, session.valid_bytes)
+                body = _encoder.encode(End(reason="recovered", at=time.time()))
+                os.write(fd, _FRAME.pack(len(body), zlib.crc32(body)) + body)
+            finally:
+                os.close(fd)
+            counts["recovered"] += 1
+            logger.warning(
+                f"[TRANSCRIPT] Recovered orphaned session {session.session_id} "
+                f"({session.turns} turns, pid {session.pid}); report enqueued"
+            )
+        except Exception as e:
+            counts["failed"] += 1
+            logger.error(f"[TRANSCRIPT] Failed to recover {path.name}: {e}")
+    return counts
@@ -0,0 +1,254 @@
+"""
+Two-tier TTS audio cache
+In-memory LRU (bounded by bytes) in front of an on-disk PCM store bounded by
+TTS_CACHE_DISK_MB. Keyed by (model, sample_rate, normalized text).
+
+Only stock phrases (the greetings and other fixed prompts, registered at prewarm) and
+phrases synthesized TTS_CACHE_ADMIT_AFTER times in this process are stored. Most LLM
+replies are specific to one candidate's interview: they are never worth a cache slot,
+and must not end up on disk across sessions.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".tts_cache"
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different renderings share an entry"""
+    return " ".join(text.split())
+
+
+def cache_key(model: str, sample_rate: int, text: str) -> str:
+    raw = f"{model}|{sample_rate}|{normalize_text(text)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Memory tier: OrderedDict LRU holding raw linear16 bytes, evicted by byte budget.
+    Disk tier: one .pcm file per key, written atomically. Hits refresh the file's mtime;
+    when the directory grows past its byte budget the least recently used files are deleted.
+    Job processes share the directory, so the budget is enforced by rescanning it.
+
+    Admission: `admit()` says whether a phrase that missed should be stored. Sightings of
+    other phrases are counted by key hash only, in a bounded LRU.
+    """
+
+    def __init__(
+        self,
+        memory_budget_bytes: int = 32 * 1024 * 1024,
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+        max_text_chars: int = 240,
+        disk_budget_bytes: int = 256 * 1024 * 1024,
+        admit_after: int = 2,
+        max_tracked: int = 4096,
+    ):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_text_chars = max_text_chars
+        self.disk_budget_bytes = disk_budget_bytes
+        self.admit_after = admit_after
+        self.max_tracked = max_tracked
+
+        self._stock = set()
+        self._sightings: "OrderedDict[str, int]" = OrderedDict()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "stores": 0,
+            "disk_evictions": 0,
+            "not_admitted": 0,
+        }
+
+        self._disk_bytes = 0
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._prune_disk()
+
+    @classmethod
+    def from_env(cls) -> "TTSCache":
+        cache_dir = os.environ.get("TTS_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+        return cls(
+            memory_budget_bytes=int(float(os.environ.get("TTS_CACHE_MEMORY_MB", "32")) * 1024 * 1024),
+            cache_dir=Path(cache_dir) if cache_dir else None,
+            max_text_chars=int(os.environ.get("TTS_CACHE_MAX_TEXT_CHARS", "240")),
+            disk_budget_bytes=int(float(os.environ.get("TTS_CACHE_DISK_MB", "256")) * 1024 * 1024),
+            admit_after=int(os.environ.get("TTS_CACHE_ADMIT_AFTER", "2")),
+        )
+
+    def cacheable(self, text: str) -> bool:
+        """Only short, repeatable phrases are worth caching"""
+        return 0 < len(normalize_text(text)) <= self.max_text_chars
+
+    def add_stock_phrases(self, phrases):
+        """Fixed phrases that are always stored"""
+        self._stock.update(normalize_text(phrase) for phrase in phrases)
+
+    def admit(self, model: str, sample_rate: int, text: str) -> bool:
+        """
+        Whether to store `text` after a miss: stock phrases always, anything else once it
+        has been synthesized `admit_after` times (never, with 0). Counts this sighting.
+        """
+        if not self.cacheable(text):
+            return False
+        if normalize_text(text) in self._stock:
+            return True
+        if self.admit_after <= 0:
+            self.stats["not_admitted"] += 1
+            return False
+
+        key = cache_key(model, sample_rate, text)
+        seen = self._sightings.pop(key, 0) + 1
+        self._sightings[key] = seen
+        if len(self._sightings) > self.max_tracked:
+            self._sightings.popitem(last=False)
+        if seen >= self.admit_after:
+            return True
+        self.stats["not_admitted"] += 1
+        return False
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _remember(self, key: str, pcm: bytes):
+        if len(pcm) > self.memory_budget_bytes:
+            return
+        if key in self._entries:
+            self._memory_bytes -= len(self._entries.pop(key))
+        self._entries[key] = pcm
+        self._memory_bytes += len(pcm)
+
+        while self._memory_bytes > self.memory_budget_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pcm"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            # The bytes are kept in the memory tier anyway, so a plain read is all it takes
+            pcm = path.read_bytes()
+            if not pcm:
+                return None
+            os.utime(path)  # recency for the disk tier's eviction
+            return pcm
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"[TTSCache] Failed to read {path.name}: {e}")
+            return None
+
+    def _write_disk(self, key: str, pcm: bytes):
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"[TTSCache] Failed to write {path.name}: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+        self._disk_bytes += len(pcm)
+        if self._disk_bytes > self.disk_budget_bytes:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete least recently used files until the directory is under 90% of its budget"""
+        entries, total = [], 0
+        for path in self.cache_dir.glob("*.pcm"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue  # evicted by another process meanwhile
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total > self.disk_budget_bytes:
+            target = self.disk_budget_bytes * 0.9
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.stats["disk_evictions"] += 1
+        self._disk_bytes = total
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def lookup(self, model: str, sample_rate: int, text: str) -> Optional[bytes]:
+        if not self.cacheable(text):
+            return None
+
+        key = cache_key(model, sample_rate, text)
+        pcm = self._entries.get(key)
+        if pcm is not None:
+            self._entries.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return pcm
+
+        if self.cache_dir:
+            pcm = await asyncio.to_thread(self._read_disk, key)
+            if pcm is not None:
+                self.stats["disk_hits"] += 1
+                self._remember(key, pcm)
+                return pcm
+
+        self.stats["misses"] += 1
+        return None
+
+    async def store(self, model: str, sample_rate: int, text: str, pcm: bytes):
+        if not pcm or not self.cacheable(text):
+            return
+
+        key = cache_key(model, sample_rate, text)
+        self._remember(key, pcm)
+        self.stats["stores"] += 1
+        if self.cache_dir:
+            await asyncio.to_thread(self._write_disk, key, pcm)
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._entries),
+            "memory_bytes": self._memory_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "stock_phrases": len(self._stock),
+            "disk_bytes": self._disk_bytes,
+            "disk_budget_bytes": self.disk_budget_bytes,
+        }
+
+
+_cache: Optional[TTSCache] = None
+
+
+def get_cache() -> TTSCache:
+    """Process-wide cache instance"""
+    global _cache
+    if _cache is None:
+        _cache = TTSCache.from_env()
+    return _cache
@@ -0,0 +1,331 @@
+"""
+Hedged TTS requests with circuit breaking
+One slow Deepgram response used to freeze the interviewer's voice until the session's
+30 s timeout. Every speak request now goes through a small resilience layer:
+
+    - Hedging: if the first audio byte hasn't arrived by an adaptive deadline (the p95
+      of recent time-to-first-byte, clamped to [TTS_HEDGE_MIN_MS, TTS_HEDGE_MAX_MS]), an
+      identical request is sent. Whichever produces audio first is streamed; the other
+      is cancelled. A request that fails fast with a retryable status is hedged at once.
+      Hedges are capped at TTS_HEDGE_MAX_RATIO of requests so a slow endpoint doesn't
+      get double the load.
+    - Circuit breaking: TTS_BREAKER_FAILURES consecutive failures open the endpoint's
+      breaker; requests then fail immediately instead of waiting on it. After
+      TTS_BREAKER_RESET_S one probe (never hedged) is let through: success closes the
+      breaker, failure re-opens it.
+    - Metrics: how often hedging fired and won, and the tail latency it saved. To
+      measure that, a losing primary is not cancelled until its first byte arrives (or
+      TTS_HEDGE_OBSERVE_MS passes); its audio is never read.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from latency_metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+HEDGE_BURST = 3
+
+
+class CircuitOpenError(Exception):
+    """The endpoint's breaker is open; the request was not sent"""
+
+
+class TTSRequestError(Exception):
+    def __init__(self, status: int, body: str):
+        super().__init__(f"Deepgram API error {status}: {body}")
+        self.status = status
+
+    @property
+    def retryable(self) -> bool:
+        return self.status >= 500 or self.status in (408, 429)
+
+
+def _retryable(error: BaseException) -> bool:
+    if isinstance(error, TTSRequestError):
+        return error.retryable
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError))
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one endpoint with a single half-open probe"""
+
+    def __init__(self, failure_threshold: int = 5, reset_after_s: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_after_s:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self):
+        """A probe that ended without a verdict (cancelled); let the next request probe"""
+        self._probing = False
+
+    def success(self):
+        if self.state != CLOSED:
+            logger.info("[TTSHedge] Breaker closed: probe succeeded")
+        self.state = CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._probing = False
+            self.trips += 1
+            logger.warning(
+                f"[TTSHedge] Breaker open after {self.failures} consecutive failure(s); "
+                f"probing again in {self.reset_after_s:g}s"
+            )
+
+
+class HedgedTTSClient:
+    """Process-wide: deadlines, budgets and breakers are shared by every session in the process"""
+
+    def __init__(self, hedge: bool = True, initial_deadline_s: float = 0.8, min_deadline_s: float = 0.15,
+                 max_deadline_s: float = 2.0, percentile: float = 95, window: int = 200, min_samples: int = 20,
+                 max_hedge_ratio: float = 0.1, failure_threshold: int = 5, reset_after_s: float = 10.0,
+                 read_timeout_s: float = 5.0, observe_s: float = 2.0):
+        self.hedge = hedge
+        self.initial_deadline_s = initial_deadline_s
+        self.min_deadline_s = min_deadline_s
+        self.max_deadline_s = max_deadline_s
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self.read_timeout_s = read_timeout_s
+        self.observe_s = observe_s
+
+        self._ttfb_window = deque(maxlen=window)
+        self._deadline_s = initial_deadline_s
+        self._breakers = {}
+        self._observers = set()
+        self.ttfb = LatencyHistogram()  # as experienced by the caller, hedging included
+        self.saved = LatencyHistogram()  # losing primary's first byte minus the hedge's
+        self.stats = {
+            "requests": 0,
+            "hedged": 0,  # a second request was sent
+            "hedge_wins": 0,  # ...and it produced audio first
+            "retried": 0,  # hedged immediately because the first request failed
+            "budget_skipped": 0,  # deadline passed but the hedge budget was spent
+            "failed": 0,
+            "rejected": 0,  # breaker open, not sent
+            "saved_censored": 0,  # losing primary still silent after TTS_HEDGE_OBSERVE_MS (a lower bound is recorded)
+        }
+
+    @classmethod
+    def from_env(cls) -> "HedgedTTSClient":
+        return cls(
+            hedge=os.environ.get("TTS_HEDGE", "1") != "0",
+            initial_deadline_s=float(os.environ.get("TTS_HEDGE_INITIAL_MS", "800")) / 1000,
+            min_deadline_s=float(os.environ.get("TTS_HEDGE_MIN_MS", "150")) / 1000,
+            max_deadline_s=float(os.environ.get("TTS_HEDGE_MAX_MS", "2000")) / 1000,
+            percentile=float(os.environ.get("TTS_HEDGE_PERCENTILE", "95")),
+            max_hedge_ratio=float(os.environ.get("TTS_HEDGE_MAX_RATIO", "0.1")),
+            failure_threshold=int(os.environ.get("TTS_BREAKER_FAILURES", "5")),
+            reset_after_s=float(os.environ.get("TTS_BREAKER_RESET_S", "10")),
+            read_timeout_s=float(os.environ.get("TTS_READ_TIMEOUT_S", "5")),
+            observe_s=float(os.environ.get("TTS_HEDGE_OBSERVE_MS", "2000")) / 1000,
+        )
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        endpoint = urlsplit(url).netloc
+        if endpoint not in self._breakers:
+            self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_after_s)
+        return self._breakers[endpoint]
+
+    def hedge_deadline(self) -> float:
+        return self._deadline_s
+
+    def _observe_ttfb(self, ttfb: float):
+        self._ttfb_window.append(ttfb)
+        if len(self._ttfb_window) >= self.min_samples:
+            ordered = sorted(self._ttfb_window)
+            p = ordered[min(len(ordered) - 1, int(self.percentile / 100 * len(ordered)))]
+            self._deadline_s = min(self.max_deadline_s, max(self.min_deadline_s, p))
+
+    def _may_hedge(self) -> bool:
+        # A small burst allowance so a process that has sent few requests can still hedge
+        if self.stats["hedged"] < HEDGE_BURST + self.max_hedge_ratio * self.stats["requests"]:
+            return True
+        self.stats["budget_skipped"] += 1
+        return False
+
+    # --- requests ------------------------------------------------------------
+
+    async def stream(self, session: aiohttp.ClientSession, url: str, body: dict, headers: dict):
+        """Yield the response body of a speak request in chunks as they arrive"""
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(f"TTS endpoint {urlsplit(url).netloc} is failing; circuit open")
+        probe = breaker.state == HALF_OPEN
+        self.stats["requests"] += 1
+
+        try:
+            resp, first = await self._race(session, url, body, headers, hedge=self.hedge and not probe)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if _retryable(e):
+                self.stats["failed"] += 1
+                breaker.failure()
+            else:
+                breaker.success()  # the endpoint answered; the request itself was bad
+            raise
+        # Audio is flowing: that is the health signal
+        breaker.success()
+
+        try:
+            if first:
+                yield first
+            while True:
+                chunk = await resp.content.readany()
+                if not chunk:
+                    break
+                yield chunk
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.stats["failed"] += 1
+            breaker.failure()
+            raise
+        finally:
+            resp.release()
+
+    async def _attempt(self, session, url: str, body: dict, headers: dict):
+        """POST and wait for the first body chunk: (response, first chunk, loop time it arrived)"""
+        resp = await session.post(
+            url,
+            json=body,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=self.read_timeout_s),
+        )
+        try:
+            if resp.status != 200:
+                raise TTSRequestError(resp.status, await resp.text())
+            first = await resp.content.readany()
+            return resp, first, asyncio.get_running_loop().time()
+        except BaseException:
+            resp.close()
+            raise
+
+    async def _race(self, session, url: str, body: dict, headers: dict, hedge: bool):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.hedge_deadline()
+        primary = asyncio.create_task(self._attempt(session, url, body, headers))
+        pending = {primary}
+        second = None
+        second_sent_at = None
+        error = None
+
+        def send_hedge():
+            nonlocal second, second_sent_at
+            second = asyncio.create_task(self._attempt(session, url, body, headers))
+            second_sent_at = loop.time()
+            pending.add(second)
+            self.stats["hedged"] += 1
+
+        try:
+            while pending:
+                timeout = None
+                if hedge and second is None:
+                    timeout = max(0.0, deadline - loop.time())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self._may_hedge():
+                        logger.info(f"[TTSHedge] No audio after {(loop.time() - started) * 1000:.0f} ms; hedging")
+                        send_hedge()
+                    else:
+                        hedge = False
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    resp, first, first_at = task.result()
+                    self.ttfb.observe(first_at - started)
+                    if task is second:
+                        self.stats["hedge_wins"] += 1
+                        self._observe_ttfb(first_at - second_sent_at)
+                        if primary in pending:
+                            pending.discard(primary)
+                            observer = asyncio.create_task(self._observe_loser(primary, first_at))
+                            self._observers.add(observer)
+                            observer.add_done_callback(self._observers.discard)
+                    else:
+                        self._observe_ttfb(first_at - started)
+                    return resp, first
+                # A fast retryable failure: send the hedge now instead of waiting for the deadline.
+                # It counts against the same budget, so a brownout doesn't double the load.
+                if hedge and second is None and _retryable(error) and not pending and self._may_hedge():
+                    self.stats["retried"] += 1
+                    send_hedge()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_close_response)
+
+    async def _observe_loser(self, primary: asyncio.Task, hedge_first_at: float):
+        """Wait (bounded) for the losing primary's first byte to measure the saving, then close it"""
+        try:
+            resp, _, first_at = await asyncio.wait_for(primary, self.observe_s)
+            resp.close()
+            self.saved.observe(first_at - hedge_first_at)
+        except Exception:
+            # Still silent (or failed outright): count the lower bound of the saving
+            self.saved.observe(asyncio.get_running_loop().time() - hedge_first_at)
+            self.stats["saved_censored"] += 1
+
+    def get_stats(self) -> dict:
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "hedge_rate": round(self.stats["hedged"] / requests, 3) if requests else 0.0,
+            "deadline_ms": round(self._deadline_s * 1000, 1),
+            "ttfb_s": self.ttfb.summary(),
+            "saved_s": {**self.saved.summary(), "total": round(self.saved.sum, 3)},
+            "breakers": {endpoint: {"state": b.state, "trips": b.trips} for endpoint, b in self._breakers.items()},
+        }
+
+
+def _close_response(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is None:
+        task.result()[0].close()
+
+
+_client: Optional[HedgedTTSClient] = None
+
+
+def get_client() -> HedgedTTSClient:
+    global _client
+    if _client is None:
+        _client = HedgedTTSClient.from_env()
+    return _client
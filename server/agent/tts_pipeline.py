@@ -0,0 +1,174 @@
+"""
+Sentence-pipelined TTS
+Streamed LLM text is cut at sentence (and, for long runs, clause) boundaries and each
+segment is synthesized as soon as it is complete, a few at a time. Audio is yielded
+strictly in segment order, so the first sentence plays while the later ones are still
+being synthesized and perceived latency depends on the first sentence only.
+
+Closing the frame generator (LiveKit does this when the user interrupts) cancels every
+pending segment and its HTTP request.
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sentence end: terminal punctuation (optionally closed by a quote/bracket) + whitespace
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+# Clause end, only used once a segment is getting long
+_CLAUSE_END = re.compile(r"[,;:—–]\s+")
+# Periods that don't end a sentence
+_ABBREVIATIONS = {"e.g.", "i.e.", "etc.", "vs.", "mr.", "mrs.", "ms.", "dr."}
+
+_END = object()
+
+
+class SentenceSplitter:
+    """
+    Incremental splitter for streamed text. `push()` returns the segments completed by
+    the new text; `flush()` returns whatever is left at the end of the stream.
+
+    The first segment may end at a clause after `first_min_chars` so audio starts sooner;
+    later segments only break at clauses past `clause_after_chars`. Segments shorter than
+    `min_chars` are merged into the next one ("Okay." / "e.g." don't become requests).
+    """
+
+    def __init__(self, min_chars: int = 12, first_min_chars: int = 24, clause_after_chars: int = 120):
+        self.min_chars = min_chars
+        self.first_min_chars = first_min_chars
+        self.clause_after_chars = clause_after_chars
+        self._buffer = ""
+        self._emitted = 0
+
+    def push(self, text: str) -> list:
+        self._buffer += text
+        segments = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                return segments
+            segment, self._buffer = self._buffer[:cut].strip(), self._buffer[cut:]
+            if segment:
+                segments.append(segment)
+                self._emitted += 1
+
+    def _find_cut(self):
+        for match in _SENTENCE_END.finditer(self._buffer):
+            head = self._buffer[:match.end()].strip()
+            if len(head) >= self.min_chars and head.rsplit(None, 1)[-1].lower() not in _ABBREVIATIONS:
+                return match.end()
+
+        clause_min = self.first_min_chars if self._emitted == 0 else self.clause_after_chars
+        for match in _CLAUSE_END.finditer(self._buffer):
+            if match.start() + 1 >= clause_min:
+                return match.end()
+        return None
+
+    def flush(self) -> list:
+        segment, self._buffer = self._buffer.strip(), ""
+        return [segment] if segment else []
+
+
+class SentencePipeline:
+    """
+    Turns a text stream into audio frames with up to `max_concurrency` segments in
+    synthesis at once. `synthesize(text)` must return an async iterator of frames
+    (deepgram_patch.synthesize_frames bound to a model and key).
+    """
+
+    def __init__(self, synthesize, max_concurrency: int = 3, min_chars: int = 12, first_min_chars: int = 24, clause_after_chars: int = 120):
+        self.synthesize = synthesize
+        self.max_concurrency = max(1, max_concurrency)
+        self.splitter_options = {
+            "min_chars": min_chars,
+            "first_min_chars": first_min_chars,
+            "clause_after_chars": clause_after_chars,
+        }
+        self.stats = {"replies": 0, "segments": 0, "cancelled_segments": 0, "interrupted": 0}
+
+    @classmethod
+    def from_env(cls, synthesize) -> "SentencePipeline":
+        return cls(
+            synthesize,
+            max_concurrency=int(os.environ.get("TTS_PIPELINE_CONCURRENCY", "3")),
+            min_chars=int(os.environ.get("TTS_SEGMENT_MIN_CHARS", "12")),
+            first_min_chars=int(os.environ.get("TTS_FIRST_SEGMENT_MIN_CHARS", "24")),
+        )
+
+    async def frames(self, text):
+        """Async iterator of frames for the text stream, in order"""
+        splitter = SentenceSplitter(**self.splitter_options)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # One queue per segment, handed to the consumer in segment order
+        order = asyncio.Queue()
+        tasks = []
+        started = time.perf_counter()
+        first_frame_at = None
+        self.stats["replies"] += 1
+
+        async def synthesize_segment(segment: str, out: asyncio.Queue):
+            try:
+                async with semaphore:
+                    async for frame in self.synthesize(segment):
+                        out.put_nowait(frame)
+                out.put_nowait(_END)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                out.put_nowait(e)
+
+        def start_segment(segment: str):
+            out = asyncio.Queue()
+            tasks.append(asyncio.create_task(synthesize_segment(segment, out)))
+            order.put_nowait((segment, out))
+            self.stats["segments"] += 1
+
+        async def read_text():
+            try:
+                async for chunk in text:
+                    for segment in splitter.push(chunk):
+                        start_segment(segment)
+                for segment in splitter.flush():
+                    start_segment(segment)
+            finally:
+                order.put_nowait(None)
+
+        reader = asyncio.create_task(read_text())
+        played = 0
+        completed = False
+        try:
+            while True:
+                item = await order.get()
+                if item is None:
+                    break
+                segment, out = item
+                while True:
+                    frame = await out.get()
+                    if frame is _END:
+                        break
+                    if isinstance(frame, Exception):
+                        raise frame
+                    if first_frame_at is None:
+                        first_frame_at = time.perf_counter()
+                        logger.info(
+                            f"[TTSPipe] First audio after {first_frame_at - started:.3f}s "
+                            f"(segment of {len(segment)} chars: '{segment[:40]}...')"
+                        )
+                    yield frame
+                played += 1
+            # Surface a failure in the text stream itself
+            await reader
+            completed = True
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            if not completed:
+                self.stats["interrupted"] += 1
+                self.stats["cancelled_segments"] += len(tasks) - played
+            for task in [reader, *pending]:
+                task.cancel()
+            await asyncio.gather(reader, *pending, return_exceptions=True)
+            if not completed and tasks:
+                logger.info(f"[TTSPipe] Interrupted after {played}/{len(tasks)} segment(s)")
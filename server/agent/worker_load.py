@@ -0,0 +1,200 @@
+"""
+Load-aware job admission
+Each job process publishes a small status file (VAD inference time per second, event-loop
+lag) that the worker's `load_fnc` folds together with the number of active sessions and
+the local report backlog. LiveKit stops assigning jobs once the figure crosses
+WORKER_LOAD_THRESHOLD.
+
+Every component is normalised so 1.0 means "saturated"; the reported load is the worst
+of them, so one exhausted resource is enough to stop admission.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATUS_DIR = Path(__file__).parent / ".metrics" / "load"
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class SessionLoadReporter:
+    """
+    Runs inside a job process. Samples event-loop lag, accumulates VAD inference time
+    (fed from the VAD's `metrics_collected` events) and writes `<status_dir>/<pid>.json`.
+    """
+
+    def __init__(self, session_id: str, status_dir=DEFAULT_STATUS_DIR, interval_s: float = 1.0, lag_probe_s: float = 0.05):
+        self.session_id = session_id
+        self.path = Path(status_dir) / f"{os.getpid()}.json"
+        self.interval_s = interval_s
+        self.lag_probe_s = lag_probe_s
+
+        self._vad_seconds = 0.0
+        self._window_lag = 0.0
+        # Smoothed across windows so a single quiet second doesn't hide a busy session
+        self._vad_busy = 0.0
+        self._loop_lag = 0.0
+        self._task = None
+
+    @classmethod
+    def from_env(cls, session_id: str) -> "SessionLoadReporter":
+        return cls(session_id, status_dir=os.environ.get("WORKER_LOAD_DIR", str(DEFAULT_STATUS_DIR)))
+
+    def record_vad(self, metrics):
+        self._vad_seconds += getattr(metrics, "inference_duration_total", 0.0)
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        window_started = loop.time()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_probe_s)
+            self._window_lag = max(self._window_lag, loop.time() - started - self.lag_probe_s)
+
+            now = loop.time()
+            if now - window_started >= self.interval_s:
+                self._vad_busy = 0.5 * self._vad_busy + 0.5 * self._vad_seconds / (now - window_started)
+                # Lag spikes count immediately and decay over a few windows
+                self._loop_lag = max(self._window_lag, 0.5 * self._loop_lag)
+                self._publish(vad_busy=self._vad_busy, loop_lag_s=self._loop_lag)
+                self._vad_seconds = 0.0
+                self._window_lag = 0.0
+                window_started = now
+
+    def _publish(self, vad_busy: float, loop_lag_s: float):
+        status = {
+            "pid": os.getpid(),
+            "session": self.session_id,
+            "ts": time.time(),
+            "vad_busy": round(vad_busy, 4),
+            "loop_lag_s": round(max(0.0, loop_lag_s), 4),
+        }
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(status))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"[LOAD] Could not write {self.path}: {e}")
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class WorkerLoad:
+    """
+    `load_fnc` for WorkerOptions. Called by LiveKit every 0.5 s from an executor thread,
+    so anything slower than a few file reads is cached.
+    """
+
+    def __init__(
+        self,
+        sessions_per_core: float = 4.0,
+        lag_limit_s: float = 0.1,
+        report_backlog_limit: int = 20,
+        status_dir=DEFAULT_STATUS_DIR,
+        stale_after_s: float = 5.0,
+        queue_refresh_s: float = 5.0,
+        report_queue=None,
+    ):
+        self.sessions_per_core = sessions_per_core
+        self.lag_limit_s = lag_limit_s
+        self.report_backlog_limit = report_backlog_limit
+        self.status_dir = Path(status_dir)
+        self.stale_after_s = stale_after_s
+        self.queue_refresh_s = queue_refresh_s
+        self.report_queue = report_queue
+        self.cores = available_cores()
+
+        self._queued_reports = 0
+        self._queue_checked_at = float("-inf")
+        self._last_logged = None
+        self.components = {}
+
+    @classmethod
+    def from_env(cls) -> "WorkerLoad":
+        from report_queue import ReportQueue
+
+        return cls(
+            sessions_per_core=float(os.environ.get("SESSIONS_PER_CORE", "4")),
+            lag_limit_s=float(os.environ.get("WORKER_LAG_LIMIT_MS", "100")) / 1000,
+            report_backlog_limit=int(os.environ.get("REPORT_BACKLOG_LIMIT", "20")),
+            status_dir=os.environ.get("WORKER_LOAD_DIR", str(DEFAULT_STATUS_DIR)),
+            report_queue=ReportQueue.from_env(),
+        )
+
+    def _read_statuses(self):
+        now = time.time()
+        statuses = []
+        for path in self.status_dir.glob("*.json"):
+            try:
+                status = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if now - status.get("ts", 0) > self.stale_after_s:
+                # Job process died without cleaning up
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+                continue
+            statuses.append(status)
+        return statuses
+
+    def _report_backlog(self) -> int:
+        if self.report_queue is None:
+            return 0
+        now = time.monotonic()
+        if now - self._queue_checked_at >= self.queue_refresh_s:
+            self._queue_checked_at = now
+            try:
+                counts = self.report_queue.counts()
+                self._queued_reports = counts.get("pending", 0) + counts.get("running", 0)
+            except Exception as e:
+                logger.warning(f"[LOAD] Could not read report queue: {e}")
+        return self._queued_reports
+
+    def compute(self, active_sessions: int) -> float:
+        statuses = self._read_statuses()
+        capacity = max(1.0, self.sessions_per_core * self.cores)
+        self.components = {
+            "sessions": active_sessions / capacity,
+            "vad": sum(s.get("vad_busy", 0.0) for s in statuses) / self.cores,
+            "loop_lag": max((s.get("loop_lag_s", 0.0) for s in statuses), default=0.0) / self.lag_limit_s,
+            "reports": self._report_backlog() / self.report_backlog_limit if self.report_backlog_limit else 0.0,
+        }
+        load = min(1.0, max(self.components.values()))
+
+        # Log when the dominant component or the rounded figure changes, not every 0.5 s
+        dominant = max(self.components, key=self.components.get)
+        summary = (dominant, round(load, 1))
+        if summary != self._last_logged:
+            self._last_logged = summary
+            detail = ", ".join(f"{name}={value:.2f}" for name, value in self.components.items())
+            logger.info(f"[LOAD] Worker load {load:.2f} ({active_sessions} active; {detail})")
+        return load
+
+    def __call__(self, worker) -> float:
+        return self.compute(len(worker.active_jobs))
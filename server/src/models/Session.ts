@@ -38,6 +38,8 @@ export interface ISession extends Document {
     content: string;
     timestamp: Date;
   }>;
+  // Set when the agent gave up generating the report (cleared by a final report)
+  reportError?: string;
   feedback?: {
     correctness: boolean;
     overall_score: number;
@@ -49,7 +51,24 @@ export interface ISession extends Document {
       time_management: number;
       communication: number;
     };
-    feedback_markdown: string;
+    code_issues?: Array<{
+      line_number: number;
+      code_snippet: string;
+      issue: string;
+      suggestion: string;
+      severity: 'error' | 'warning' | 'info';
+    }>;
+    transcript_issues?: Array<{
+      quote: string;
+      issue: string;
+      what_should_have_been_said: string;
+      category: string;
+    }>;
+    feedback_markdown?: string;
+    // True while the report is still being generated (sections arrive as they finish)
+    partial?: boolean;
+    // Optional report sections that failed and were filled with defaults
+    degraded?: string[];
     // Legacy field for backwards compatibility
     score?: number;
   };
@@ -91,6 +110,7 @@ const SessionSchema: Schema = new Schema({
     content: { type: String, required: true },
     timestamp: { type: Date, default: Date.now },
   }],
+  reportError: { type: String },
   feedback: {
     correctness: { type: Boolean },
     overall_score: { type: Number },
@@ -102,7 +122,22 @@ const SessionSchema: Schema = new Schema({
       time_management: { type: Number },
       communication: { type: Number }
     },
+    code_issues: [{
+      line_number: { type: Number },
+      code_snippet: { type: String },
+      issue: { type: String },
+      suggestion: { type: String },
+      severity: { type: String, enum: ['error', 'warning', 'info'] },
+    }],
+    transcript_issues: [{
+      quote: { type: String },
+      issue: { type: String },
+      what_should_have_been_said: { type: String },
+      category: { type: String },
+    }],
     feedback_markdown: { type: String },
+    partial: { type: Boolean },
+    degraded: { type: [String], default: undefined },
     score: { type: Number }, // Legacy field
   },
   createdAt: { type: Date, default: Date.now },
@@ -165,8 +165,10 @@ router.post('/livekit/token', async (req: Request, res: Response) => {
   }
 });
 // POST /save-analysis - Called by Python Agent to save the final report
+// `partial: true` carries the sections finished so far while the report is still generating;
+// `failed: true` means the agent gave up on the report, so the result page stops waiting
 router.post('/save-analysis', async (req: Request, res: Response) => {
-  const { sessionId, analysis } = req.body;
+  const { sessionId, analysis, partial, failed, error } = req.body;
 
   try {
     const session = await Session.findOne({ sessionId });
@@ -174,14 +176,33 @@ router.post('/save-analysis', async (req: Request, res: Response) => {
       return res.status(404).json({ error: 'Session not found' });
     }
 
-    session.feedback = analysis;
-    // Mark as completed if not already
-    session.status = 'completed';
+    if (failed) {
+      // A final report that already landed stands
+      if (session.feedback?.feedback_markdown && !session.feedback.partial) {
+        return res.json({ success: true, ignored: true });
+      }
+      session.reportError = String(error || 'Report generation failed');
+    } else if (partial) {
+      // A late partial update must never replace the final report
+      if (session.feedback?.feedback_markdown && !session.feedback.partial) {
+        return res.json({ success: true, ignored: true });
+      }
+      session.feedback = { ...analysis, partial: true };
+    } else {
+      session.feedback = { ...analysis, partial: false };
+      session.reportError = undefined;
+      // Mark as completed if not already
+      session.status = 'completed';
+    }
 
     await session.save();
     sessionCache.set(sessionId, session.toObject());
 
-    console.log(`[Analysis] Report saved for session ${sessionId} (from Agent)`);
+    if (failed) {
+      console.error(`[Analysis] Report generation failed for session ${sessionId}: ${session.reportError}`);
+    } else if (!partial) {
+      console.log(`[Analysis] Report saved for session ${sessionId} (from Agent)`);
+    }
     res.json({ success: true });
   } catch (error) {
     console.error('Error saving analysis:', error);
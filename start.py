@@ -1,14 +1,26 @@
 #!/usr/bin/env python3
 """
 Socratis - One-Click Startup Script
-Starts all services: Backend (Express), Frontend (Next.js), and Voice Agent (Python)
+Starts all services: Backend (Express), Frontend (Next.js), Voice Agent and Report Worker (Python)
+
+Services launch concurrently and are probed for real readiness (HTTP for the backend and
+frontend, the "registered worker" log line for the agent). A service only waits on the
+services it depends on. Crashed workers are restarted with exponential backoff, and a
+service that keeps crashing is given up on instead of restarted forever.
+
+All service output goes through one async log collector: every pipe is drained
+continuously, lines are timestamped and prefixed, and each service gets a size-rotated
+log file. `python start.py --tail` also mirrors the merged stream to the console.
 """
 
+import argparse
+import asyncio
+import os
+import signal
 import subprocess
 import sys
-import os
 import time
-import signal
+from collections import deque
 from pathlib import Path
 
 # Get the root directory (where this script is located)
@@ -17,140 +29,370 @@ SERVER_DIR = ROOT_DIR / "server"
 CLIENT_DIR = ROOT_DIR / "client"
 AGENT_DIR = ROOT_DIR / "server" / "agent"
 
-processes = []
+# Restart backoff: 1s, 2s, 4s ... capped; reset once a process has stayed up for a while
+BACKOFF_INITIAL_S = 1.0
+BACKOFF_MAX_S = 30.0
+STABLE_AFTER_S = 60.0
+# Crash loop: this many crashes inside the window and we stop restarting
+CRASH_LOOP_COUNT = 5
+CRASH_LOOP_WINDOW_S = 120.0
+
+PROBE_INTERVAL_S = 0.25
+
+# Log rotation: <name>.log plus this many numbered backups, each up to LOG_MAX_BYTES
+LOG_MAX_BYTES = int(float(os.environ.get("SOCRATIS_LOG_MAX_MB", "10")) * 1024 * 1024)
+LOG_BACKUPS = int(os.environ.get("SOCRATIS_LOG_BACKUPS", "3"))
+# Longest line kept intact; anything longer is split (a child can't make us buffer forever)
+MAX_LINE_BYTES = 64 * 1024
+
+
+class RotatingLog:
+    """Append-only log file rotated by size: name.log -> name.log.1 -> ... -> name.log.N"""
+
+    def __init__(self, path: Path, max_bytes: int = LOG_MAX_BYTES, backups: int = LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self._file = open(self.path, "wb")
+        self._size = 0
+
+    def write(self, data: bytes):
+        if self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._size += len(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class LogCollector:
+    """Drains child output without ever blocking on a full pipe; fans lines out to files and the console"""
+
+    def __init__(self, tail: bool = False):
+        self.tail = tail
+        self.logs = {}
+
+    def log_for(self, service) -> RotatingLog:
+        if service.name not in self.logs:
+            self.logs[service.name] = RotatingLog(service.log_path)
+        return self.logs[service.name]
+
+    def emit(self, service, line: bytes):
+        now = time.time()
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)) + f".{int(now * 1000) % 1000:03d}"
+        prefix = f"{stamp} [{service.name}] ".encode("utf-8")
+        self.log_for(service).write(prefix + line + b"\n")
+        if self.tail:
+            sys.stdout.write((prefix + line).decode("utf-8", "replace") + "\n")
+        service.on_line(line)
+
+    async def drain(self, service, stream: asyncio.StreamReader):
+        pending = b""
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                self.emit(service, line.rstrip(b"\r"))
+            while len(pending) > MAX_LINE_BYTES:
+                self.emit(service, pending[:MAX_LINE_BYTES])
+                pending = pending[MAX_LINE_BYTES:]
+            # One flush per read, not per line
+            self.log_for(service).flush()
+            if self.tail:
+                sys.stdout.flush()
+        if pending:
+            self.emit(service, pending.rstrip(b"\r"))
+        self.log_for(service).flush()
+
+    def note(self, service, message: str):
+        """Supervisor events (restarts, crash loops) interleaved with the service's own output"""
+        self.emit(service, f"--- {message} ---".encode("utf-8"))
+        self.log_for(service).flush()
+
+    def close(self):
+        for log in self.logs.values():
+            log.close()
+
+
+async def http_probe(host: str, port: int, path: str = "/", ok_below: int = 500) -> bool:
+    """True once the service answers HTTP with a status below `ok_below`"""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=2.0)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    try:
+        writer.write(f"GET {path} HTTP/1.0\r\nHost: {host}:{port}\r\n\r\n".encode("ascii"))
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout=30.0)
+        parts = status_line.decode("latin-1").split()
+        return len(parts) >= 2 and parts[1].isdigit() and int(parts[1]) < ok_below
+    except (OSError, asyncio.TimeoutError):
+        return False
+    finally:
+        writer.close()
+
+
+class Service:
+    def __init__(self, name, cmd, cwd, log_file, probe=None, depends_on=(), restart=False, ready_timeout_s=120.0):
+        self.name = name
+        self.cmd = cmd
+        self.cwd = cwd
+        self.log_file = log_file
+        self.probe = probe
+        self.depends_on = list(depends_on)
+        self.restart = restart
+        self.ready_timeout_s = ready_timeout_s
+
+        self.proc = None
+        self.ready = asyncio.Event()
+        self.time_to_ready = None
+        self.failed = False
+        self.crashes = []
+        self.collector = None
+        self.drain_task = None
+        self._markers = {}
+        self._recent = deque(maxlen=50)
+
+    @property
+    def log_path(self) -> Path:
+        return ROOT_DIR / self.log_file
+
+    def on_line(self, line: bytes):
+        self._recent.append(line)
+        for marker in self._markers:
+            if not self._markers[marker] and marker in line:
+                self._markers[marker] = True
+
+    def log_contains(self, marker: str) -> bool:
+        """Readiness via a log line written since the current process started"""
+        key = marker.encode("utf-8")
+        self._markers.setdefault(key, False)
+        return self._markers[key]
+
+    def log_tail(self, lines: int = 15) -> str:
+        return "\n".join(line.decode("utf-8", "replace") for line in list(self._recent)[-lines:])
+
+    async def spawn(self):
+        """Start a service in a new process"""
+        print(f"🚀 Starting {self.name}...")
+        self._markers = {marker: False for marker in self._markers}
+        self._recent.clear()
+
+        kwargs = {}
+        if os.name == "posix":
+            # Own process group, so stopping the shell also stops npm/node/python under it
+            kwargs["start_new_session"] = True
+        self.proc = await asyncio.create_subprocess_shell(
+            self.cmd,
+            cwd=self.cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            **kwargs,
+        )
+        self.drain_task = asyncio.create_task(self.collector.drain(self, self.proc.stdout))
+
+    async def wait_ready(self, started_at: float):
+        deadline = time.monotonic() + self.ready_timeout_s
+        while time.monotonic() < deadline:
+            if self.proc.returncode is not None:
+                return
+            if self.probe is None or await self.probe(self):
+                self.time_to_ready = time.monotonic() - started_at
+                self.ready.set()
+                print(f"✅ {self.name} ready in {self.time_to_ready:.1f}s")
+                return
+            await asyncio.sleep(PROBE_INTERVAL_S)
+        print(f"⚠️  {self.name} not ready after {self.ready_timeout_s:.0f}s - check {self.log_file}")
+
+    def stop(self, sig=signal.SIGTERM):
+        if self.proc is None or self.proc.returncode is not None:
+            return
+        try:
+            if os.name == "posix":
+                os.killpg(self.proc.pid, sig)
+            elif sig == signal.SIGTERM:
+                self.proc.terminate()
+            else:
+                self.proc.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def record_crash(self) -> bool:
+        """Returns True when the service is crash-looping"""
+        now = time.monotonic()
+        self.crashes = [t for t in self.crashes if now - t < CRASH_LOOP_WINDOW_S] + [now]
+        return len(self.crashes) >= CRASH_LOOP_COUNT
 
-def cleanup(signum=None, frame=None):
+    async def supervise(self, services: dict):
+        # Dependency ordering only where it is actually needed
+        for dependency in self.depends_on:
+            await services[dependency].ready.wait()
+
+        backoff = BACKOFF_INITIAL_S
+        while True:
+            started_at = time.monotonic()
+            await self.spawn()
+            ready_task = asyncio.create_task(self.wait_ready(started_at))
+            exit_code = await self.proc.wait()
+            ready_task.cancel()
+            # Whatever the process wrote before dying is still in the pipe
+            # (bounded: an orphaned grandchild may hold the pipe open)
+            await asyncio.wait([self.drain_task], timeout=2)
+            uptime = time.monotonic() - started_at
+
+            if not self.restart:
+                self.failed = True
+                print(f"⚠️  {self.name} stopped (exit code: {exit_code}) - check {self.log_file}")
+                return
+
+            if uptime >= STABLE_AFTER_S:
+                backoff = BACKOFF_INITIAL_S
+            if self.record_crash():
+                self.failed = True
+                self.collector.note(self, f"crash loop: {len(self.crashes)} crashes, not restarting")
+                print(
+                    f"❌ {self.name} crashed {len(self.crashes)} times in {CRASH_LOOP_WINDOW_S:.0f}s "
+                    f"(last exit code: {exit_code}). Not restarting - check {self.log_file}:"
+                )
+                print(self.log_tail())
+                return
+
+            self.collector.note(self, f"exited with code {exit_code} after {uptime:.0f}s, restarting in {backoff:.0f}s")
+            print(f"⚠️  {self.name} stopped (exit code: {exit_code}) after {uptime:.0f}s. Restarting in {backoff:.0f}s...")
+            await asyncio.sleep(backoff)
+            backoff = min(BACKOFF_MAX_S, backoff * 2)
+
+
+def build_services():
+    async def backend_probe(service):
+        return await http_probe("127.0.0.1", 4000, "/", ok_below=300)
+
+    async def frontend_probe(service):
+        return await http_probe("127.0.0.1", 3000, "/")
+
+    async def agent_probe(service):
+        return service.log_contains("registered worker")
+
+    async def report_worker_probe(service):
+        return service.log_contains("[WORKER] Starting")
+
+    services = [
+        Service("Backend", "npm run dev", SERVER_DIR, "backend.log", probe=backend_probe, ready_timeout_s=60),
+        Service("Frontend", "npm run dev", CLIENT_DIR, "frontend.log", probe=frontend_probe, ready_timeout_s=180),
+        Service("Agent", "python agent.py start", AGENT_DIR, "agent.log", probe=agent_probe, restart=True),
+        # Submits finished reports to the backend; no point draining the queue before it is up
+        Service("Report Worker", "python report_worker.py", AGENT_DIR, "report_worker.log",
+                probe=report_worker_probe, depends_on=["Backend"], restart=True, ready_timeout_s=60),
+    ]
+    return {service.name: service for service in services}
+
+
+async def shutdown(services: dict):
     """Cleanup all spawned processes"""
     print("\n🛑 Shutting down all services...")
-    for proc in processes:
-        try:
-            proc.terminate()
-            proc.wait(timeout=5)
-        except:
-            try:
-                proc.kill()
-            except:
-                pass
+    for service in services.values():
+        service.stop(signal.SIGTERM)
+    waits = [s.proc.wait() for s in services.values() if s.proc is not None and s.proc.returncode is None]
+    if waits:
+        _, pending = await asyncio.wait([asyncio.ensure_future(w) for w in waits], timeout=5)
+        if pending:
+            for service in services.values():
+                service.stop(getattr(signal, "SIGKILL", signal.SIGTERM))
+    # Let the collector write out the last lines before closing the files
+    drains = [s.drain_task for s in services.values() if s.drain_task is not None]
+    if drains:
+        await asyncio.wait(drains, timeout=2)
     print("✅ All services stopped.")
-    sys.exit(0)
-
-def start_service(name, cmd, cwd, log_file=None):
-    """Start a service in a new process"""
-    print(f"🚀 Starting {name}...")
-    
-    # Create log file for capturing output
-    if log_file:
-        log_path = ROOT_DIR / log_file
-        stdout = open(log_path, 'w')
-        stderr = subprocess.STDOUT
-    else:
-        stdout = subprocess.PIPE
-        stderr = subprocess.PIPE
-    
-    # Start process without CREATE_NEW_CONSOLE to properly track status
-    proc = subprocess.Popen(
-        cmd,
-        cwd=cwd,
-        shell=True,
-        stdout=stdout,
-        stderr=stderr
-    )
-    
-    processes.append(proc)
-    return proc
 
-def main():
-    print("=" * 60)
-    print("🎙️  SOCRATIS - AI Interview Platform")
-    print("=" * 60)
-    print()
-    
-    # Register signal handlers for cleanup
-    signal.signal(signal.SIGINT, cleanup)
-    signal.signal(signal.SIGTERM, cleanup)
-    
-    # Check if directories exist
-    if not SERVER_DIR.exists():
-        print(f"❌ Server directory not found: {SERVER_DIR}")
-        sys.exit(1)
-    if not CLIENT_DIR.exists():
-        print(f"❌ Client directory not found: {CLIENT_DIR}")
-        sys.exit(1)
-    if not AGENT_DIR.exists():
-        print(f"❌ Agent directory not found: {AGENT_DIR}")
-        sys.exit(1)
-    
-    # Start Backend Server (Port 4000)
-    start_service(
-        "Backend Server (Port 4000)",
-        "npm run dev",
-        SERVER_DIR,
-        "backend.log"
-    )
-    time.sleep(3)  # Give server time to start
-    
-    # Start Frontend (Port 3000)
-    start_service(
-        "Frontend (Port 3000)",
-        "npm run dev",
-        CLIENT_DIR,
-        "frontend.log"
-    )
-    time.sleep(3)  # Give Next.js time to compile
-    
-    # Start Voice Agent
-    start_service(
-        "Voice Agent (LiveKit)",
-        "python agent.py start",
-        AGENT_DIR,
-        "agent.log"
-    )
-    
+
+async def report_readiness(services: dict, started_at: float):
+    await asyncio.gather(*(service.ready.wait() for service in services.values()))
+    total = time.monotonic() - started_at
+    slowest = max(services.values(), key=lambda s: s.time_to_ready or 0.0)
+
     print()
     print("=" * 60)
-    print("✅ All services started!")
+    print(f"✅ All services ready in {total:.1f}s (slowest: {slowest.name})")
+    for service in services.values():
+        print(f"   {service.name:<14} {service.time_to_ready:>6.1f}s")
     print()
     print("📍 Frontend:  http://localhost:3000")
     print("📍 Backend:   http://localhost:4000")
     print("📍 Interview: http://localhost:3000/interview/new")
     print()
-    print("📄 Logs: backend.log, frontend.log, agent.log")
+    print("📄 Logs: " + ", ".join(service.log_file for service in services.values()))
     print()
     print("Press Ctrl+C to stop all services")
     print("=" * 60)
-    
-    # Service names for error reporting
-    service_names = ["Backend", "Frontend", "Agent"]
-    failed_services = set()
-    
-    # Keep the script running and monitor processes
+
+
+async def run(tail: bool = False):
+    services = build_services()
+    collector = LogCollector(tail=tail)
+    for service in services.values():
+        service.collector = collector
+    started_at = time.monotonic()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows: rely on KeyboardInterrupt
+
+    supervisors = [asyncio.create_task(service.supervise(services)) for service in services.values()]
+    readiness = asyncio.create_task(report_readiness(services, started_at))
     try:
-        while True:
-            time.sleep(2)
-            # Check if any process has died
-            for i, proc in enumerate(processes):
-                if proc.poll() is not None:
-                    exit_code = proc.returncode
-                    log_file = ["backend.log", "frontend.log", "agent.log"][i]
-                    
-                    if i == 2: # Agent Logic
-                         print(f"⚠️  Agent stopped (exit code: {exit_code}). Restarting in 1s...")
-                         time.sleep(1)
-                         # Restart Agent
-                         new_proc = start_service(
-                            "Voice Agent (LiveKit) [Restored]",
-                            "python agent.py start",
-                            AGENT_DIR,
-                            "agent.log"
-                         )
-                         processes[i] = new_proc
-                    elif i not in failed_services:
-                         failed_services.add(i)
-                         print(f"⚠️  {service_names[i]} stopped (exit code: {exit_code}) - check {log_file}")
+        await stop.wait()
+    finally:
+        readiness.cancel()
+        for task in supervisors:
+            task.cancel()
+        await shutdown(services)
+        collector.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start all Socratis services")
+    parser.add_argument("--tail", action="store_true", help="also print the merged service logs to the console")
+    args = parser.parse_args()
 
+    print("=" * 60)
+    print("🎙️  SOCRATIS - AI Interview Platform")
+    print("=" * 60)
+    print()
+
+    # Check if directories exist
+    for label, directory in (("Server", SERVER_DIR), ("Client", CLIENT_DIR), ("Agent", AGENT_DIR)):
+        if not directory.exists():
+            print(f"❌ {label} directory not found: {directory}")
+            sys.exit(1)
+
+    try:
+        asyncio.run(run(tail=args.tail))
     except KeyboardInterrupt:
-        cleanup()
+        pass
+
 
 if __name__ == "__main__":
     main()
-